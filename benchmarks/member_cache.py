@@ -0,0 +1,93 @@
+'''Member cache memory benchmark.
+
+Compare the memory used by the default member cache with the lean mode
+(LeanMembers in config.yml). Both use a real discord.py bot: in the default
+mode every member is created from gateway data and added to its guild like
+when guilds are chunked, in the lean mode every member joins through the
+GUILD_MEMBER_ADD parser and only :class:`RecentMembers` keeps them.
+
+Usage: python -m benchmarks.member_cache [guilds] [members per guild]
+'''
+
+import asyncio, sys, tracemalloc
+from discord import Intents, Member, MemberCacheFlags
+from discord.ext import commands
+from utils.members import RecentMembers
+
+
+def make_bot(**options):
+    return commands.Bot(command_prefix="!", intents=Intents.all(), chunk_guilds_at_startup=False, **options)
+
+
+def member_data(guild_id:int, user_id:int) -> dict:
+    return {
+        "guild_id": str(guild_id),
+        "user": {"id": str(user_id), "username": f"user{user_id}", "discriminator": f"{user_id % 10000:04}", "avatar": f"{user_id:032x}"},
+        "roles": [],
+        "joined_at": "2021-01-01T00:00:00+00:00",
+        "nick": None
+    }
+
+
+def measure(function, *args):
+    """Run a function and return the memory still allocated by it in MiB"""
+
+    tracemalloc.start()
+    result = function(*args)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    del result
+    return size / 1024 / 1024
+
+
+def full(bot, guilds:int, members:int):
+    """Every member of every guild is kept, like the default member cache"""
+
+    state = bot._connection
+
+    for g in range(guilds):
+        guild = state._add_guild_from_data({"id": str(g + 1), "name": f"guild{g}", "member_count": members})
+
+        for m in range(members):
+            # like a member from a chunk response
+            guild._add_member(Member(data=member_data(g + 1, g * members + m + 1), guild=guild, state=state))
+
+    return state
+
+
+def lean(bot, guilds:int, members:int):
+    """Only the recently seen members are kept, like LeanMembers"""
+
+    state = bot._connection
+    parse = state.parsers["GUILD_MEMBER_ADD"]
+
+    for g in range(guilds):
+        state._add_guild_from_data({"id": str(g + 1), "name": f"guild{g}", "member_count": members})
+
+        for m in range(members):
+            # every member passes through the cache once, like a join event
+            parse(member_data(g + 1, g * members + m + 1))
+
+        # run the join listeners, so the recent members get the members
+        bot.loop.run_until_complete(asyncio.sleep(0))
+
+    return state
+
+
+if __name__ == "__main__":
+    guilds = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    members = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    asyncio.set_event_loop(asyncio.new_event_loop())
+
+    full_bot = make_bot()
+    lean_bot = make_bot(member_cache_flags=MemberCacheFlags.none())
+    RecentMembers(lean_bot)
+
+    full_size = measure(full, full_bot, guilds, members)
+    lean_size = measure(lean, lean_bot, guilds, members)
+
+    print(f"{guilds} guilds with {members} members each")
+    print(f"full: {full_size:8.2f} MiB")
+    print(f"lean: {lean_size:8.2f} MiB ({lean_size / full_size:.1%} of full)")
@@ -1,9 +1,51 @@
 import discord
+from collections import OrderedDict
 from discord.ext import commands
 from utils.paginator import Paginator
 from typing import Union
 
 
+class HelpCache():
+    """Rendered help output
+
+    Help embeds only change when the commands, the prefix or if the author is
+    a owner changes, so they are rendered once and kept here. The keys should
+    contain the command index version so old renders are never used.
+    When the cache is full the least recently used render is removed.
+
+    Args:
+    -----
+    size: :class:`int`
+        The max amount of renders to keep. Defaults to 64.
+    """
+
+    def __init__(self, size:int=64):
+        self.size = size
+        self.renders = OrderedDict()
+
+
+    def get(self, key):
+        """Get a render, or None if it isn't cached"""
+
+        render = self.renders.get(key)
+
+        if render is not None:
+            self.renders.move_to_end(key)
+
+        return render
+
+
+    def set(self, key, render):
+        """Cache a render"""
+
+        self.renders[key] = render
+
+        if len(self.renders) > self.size:
+            self.renders.popitem(last=False)
+
+        return render
+
+
 class MyHelp(commands.HelpCommand):
     '''Show information about all commands, the commands in a module or a specific command.
     Uses a paginator so you can navigate without reinvoking the help command.'''
@@ -18,49 +60,37 @@ class MyHelp(commands.HelpCommand):
         # defining variables
         ctx = self.context
         bot = self.context.bot
-        prefix = self.clean_prefix
-
-        # create embed
-        embed = discord.Embed(
-            color=bot.config.Color,
-            title=f"{bot.user.name} help",
-            description=bot.description
-        )
-
-        for extension in bot.cogs.values():
-            # go through all extensions
-            
-            if extension.qualified_name == "Jishaku":
-                # ignore the extension if it was Jishaku
-                continue
+        index = bot.command_index
+        is_owner = await bot.is_owner(ctx.author)
+        key = ("bot", is_owner, index.version)
 
-            # a list of all the available commands in this extensions
-            commands = []
+        embed = bot.help_cache.get(key)
 
-            for cmd in extension.walk_commands():
-                # go through all commands
+        if embed is None:
+            # create embed
+            embed = discord.Embed(
+                color=bot.config.Color,
+                title=f"{bot.user.name} help",
+                description=bot.description
+            )
 
-                if cmd.hidden and not await bot.is_owner(ctx.author):
-                    # if the command is hidden and the author is not a bot owner
-                    continue
-                
-                if cmd.parent:
-                    # if the command is a subcommand, ignore it
-                    continue
+            # the available commands in each extension,
+            # the index has no jishaku commands or subcommands
+            extensions = OrderedDict()
 
+            for cmd in index.normal(is_owner):
                 # add the command to command list
-                commands.append(f"`{cmd.name:12}` - {cmd.brief}")
+                extensions.setdefault(cmd.cog.qualified_name, []).append(f"`{cmd.name:12}` - {cmd.brief}")
 
-            if len(commands) == 0:
-                # ignore this extension if it didn't have any commands
-                continue
+            for name, commands in extensions.items():
+                # add the extension to embed with all of its commands
+                embed.add_field(
+                    name=name,
+                    value='\n'.join(commands),
+                    inline=False
+                )
 
-            # add the extension to embed with all of its commands
-            embed.add_field(
-                name=extension.qualified_name,
-                value='\n'.join(commands),
-                inline=False
-            )
+            bot.help_cache.set(key, embed)
 
         # send help embed
         return await ctx.send(embed=embed)
@@ -85,6 +115,14 @@ class MyHelp(commands.HelpCommand):
             await ctx.send(f'No command called "{cog.qualified_name}" found.')
             return
         
+        key = ("cog", cog.qualified_name, is_owner, prefix, bot.command_index.version)
+        embed = bot.help_cache.get(key)
+        
+        if embed is not None:
+            # alredy rendered
+            await ctx.send(embed=embed)
+            return
+        
         # creating help embed
         embed = discord.Embed(
             color=bot.config.Color,
@@ -97,7 +135,7 @@ class MyHelp(commands.HelpCommand):
         
         for cmd in cog.get_commands():
             # go through all the commands in this cog
-            if cmd.hidden and not await bot.is_owner(ctx.author):
+            if cmd.hidden and not is_owner:
                 # ignore the command if it is hidden
                 continue
             
@@ -126,6 +164,8 @@ class MyHelp(commands.HelpCommand):
             value="\n".join(command_list)
         )
         
+        bot.help_cache.set(key, embed)
+        
         # send embed
         await ctx.send(embed=embed)
         return
@@ -183,7 +223,7 @@ class MyHelp(commands.HelpCommand):
         # what module this command is from
         embed.add_field(
             name    = "Module",
-            value   = command.cog.qualified_name.capitalize(),
+            value   = command.cog.qualified_name.capitalize() if command.cog else "None",
             inline=False
         )
         
@@ -270,7 +310,49 @@ class MyHelp(commands.HelpCommand):
 
 
 
-    async def generate_embeds_for_normal_command(self, command):
+    def render_pages(self, key, commands) -> tuple:
+        """Render a help page for each command, or get them from the cache
+
+        The footer of each page is set to "Page: {page}/{total_pages}" so
+        the paginator never has to change the cached embeds.
+
+        args
+        ----
+        key: :class:`tuple`
+            The cache key for these pages.
+        commands: List[Union[:class:`discord.Command`, :class:`discord.Group`]]
+            The commands to render pages for.
+
+        returns
+        -------
+        Tuple[:class:`discord.Embed`]:
+            A embed for each command.
+
+        Dict[:class:`str`, :class:`int`]
+            The page index for each qualified command name.
+        """
+
+        render = self.context.bot.help_cache.get(key)
+
+        if render is not None:
+            return render
+
+        embeds = []
+        indexes = {}
+
+        for number, cmd in enumerate(commands):
+            embed = self.generate_command_embed(cmd)
+            embed.set_footer(text=f"Page: {number+1}/{len(commands)}")
+
+            embeds.append(embed)
+            indexes[cmd.qualified_name] = number
+
+        return self.context.bot.help_cache.set(key, (tuple(embeds), indexes))
+
+
+
+
+    async def generate_embeds_for_normal_command(self, command, is_owner:bool=None):
         """Generate a list of embeds for all the commands for this bot.
         
         A list of embeds for each and every command in the bot. This includes all
@@ -281,6 +363,8 @@ class MyHelp(commands.HelpCommand):
         args
         ----
         commands: Union[:class:`discord.Command`, :class:`discord.Group`]
+        is_owner: Optional[:class:`bool`]
+            if the author is a bot owner. Checked if None. Defaults to None.
         
         returns
         -------
@@ -292,36 +376,29 @@ class MyHelp(commands.HelpCommand):
         """
         
         # define variables
-        embeds = []
-        index = None
         ctx = self.context
         bot = ctx.bot
         attempted_command = ctx.message.content.split()[1]
-        is_owner = await bot.is_owner(ctx.author)
         
-        if command.cog.qualified_name == "Jishaku" and not is_owner:
+        if is_owner is None:
+            is_owner = await bot.is_owner(ctx.author)
+        
+        if command.cog and command.cog.qualified_name == "Jishaku" and not is_owner:
             await ctx.send(f'No command called "{attempted_command}" found.')
             return
         
-        for cog in bot.cogs.values():
-            # go trough each cog this bot currently has active
-            
-            for cmd in cog.walk_commands():
-                # go through each command in this cog
-                
-                if self._is_valid(cmd, is_owner) and not cmd.parent:
-                    # if command is valid, create embed
-                    embed=self.generate_command_embed(cmd)
-                    embeds.append(embed)
-                    
-                    if cmd == command:
-                        # if this command is the requested one, set the index
-                        index = embeds.index(embed)
+        index = bot.command_index
+        key = ("commands", is_owner, self.clean_prefix, index.version)
+        embeds, indexes = self.render_pages(key, index.normal(is_owner))
+        
+        if command.qualified_name not in indexes:
+            # the command isn't in the command index, like the jishaku commands
+            return [self.generate_command_embed(command)], 0
 
-        return embeds, index
+        return list(embeds), indexes[command.qualified_name]
 
     
-    async def generate_embeds_for_subcommand(self, command):
+    async def generate_embeds_for_subcommand(self, command, is_owner:bool=None):
         """Generate a list of embeds for all the subcommands for this commands parent
         
         A list of embeds for each and every command in this commands parent. This includes all
@@ -332,6 +409,8 @@ class MyHelp(commands.HelpCommand):
         args
         ----
         commands: Union[:class:`discord.Command`, :class:`discord.Group`]
+        is_owner: Optional[:class:`bool`]
+            if the author is a bot owner. Checked if None. Defaults to None.
         
         returns
         -------
@@ -343,30 +422,28 @@ class MyHelp(commands.HelpCommand):
         """
         
         # define variables
-        embeds = []
-        index = None
         ctx = self.context
         bot = ctx.bot
-        attempted_command = " ".join(ctx.message.content.split()[1])
-        is_owner = await bot.is_owner(ctx.author)
+        attempted_command = " ".join(ctx.message.content.split()[1:])
         
-        if command.cog.qualified_name == "Jishaku" and not is_owner:
+        if is_owner is None:
+            is_owner = await bot.is_owner(ctx.author)
+        
+        if command.cog and command.cog.qualified_name == "Jishaku" and not is_owner:
             await ctx.send(f'No command called "{attempted_command}" found.')
             return
         
-        for cmd in command.parent.commands:
-            # go through each command in this cog
-            
-            if self._is_valid(cmd, is_owner):
-                # if command is valid, create embed
-                embed=self.generate_command_embed(cmd)
-                embeds.append(embed)
-                
-                if cmd == command:
-                    # if this command is the requested one, set the index
-                    index = embeds.index(embed)
+        key = ("subcommands", command.parent.qualified_name, is_owner, self.clean_prefix, bot.command_index.version)
+        
+        # all valid commands in the parent
+        commands = [cmd for cmd in command.parent.commands if self._is_valid(cmd, is_owner)]
+        
+        embeds, indexes = self.render_pages(key, commands)
+        
+        if command.qualified_name not in indexes:
+            return [self.generate_command_embed(command)], 0
 
-        return embeds, index
+        return list(embeds), indexes[command.qualified_name]
     
     
     
@@ -389,10 +466,15 @@ class MyHelp(commands.HelpCommand):
             return
 
         if command.parent:
-            embeds, index = await self.generate_embeds_for_subcommand(command)
+            result = await self.generate_embeds_for_subcommand(command, is_owner)
         else:
-            embeds, index = await self.generate_embeds_for_normal_command(command)
+            result = await self.generate_embeds_for_normal_command(command, is_owner)
+        
+        if result is None:
+            # the command can't be shown
+            return
         
+        embeds, index = result
         
         paginator = Paginator(page=index, pages=embeds)
         await paginator.start(ctx)
@@ -402,31 +484,21 @@ class MyHelp(commands.HelpCommand):
 
         Make a paginator with all the commands and the first page is the requested command.
         """
-        # get variables
-        ctx = self.context
-        bot = ctx.bot
-        attempted_command = " ".join(ctx.message.content.split()[1:])
-        is_owner = await bot.is_owner(ctx.author)
-        
-        
-        # return error if the command is hidden
-        if command.hidden and not is_owner:
-            await ctx.send(f'No command called "{attempted_command}" found.')
-            return
-        
-        if command.parent:
-            embeds, index = await self.generate_embeds_for_subcommand(command)
-        else:
-            embeds, index = await self.generate_embeds_for_normal_command(command)
         
-        
-        paginator = Paginator(page=index, pages=embeds)
-        await paginator.start(ctx)
+        # groups are shown the same way as commands
+        await self.send_command_help(command)
 
 
 def setup(bot):
     bot._original_help_command = bot.help_command
 
+    if not hasattr(bot, "help_cache"):
+        # keep the rendered help when this extension is reloaded
+        bot.help_cache = HelpCache()
+
+    # the renders use the color from the config
+    bot.config.add_listener("help", lambda config: bot.help_cache.renders.clear())
+
     bot.help_command = MyHelp(command_attrs={"brief":"Get information about my commands!"})
     bot.help_command.add_check(commands.bot_has_permissions(embed_links=True, send_messages=True))
     bot.help_command.cog = bot.cogs["Info"]
@@ -15,40 +15,29 @@ class Info(commands.Cog):
         '''Give information and statistics about the bot.
         Information given includes:
         - `Server count`
-        - `User count`
+        - `Member count`
+        - `Channel count`
         - `Start time`
         '''
         
         # how long the bot has been online
         online_time = humanize.naturaltime(datetime.datetime.utcnow()-self.bot.start_time)[:-4]
         
-        # number of text and voice channels
-        text_channels=[]
-        voice_channels=[]
-        
-        # get Voice and Text Channel amount.
-        for channel in self.bot.get_all_channels():
-            if channel.type == discord.ChannelType.text:
-                text_channels.append(channel)
-                continue
-            
-            if channel.type == discord.ChannelType.voice:
-                voice_channels.append(channel)
-                continue
-        
+        # counted from gateway events
+        stats = self.bot.stats
         
         # creating info embed
         embed = discord.Embed(
             title=f"{self.bot.user.name} Statistics and Information",
-            description=f"{self.bot.user.name} has been online for `{online_time}` and is currently in `{len(self.bot.guilds)} server(s)` and can see `{len(self.bot.users)} user(s)`.",
+            description=f"{self.bot.user.name} has been online for `{online_time}` and is currently in `{stats.guilds} server(s)` and has `{stats.members} member(s)`.",
             color=0xFF0000,
             timestamp=datetime.datetime.utcnow()
         ).set_author(
             name=self.bot.user.name,
             icon_url=self.bot.user.avatar_url
         ).add_field(
-            name=f"Channels: {len(text_channels)+len(voice_channels)}",
-            value=f"<:Text_Channel:778350926468743228> Text Channels: `{len(text_channels)}`\n<:Voice_Channel:778351389415440395> Voice Channels: `{len(voice_channels)}`"
+            name=f"Channels: {stats.text_channels+stats.voice_channels}",
+            value=f"<:Text_Channel:778350926468743228> Text Channels: `{stats.text_channels}`\n<:Voice_Channel:778351389415440395> Voice Channels: `{stats.voice_channels}`"
         )
         
         # send embed
@@ -4,9 +4,14 @@ Commands that can only be accessed by the bot owner(s).
 '''
 
 
-import discord, datetime, asyncio
+import discord, datetime, asyncio, io
 from discord.ext import commands
 from typing import Optional
+from utils.config import SCHEMA
+from utils.db_manager import KeysetSource
+from utils.paginator import Paginator
+from utils.profiler import SamplingProfiler
+from utils.timeseries import TIERS, sparkline
 
 
 # symbols
@@ -31,48 +36,40 @@ class Owner(commands.Cog):
             The bot object this Cog is part of.
         """
         self.bot = bot
+        self.profiler = SamplingProfiler(bot)
 
     def reload_cogs(self, cogs, ctx):
         '''Reload a list of cogs/modules
 
-        Go through a list of cogs and reload the.
-        For the ones that fails, save the error message
-        and set success variable to false.
-        The success variable is set to false when a cog has failed to reload.
-
-        There might be a error if the cog failed to load last time around or if the cog hasn't been loaded from before.
-        The function will ignore all
+        Reload the cogs, and the utils modules that changed since they were loaded
+        together with everything that imports them, with the bot reloader.
+        Live objects like the caches and the database pool are kept.
+        Every module and cog is timed, the ones that failed get their error message.
+        The success variable is set to false when a module or cog has failed to reload.
 
         Args:
         ----
         cogs: List[:class:`str`]
             A list of all the cogs that shall be reloaded.
+            Utils modules in the list are reloaded even if they didn't change.
+        ctx: :class:`commands.Context`
+            The current context
         '''
         success, responses = True, []
 
-        for cog in cogs:
-            # go through each cog in cog list
-            try:
-
-                # try to load and unload the cog
-                try:
-                    self.bot.unload_extension(cog)
-
-                except commands.errors.ExtensionNotLoaded:
-                    pass
-
-                # load the cog
-                self.bot.load_extension(cog)
+        for step in self.bot.reloader.reload(cogs):
+            # go through each reloaded module and cog
+            took = f"`{step.duration*1000:.0f}ms`"
 
-            except Exception as e:
-                # the cog errored when loading
+            if step.error:
+                # the module or cog errored when loading
 
                 # set success variable to false and add error message in response
                 success = False
-                responses.append(f"{self.bot.smart_emojis.get_emoji('no', ctx.channel)} {cog}:```cmd\n{e}```")
+                responses.append(f"{self.bot.smart_emojis.get_emoji('no', ctx.channel)} {step.name} {took}:```cmd\n{step.error}```")
 
             else:
-                responses.append(f"{self.bot.smart_emojis.get_emoji('yes', ctx.channel)} {cog}")
+                responses.append(f"{self.bot.smart_emojis.get_emoji('yes', ctx.channel)} {step.name} {took}")
 
 
         # return response
@@ -99,50 +96,58 @@ class Owner(commands.Cog):
         await msg.add_reaction(RELOAD)
         await msg.add_reaction(STOP)
 
-        def validate_request(reaction, user) -> bool:
-            '''Validating reaction
+        # set when the retrying is done
+        done = asyncio.get_event_loop().create_future()
 
-            Validate that the detected reaction was done by the author,
-            was one of two options and on the right message.
+        async def close(reason:str):
+            '''Stop retrying
 
             Args:
             -----
-            reaction: :class:`discord.Reaction`
-                The reaction object returned from reaction
-            user: :class:`discord.User`
-                The user who reacted
+            reason: :class:`str`
+                Why retrying stopped.
             '''
-            valid_response = False
-            
-            if user == ctx.author:
-                if reaction.emoji in [RELOAD, STOP]:
-                    if reaction.message == msg:
-                        valid_response = True
-            
-            return valid_response
-
-        while True:
-            try:
-                # wait 2 minutes for a reaction on the message
-                reaction, _ = await self.bot.wait_for("reaction_add", timeout=120.0, check=validate_request)
-
-            except asyncio.TimeoutError:
-                # 2 minutes passed without a reaction
-                return await msg.clear_reactions()
+            if not done.done():
+                done.set_result(reason)
 
-            else:
-                # a reaction was detected
+        async def handle(payload) -> bool:
+            '''Handle a reaction on the message
+
+            Only reactions added by the author with one of the two options are used.
+
+            Args:
+            -----
+            payload: :class:`discord.RawReactionActionEvent`
+                The reaction event from the menu router
+            '''
 
-                if reaction.emoji == STOP:
-                    return await msg.clear_reactions()
+            if payload.event_type != "REACTION_ADD" or payload.user_id != ctx.author.id:
+                return False
 
-                # reload the cogs and edit message
-                await msg.edit(content=self.bot.smart_emojis.get_emoji("loading", ctx.channel))
-                response, success = self.reload_cogs(cogs)
-                await msg.edit(content="\n".join(response))
+            if str(payload.emoji) == STOP:
+                self.bot.menu_router.unregister(msg.id)
+                await close("stop")
+                return True
 
-                if success:
-                    return await msg.clear_reactions()
+            if str(payload.emoji) != RELOAD:
+                return False
+
+            # reload the cogs and edit message
+            await msg.edit(content=self.bot.smart_emojis.get_emoji("loading", ctx.channel))
+            response, success = self.reload_cogs(cogs, ctx)
+            await msg.edit(content="\n".join(response))
+
+            if success:
+                self.bot.menu_router.unregister(msg.id)
+                await close("success")
+
+            return True
+
+        # wait 2 minutes between each reaction
+        self.bot.menu_router.register(msg.id, handle, close, 120.0)
+        await done
+
+        return await msg.clear_reactions()
 
     @commands.command(hidden=True, brief="Some owner(s) only information about the bot.", aliases=["owner"])
     @commands.is_owner()
@@ -155,7 +160,7 @@ class Owner(commands.Cog):
         # create embed
         embed = discord.Embed(
             title=f"{self.bot.user.name} statistics",
-            description=f"{self.bot.user.name} is currently in `{len(self.bot.guilds)} guilds(s)` and can see `{len(self.bot.users)} user(s)`.\nThe bot has a total of `{len(self.bot.commands)} command(s)` in `{len(self.bot.extensions)} module(s)`",
+            description=f"{self.bot.user.name} is currently in `{self.bot.stats.guilds} guilds(s)` and has `{self.bot.stats.members} member(s)`.\nThe bot has a total of `{len(self.bot.commands)} command(s)` in `{len(self.bot.extensions)} module(s)`",
             color=0xFF0000,
             timestamp=datetime.datetime.utcnow()
         ).set_author(
@@ -167,6 +172,103 @@ class Owner(commands.Cog):
         return await ctx.send(embed=embed)
 
 
+    @commands.command(hidden=True, brief="Show how the bot has been doing over time.", aliases=["hist"])
+    @commands.is_owner()
+    async def history(self, ctx:commands.Context, tier:str="1h"):
+        '''Show the recorded bot metrics as sparklines.
+
+        Use `1m` for the last day by minute, `1h` for the last week by hour
+        or `1d` for the last year by day.
+        '''
+
+        tiers = [name for name, _, _ in TIERS]
+
+        if tier not in tiers:
+            return await ctx.send(f"The tier has to be one of `{', '.join(tiers)}`.")
+
+        embed = discord.Embed(
+            title=f"{self.bot.user.name} history ({tier})",
+            color=0xFF0000,
+            timestamp=datetime.datetime.utcnow()
+        )
+
+        for series in self.bot.timeseries.series.values():
+            values = series.tiers[tier].values()
+            known = [v for v in values if v == v] # nan is not equal to itself
+
+            if not known:
+                embed.add_field(name=series.name, value="No data yet.", inline=False)
+                continue
+
+            embed.add_field(
+                name=series.name,
+                value=f"`{sparkline(values) or ' '}`\nmin `{min(known):.1f}` avg `{sum(known)/len(known):.1f}` max `{max(known):.1f}` last `{known[-1]:.1f}` {series.unit}",
+                inline=False
+            )
+
+        return await ctx.send(embed=embed)
+
+
+    @commands.command(hidden=True, brief="Profile what the bot is doing.", aliases=["prof"])
+    @commands.is_owner()
+    async def profile(self, ctx:commands.Context, seconds:float=10.0, top:int=10):
+        '''Sample what the event loop is doing for a few seconds.
+
+        Shows the hottest stacks, functions and cogs as pages, and attaches all
+        the stacks as a `.folded` file that flame graph tools can read.
+        `seconds` can be up to 60 and `top` up to 25.
+        '''
+
+        if not 0 < seconds <= 60 or not 0 < top <= 25:
+            return await ctx.send("`seconds` has to be between 0 and 60 and `top` between 1 and 25.")
+
+        if self.profiler.running:
+            return await ctx.send("The profiler is already running.")
+
+        await ctx.send(f"{self.bot.smart_emojis.get_emoji('loading', ctx.channel)} Profiling for `{seconds:g}` second(s)...")
+        profile = await self.profiler.run(seconds)
+
+        if profile.samples == 0:
+            return await ctx.send("No samples were taken.")
+
+        def page(title:str, counts) -> discord.Embed:
+            '''Make a page of the most sampled items
+
+            Args:
+            -----
+            title: :class:`str`
+                What was counted.
+            counts: List[Tuple[:class:`str`, :class:`int`]]
+                The items and their samples, most sampled first.
+            '''
+
+            lines = [f"{count/profile.samples:6.1%} {name[-80:]}" for name, count in counts]
+
+            return discord.Embed(
+                title=f"Profile: {title}",
+                description="```\n" + "\n".join(lines) + "```",
+                color=0xFF0000
+            ).set_footer(text=f"{profile.samples} samples in {profile.duration:.1f}s")
+
+        own, total = profile.functions()
+
+        # the hot paths show the innermost frames
+        paths = [(" < ".join(reversed(stack[-3:])), count) for stack, count in profile.stacks.most_common(top)]
+
+        pages = [
+            page("hot paths", paths),
+            page("functions (self)", own.most_common(top)),
+            page("functions (total)", total.most_common(top)),
+            page("cogs", profile.cogs.most_common(top))
+        ]
+
+        # all the stacks for flame graphs
+        await ctx.send(file=discord.File(io.BytesIO(profile.folded().encode()), filename="profile.folded"))
+
+        paginator = Paginator(pages=pages)
+        await paginator.start(ctx)
+
+
     @commands.command(hidden=True, brief="Reload/load one or more modules.")
     @commands.is_owner()
     async def reload(self, ctx:commands.Context, *, cogs: Optional[str]):
@@ -202,6 +304,31 @@ class Owner(commands.Cog):
         # ask retry question
         await self.retry_cogs(ctx, msg, cogs)
 
+    @commands.command(hidden=True, name="reload_config", aliases=["rc"], brief="Reload the config file.")
+    @commands.is_owner()
+    async def reload_config(self, ctx:commands.Context):
+        '''Reload the config file without restarting the bot.
+
+        The current config is kept if the new file is invalid.
+        Some values, like the token and the database, need a restart to be used.
+        '''
+
+        try:
+            changed = self.bot.config.reload()
+
+        except Exception as e:
+            return await ctx.send(f"{self.bot.smart_emojis.get_emoji('no', ctx.channel)} The config was not reloaded:```cmd\n{e}```")
+
+        # values only used at startup
+        restart = [key for key in changed if SCHEMA[key][3]]
+
+        response = f"{self.bot.smart_emojis.get_emoji('yes', ctx.channel)} Reloaded the config, changed: `{', '.join(changed) or 'nothing'}`"
+
+        if restart:
+            response += f"\nNeeds a restart: `{', '.join(restart)}`"
+
+        await ctx.send(response)
+
     @commands.group(hidden=True, aliases=["bl"], brief="View and edit the blacklists for this bot")
     @commands.is_owner()
     async def blacklist(self, ctx):
@@ -221,21 +348,40 @@ class Owner(commands.Cog):
         if ctx.invoked_subcommand:
             return
 
-        blacklists = {}
+        async def render(rows, index) -> discord.Embed:
+            '''Make a page of blacklisted users
 
-        for entry in self.bot.cache.blacklist.data:
-            # go trough blacklisted users
+            Args:
+            -----
+            rows: List[:class:`tuple`]
+                The blacklist rows on this page.
+            index: :class:`int`
+                The page index.
+            '''
 
-            if entry[2] == "server":
-                continue
+            embed = discord.Embed(title="Blacklisted users", color=0xFF0000)
+
+            # get all users on the page at once
+            users = await self.bot.user_resolver.resolve_many([row[1] for row in rows])
+
+            for _, id, reason in rows:
+                # go trough blacklisted users
+                embed.add_field(name=str(users[id] or id), value=f"ID: `{id}`\n{reason}", inline=False)
+
+            return embed
+
+        # read the blacklist one page at a time
+        source = KeysetSource(
+            self.bot.db, "blacklist", "index_id", render,
+            columns="index_id, id, reason", where="type = %s", args=("user",)
+        )
+        total = await source.count()
 
-            try:
-                user = await self.bot.fetch_user(entry[1])
-            except discord.errors.NotFound:
-                user = entry[1]
-            blacklists[user]=entry[3]
+        if total == 0:
+            return await ctx.send("No users are blacklisted.")
 
-        await ctx.send(blacklists)
+        paginator = Paginator(source=source, total=total)
+        await paginator.start(ctx)
 
     @user.command(hidden=True, name="blacklist", aliases=["bl", "add", "a"], brief="blacklist a user")
     @commands.is_owner()
@@ -245,10 +391,15 @@ class Owner(commands.Cog):
         Add a user or a server to the bot's blacklist.
         """
 
-        if subject_id in [d[1] for d in self.bot.cache.blacklist.data]:
-            # fetch user from discord
-            user = await self.bot.fetch_user(subject_id)
+        # get the user, from cache if possible
+        user = await self.bot.user_resolver.resolve(subject_id)
+
+        if user is None:
+            # not a userid
+            # invalid user
+            return await ctx.send(f"Invalid user id.")
 
+        if subject_id in [d[1] for d in self.bot.cache.blacklist.data]:
             # create response embed
             embed = discord.Embed(
                 title=f"{user.name} is already blacklisted",
@@ -263,17 +414,6 @@ class Owner(commands.Cog):
             return await ctx.send(embed=embed)
 
 
-        # check if subject is user or server or invalid
-        try:
-            # attempt to fetch user from discord
-            user = await self.bot.fetch_user(subject_id)
-
-        except discord.errors.NotFound:
-            # failed to fetch user, not a userid
-            # invalid user
-            return await ctx.send(f"Invalid user id.")
-
-
         # add user to database
         await self.bot.cache.blacklist.add(user.id, "user", reason)
 
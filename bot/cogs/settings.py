@@ -0,0 +1,210 @@
+'''Server settings
+
+Commands for changing how the bot works in a server.
+'''
+
+
+import datetime
+import discord
+from discord.ext import commands
+from typing import Optional
+
+
+# the longest prefix a server can set
+MAX_PREFIX_LENGTH = 16
+
+# the highest account age in days a server can require
+MAX_ACCOUNT_AGE = 365
+
+
+class Settings(commands.Cog):
+    """Change how I work in this server."""
+
+    def __init__(self, bot):
+        """Init
+
+        Initiate Cog variables
+
+        Args:
+        ----
+        bot: :class:`commands.Bot`
+            The bot object this Cog is part of.
+        """
+        self.bot = bot
+
+    @commands.group(name="prefix", invoke_without_command=True, brief="Show or change my prefix in this server.")
+    @commands.guild_only()
+    async def prefix(self, ctx:commands.Context, prefix:Optional[str]):
+        '''Show the prefix for this server.
+
+        Pass a new prefix to change it, this requires the `Manage Server` permission.
+        Use `prefix reset` to go back to the default prefix.
+        '''
+
+        if prefix is None:
+            # only show the current prefix
+            return await ctx.send(f"My prefix in this server is `{self.bot.cache.prefixes.get(ctx.guild.id)}`")
+
+        if not ctx.author.guild_permissions.manage_guild:
+            raise commands.MissingPermissions(["manage_guild"])
+
+        if len(prefix) > MAX_PREFIX_LENGTH:
+            return await ctx.send(f"The prefix can't be longer than {MAX_PREFIX_LENGTH} characters.")
+
+        await self.bot.cache.prefixes.set(ctx.guild.id, prefix)
+        await ctx.send(f"My prefix in this server is now `{prefix}`")
+
+    @prefix.command(name="reset", brief="Use the default prefix in this server.")
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def reset(self, ctx:commands.Context):
+        '''Remove the custom prefix for this server and use the default prefix again.'''
+
+        await self.bot.cache.prefixes.set(ctx.guild.id, self.bot.config.Prefix)
+        await ctx.send(f"My prefix in this server is now `{self.bot.config.Prefix}`")
+
+    @commands.group(name="logchannel", invoke_without_command=True, brief="Show or change where joins are logged.")
+    @commands.guild_only()
+    async def logchannel(self, ctx:commands.Context, channel:Optional[discord.TextChannel]):
+        '''Show the channel joins are logged in for this server.
+
+        Pass a channel to change it, this requires the `Manage Server` permission.
+        Use `logchannel reset` to stop logging joins.
+        '''
+
+        settings = await self.bot.cache.guild_settings.get(ctx.guild.id)
+
+        if channel is None:
+            # only show the current channel
+            if settings.log_channel is None:
+                return await ctx.send("Joins are not logged in this server.")
+
+            return await ctx.send(f"Joins are logged in <#{settings.log_channel}>")
+
+        if not ctx.author.guild_permissions.manage_guild:
+            raise commands.MissingPermissions(["manage_guild"])
+
+        await self.bot.cache.guild_settings.set(ctx.guild.id, log_channel=channel.id)
+        await ctx.send(f"Joins are now logged in {channel.mention}")
+
+    @logchannel.command(name="reset", brief="Stop logging joins in this server.")
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def logchannel_reset(self, ctx:commands.Context):
+        '''Stop logging joins in this server.'''
+
+        await self.bot.cache.guild_settings.set(ctx.guild.id, log_channel=None)
+        await ctx.send("Joins are no longer logged in this server.")
+
+    @commands.group(name="autorole", invoke_without_command=True, brief="Show or change the role new members get.")
+    @commands.guild_only()
+    async def autorole(self, ctx:commands.Context, role:Optional[discord.Role]):
+        '''Show the role new members get in this server.
+
+        Pass a role to change it, this requires the `Manage Roles` permission.
+        Use `autorole reset` to stop giving new members a role.
+        '''
+
+        settings = await self.bot.cache.guild_settings.get(ctx.guild.id)
+
+        if role is None:
+            # only show the current role
+            if settings.autorole is None:
+                return await ctx.send("New members don't get a role in this server.")
+
+            return await ctx.send(f"New members get the role <@&{settings.autorole}>", allowed_mentions=discord.AllowedMentions.none())
+
+        if not ctx.author.guild_permissions.manage_roles:
+            raise commands.MissingPermissions(["manage_roles"])
+
+        await self.bot.cache.guild_settings.set(ctx.guild.id, autorole=role.id)
+        await ctx.send(f"New members now get the role {role.mention}", allowed_mentions=discord.AllowedMentions.none())
+
+    @autorole.command(name="reset", brief="Stop giving new members a role.")
+    @commands.guild_only()
+    @commands.has_permissions(manage_roles=True)
+    async def autorole_reset(self, ctx:commands.Context):
+        '''Stop giving new members a role in this server.'''
+
+        await self.bot.cache.guild_settings.set(ctx.guild.id, autorole=None)
+        await ctx.send("New members no longer get a role in this server.")
+
+    @commands.command(name="accountage", brief="Show or change how old accounts must be to not be fake.")
+    @commands.guild_only()
+    async def accountage(self, ctx:commands.Context, days:Optional[int]):
+        '''Show how many days old an account must be to not count as fake in this server.
+
+        Fake accounts are marked in the join log and don't get the autorole.
+        Pass a number of days to change it, this requires the `Manage Server` permission.
+        Use 0 to turn it off.
+        '''
+
+        if days is None:
+            # only show the current age
+            settings = await self.bot.cache.guild_settings.get(ctx.guild.id)
+            return await ctx.send(f"Accounts younger than `{settings.min_account_age}` day(s) count as fake in this server.")
+
+        if not ctx.author.guild_permissions.manage_guild:
+            raise commands.MissingPermissions(["manage_guild"])
+
+        if not 0 <= days <= MAX_ACCOUNT_AGE:
+            return await ctx.send(f"The account age has to be between 0 and {MAX_ACCOUNT_AGE} days.")
+
+        await self.bot.cache.guild_settings.set(ctx.guild.id, min_account_age=days)
+        await ctx.send(f"Accounts younger than `{days}` day(s) now count as fake in this server.")
+
+    @commands.Cog.listener("on_member_join")
+    async def member_joined(self, member:discord.Member):
+        """Use the server settings for a new member
+
+        Gives the member the autorole and logs the join in the log channel.
+        Accounts younger than the minimum account age are marked as fake in
+        the log and don't get the autorole.
+        """
+
+        if member.bot:
+            return
+
+        guild = member.guild
+        settings = await self.bot.cache.guild_settings.get(guild.id)
+
+        age = datetime.datetime.utcnow() - member.created_at
+        fake = age < datetime.timedelta(days=settings.min_account_age)
+
+        role = guild.get_role(settings.autorole) if settings.autorole is not None else None
+
+        if role is not None and not fake and guild.me.guild_permissions.manage_roles and role < guild.me.top_role:
+            try:
+                await member.add_roles(role, reason="Autorole")
+            except discord.HTTPException:
+                # the role can't be given, like a role managed by an integration
+                pass
+
+        channel = guild.get_channel(settings.log_channel) if settings.log_channel is not None else None
+
+        if channel is None:
+            # not set or the channel was deleted
+            return
+
+        permissions = channel.permissions_for(guild.me)
+
+        if not (permissions.send_messages and permissions.embed_links):
+            return
+
+        # create log embed
+        embed = discord.Embed(
+            title="Fake account joined" if fake else "Member joined",
+            description=f"{member.mention} ({member})",
+            color=0xFF0000 if fake else 0x00FF00,
+            timestamp=datetime.datetime.utcnow()
+        ).add_field(
+            name="Account age",
+            value=f"{age.days} day(s)"
+        ).set_thumbnail(
+            url=member.avatar_url
+        )
+
+        self.bot.log_dispatcher.submit(channel, embed)
+
+def setup(bot):
+    bot.add_cog(Settings(bot))
@@ -1,17 +1,61 @@
-import discord, difflib, datetime
+import discord, datetime, logging
 from discord.ext import commands
+from utils.suggestions import Suggestions
+from utils.ratelimit import RateLimited
+
+
+log = logging.getLogger(__name__)
+
+
+# how old a message can be and still invoke a command when edited
+EDIT_WINDOW = datetime.timedelta(minutes=5)
+
 
 class System(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.suggestions = Suggestions(bot)
+
+        # resolved log channels by id, None if the channel can't be used
+        self.channels = {}
+
+        # the log channels can change when the config is reloaded
+        bot.config.add_listener("system", lambda config: self.clear_channels())
+
+    def cog_unload(self):
+        self.bot.config.remove_listener("system")
 
     @commands.Cog.listener("on_message_edit")
     async def edit_command(self, before, after):
-        del before
+        """A message was edited
+
+        Invoke the command in the message again if the content changed.
+        Edits to old messages and edits that didn't change the content, like
+        when discord adds a link preview, are ignored.
+        """
+
+        if before.content == after.content:
+            # only embeds or other things changed
+            return
+
+        if datetime.datetime.utcnow() - after.created_at > EDIT_WINDOW:
+            # the message is to old
+            return
+
+        if self.bot.invocations.seen(after):
+            # a command was already invoked with this content
+            return
 
         await self.bot.process_commands(after)
 
 
+    @commands.Cog.listener("on_command")
+    async def record_invocation(self, ctx):
+        """Remember the content of messages that invoke commands"""
+
+        self.bot.invocations.record(ctx.message)
+
+
 
 
     @commands.Cog.listener("on_command_error")
@@ -27,24 +71,17 @@ class System(commands.Cog):
             return
 
         # get the atempted command name
-        command = ctx.message.content.split()[0][len(ctx.prefix):]
-
-        # get list of all commands
-        command_list = self.bot.get_normal_commands(await self.bot.is_owner(ctx.author))
-
-        # the matches from command list to atempted command
-        matches = difflib.get_close_matches(command, command_list, 5, 0.6)
-        guessed_commands=[]
+        command = ctx.invoked_with
 
-        for match in matches:
-            # get actual command name for match
-            guessed_commands.append(self.bot.get_command(match).qualified_name)
+        if not command:
+            # only the prefix was sent
+            return
 
-        # remove any dupes
-        guessed_commands=list(set(guessed_commands))
+        # the names of the closest commands, without dupes
+        guessed_commands = self.suggestions.suggest(command, await self.bot.is_owner(ctx.author))
 
 
-        if len(matches) > 0:
+        if len(guessed_commands) > 0:
             # if one or more matches was found, return them
             await ctx.send(f":warning: **Command Not Found!**\nDid you mean:\n- `"+'`\n- `'.join(guessed_commands)+"`")
 
@@ -69,6 +106,10 @@ class System(commands.Cog):
             # error is alredy checked for, ignore
             return
 
+        if isinstance(error, RateLimited):
+            # answering would only add to the load
+            return
+
 
         # create log embed
         embed = discord.Embed(
@@ -81,7 +122,7 @@ class System(commands.Cog):
             value=f"[Jump to message]({ctx.message.jump_url})"
         )
 
-        await channel.send(self.bot.config.channel.error).send(embed=embed)
+        self.bot.log_dispatcher.submit(channel, embed)
         return await ctx.send("Uh oh, I don't feel so good.")
 
 
@@ -111,22 +152,73 @@ class System(commands.Cog):
             # if the id is None
             return None
 
+        if id in self.channels:
+            # the channel has already been resolved
+            return self.channels[id]
+
         # get channel object from id
         channel = self.bot.get_channel(id)
 
         if not channel:
             # the channe was None
             # the channel is invalid
+
+            if self.bot.is_ready():
+                # the channel doesn't exist, before ready it might just not be cached yet
+                log.warning(f"Log channel {id} not found")
+                self.channels[id] = None
+
             return None
 
-        if channel.guild.me.permissions_in(channel).embed_links and channel.guild.me.permissions_in(channel).send_messages:
+        permissions = channel.guild.me.permissions_in(channel)
+
+        if permissions.embed_links and permissions.send_messages:
             # the bot has send messages permission as well as embed links permission
+            self.channels[id] = channel
             return channel
 
-        print(f"Missing permissions in {channel.name} for logging")
+        log.warning(f"Missing permissions in {channel.name} for logging")
+        self.channels[id] = None
         return None
 
 
+    def clear_channels(self):
+        """Forget all resolved log channels
+
+        They will be resolved again the next time they are used.
+        Called when channels, roles or the config change.
+        """
+
+        self.channels.clear()
+
+
+    @commands.Cog.listener("on_ready")
+    async def channels_ready(self):
+        self.clear_channels()
+
+
+    @commands.Cog.listener("on_guild_channel_update")
+    async def channel_updated(self, before, after):
+        self.clear_channels()
+
+
+    @commands.Cog.listener("on_guild_channel_delete")
+    async def channel_deleted(self, channel):
+        self.clear_channels()
+
+
+    @commands.Cog.listener("on_guild_role_update")
+    async def role_updated(self, before, after):
+        self.clear_channels()
+
+
+    @commands.Cog.listener("on_member_update")
+    async def roles_changed(self, before, after):
+        if after.id == self.bot.user.id and before.roles != after.roles:
+            # the bot's own roles changed
+            self.clear_channels()
+
+
 
 
     @commands.Cog.listener("on_command")
@@ -170,7 +262,7 @@ class System(commands.Cog):
         )
 
         # send logging embed
-        await channel.send(embed=embed)
+        self.bot.log_dispatcher.submit(channel, embed)
 
 
 
@@ -208,7 +300,7 @@ class System(commands.Cog):
         )
 
         # send embed
-        await channel.send(embed=embed)
+        self.bot.log_dispatcher.submit(channel, embed)
 
 
 
@@ -245,7 +337,7 @@ class System(commands.Cog):
         )
 
         # send embed
-        await channel.send(embed=embed)
+        self.bot.log_dispatcher.submit(channel, embed)
 
 
 
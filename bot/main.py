@@ -1,6 +1,72 @@
-import datetime, os
+import ast, datetime, importlib.util, logging, os
+from discord.ext import commands
 from discord.ext.commands import Bot
-from discord import Intents
+from discord import Intents, MemberCacheFlags
+from utils.members import RecentMembers
+from utils.command_index import CommandIndex
+from utils.startup import StartupTimeline
+from utils.invocations import Invocations
+from utils.context import Context
+from utils.logger import event_context, log_context
+from utils.ratelimit import RateLimited
+
+
+log = logging.getLogger(__name__)
+
+
+# extensions that are rarely used and can be loaded on first use.
+# the values are the top-level command names and aliases for each extension,
+# None means they are read from the extensions source file.
+LAZY_EXTENSIONS = {
+    "jishaku": [["jishaku", "jsk"]],
+    "bot.cogs.owner": None
+}
+
+
+def command_names(extension:str) -> list:
+    """Get the top-level command names of a extension without importing it.
+
+    Reads the source file of the extension and finds all the methods
+    decorated with `commands.command` or `commands.group`.
+
+    args
+    ----
+    extension: :class:`str`
+        The extension to read, for example "bot.cogs.owner".
+
+    returns
+    -------
+    List[List[:class:`str`]]
+        The name followed by the aliases for each command.
+    """
+
+    with open(importlib.util.find_spec(extension).origin) as file:
+        tree = ast.parse(file.read())
+
+    names = []
+
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.AsyncFunctionDef):
+            continue
+
+        for decorator in node.decorator_list:
+            # only commands.command(...) and commands.group(...),
+            # subcommands are decorated with their parent instead
+
+            if not (isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Attribute)):
+                continue
+
+            if decorator.func.attr not in ["command", "group"]:
+                continue
+
+            if not (isinstance(decorator.func.value, ast.Name) and decorator.func.value.id == "commands"):
+                continue
+
+            options = {k.arg: ast.literal_eval(k.value) for k in decorator.keywords if k.arg in ["name", "aliases"]}
+            names.append([options.get("name", node.name), *options.get("aliases", [])])
+
+    return names
+
 
 class InviteTracker(Bot):
     '''Bot subclass.
@@ -14,7 +80,7 @@ class InviteTracker(Bot):
         The config class for the config.yml file that stores data necessary to start the bot.
     '''
 
-    def __init__(self, config):
+    def __init__(self, config, timeline:StartupTimeline=None):
         """Creating variables for bot subclass.
 
         Assign all the values for the bot subclass and init bot instance.
@@ -23,19 +89,131 @@ class InviteTracker(Bot):
         ----
         config: :class:`utils.config.Config`
             The config class for the config.yml file that stores data necessary to start the bot.
+        timeline: Optional[:class:`utils.startup.StartupTimeline`]
+            The timeline the startup steps are recorded in. A new one is made if None.
+            Defaults to None.
         """
         self.config=config
         self.start_time=datetime.datetime.utcnow()
+        self.timeline = timeline or StartupTimeline()
+
+        # the command index is built the first time it is used
+        self._command_index = None
+        self._command_index_version = 0
 
         intents = Intents.default()
         intents.members = True
+
+        if self.config.members.Lean:
+            # don't keep members in memory, only the bot itself is cached
+            # members are requested on demand and kept in a small cache
+            member_options = {
+                "member_cache_flags": MemberCacheFlags.none(),
+                "chunk_guilds_at_startup": False
+            }
+        else:
+            member_options = {}
+
         super().__init__(
-            command_prefix=self.config.Prefix,
+            # looked up on each message, so a reloaded resolve_prefix is used
+            command_prefix=lambda bot, message: bot.resolve_prefix(message),
             case_sensitive=False,
             intents=intents,
-            description=self.config.Description
+            description=self.config.Description,
+            **member_options
         )
 
+        if self.config.members.Lean:
+            RecentMembers(self, self.config.members.Recent)
+
+        Invocations(self)
+
+
+    def resolve_prefix(self, message) -> str:
+        '''Get the prefix for a message
+
+        Runs for every message the bot can see, so it only reads from the
+        prefix cache and never from the database.
+
+        Args:
+        -----
+        message: :class:`discord.Message`
+            The message to get the prefix for.
+
+        Returns:
+        --------
+        :class:`str`
+            The custom prefix of the guild, or the default prefix in DMs,
+            for guilds without a custom prefix and before the cache is ready.
+        '''
+
+        cache = getattr(self, "cache", None)
+
+        if message.guild is None or cache is None:
+            return self.config.Prefix
+
+        return cache.prefixes.get(message.guild.id)
+
+
+    async def get_context(self, message, *, cls=Context):
+        return await super().get_context(message, cls=cls)
+
+
+    def dispatch(self, event_name, *args, **kwargs):
+        '''Dispatch a event
+
+        Everything logged by the listeners of events from discord gets the
+        event, guild and shard added. Events dispatched while a command runs
+        keep the context of the command.
+        '''
+
+        if log_context.get():
+            return super().dispatch(event_name, *args, **kwargs)
+
+        # the listener tasks copy the context when they are made
+        token = log_context.set(event_context(event_name, args))
+
+        try:
+            super().dispatch(event_name, *args, **kwargs)
+        finally:
+            log_context.reset(token)
+
+
+    async def invoke(self, ctx):
+        '''Invoke a command
+
+        Everything logged while the command runs gets the command, guild and shard added.
+        Commands rejected by the rate limiter are not invoked, a
+        :class:`utils.ratelimit.RateLimited` error is dispatched instead.
+        Tokens are taken once per context, also for unknown commands.
+        '''
+
+        limiter = getattr(self, "rate_limiter", None)
+
+        # unknown commands count too, they still look up suggestions
+        attempted = ctx.command or (ctx.prefix is not None and ctx.invoked_with)
+
+        if attempted and limiter and not ctx.rate_limited:
+            ctx.rate_limited = True
+
+            try:
+                limiter.check(ctx)
+            except RateLimited as error:
+                self.dispatch("command_error", ctx, error)
+                return
+
+        token = log_context.set({
+            "command": ctx.command.qualified_name if ctx.command else ctx.invoked_with,
+            "guild": ctx.guild.id if ctx.guild else None,
+            "shard": ctx.guild.shard_id if ctx.guild else None,
+            "user": ctx.author.id
+        })
+
+        try:
+            await super().invoke(ctx)
+        finally:
+            log_context.reset(token)
+
 
     def ignite(self, token):
         '''Start bot
@@ -62,89 +240,162 @@ class InviteTracker(Bot):
 
         self.start_time=datetime.datetime.utcnow()
 
-        print(f"{self.user.name} is now online!")
+        log.info(f"{self.user.name} is now online! ({self.timeline.elapsed:.3f}s after startup)")
 
 
 
-    def load_extensions(self, extensions:list = ["jishaku", "bot.cogs.owner", "bot.cogs.info", "bot.cogs.system", "bot.cogs.help"]):
+    def load_extensions(self, extensions:list = ["jishaku", "bot.cogs.owner", "bot.cogs.info", "bot.cogs.system", "bot.cogs.help", "bot.cogs.settings"], lazy:bool=None):
         '''Load bot extensions
 
         Load a list of bot extensions.
         Most if not all extensions must have "bot.cogs." before the file name as bot/cogs/ is the folder most of the extensions are in.
         The one exception is the jishaku extension as it is not a file in this project but a imported library.
 
+        Loading each extension is timed and added to the startup timeline.
+        In lazy mode the extensions in `LAZY_EXTENSIONS` are not imported, instead their commands
+        are registered as stubs that load the extension the first time one of them is used.
+
 
         Args:
         ----
         extensions: :class:`list`
             A list of all the extension that should be loaded.
+        lazy: Optional[:class:`bool`]
+            If rarely used extensions should be loaded on first use. Uses the LazyLoad value in
+            config.yml if None. Defaults to None.
         '''
 
+        if lazy is None:
+            lazy = self.config.LazyLoad
+
         if "jishaku" in extensions:
             os.environ["JISHAKU_NO_UNDERSCORE"] = "True"
 
-        for extension in extensions:
+        for number, extension in enumerate(extensions, 1):
             # go through extensions to load them
 
-            precentage = round(((extensions.index(extension)+1)/len(extensions))*100)
+            precentage = round((number/len(extensions))*100)
 
             start = f"{precentage:3}% - "
 
+            if lazy and extension in LAZY_EXTENSIONS:
+                # only register the commands, the extension is loaded on first use
+                self.add_lazy_extension(extension)
+                log.info(f"{start}Registered lazy extension: {extension}")
+                continue
+
             try:
-                # attemt to load extension
-                self.load_extension(extension)
+                # attemt to load extension, this imports it and runs its setup
+                with self.timeline.step(f"load {extension}") as loaded:
+                    self.load_extension(extension)
 
             except Exception as e:
                 # send error if loading extension failed
-                print(f"{start}Failed to load extension: {extension}\n{e}\n")
+                log.error(f"{start}Failed to load extension: {extension}", exc_info=e)
 
             else:
-                print(f"{start}Loaded extension: {extension}")
+                log.info(f"{start}Loaded extension: {extension} ({loaded.duration:.3f}s)")
         return
 
-    def get_normal_commands(self, is_owner:bool=False) -> list:
-        """Get a list of all available commands.
 
-        Generates a list of all the commands and groups that are not owner only
-        and from the jishaku cog. Not that this function won't return any subcommands.
+    def add_lazy_extension(self, extension:str):
+        '''Register a extension to be loaded on first use
 
-        args
+        Adds a hidden owner only stub command for each command in the extension.
+        When one of them is invoked, all the stubs are removed, the extension is loaded
+        and the message is processed again so the real command runs. If loading fails
+        the stubs are added back so it can be tried again.
+
+        Args:
         ----
-        is_owner: :class:`bool`
-            if the user who is to see these commands is a bot owner.
+        extension: :class:`str`
+            The extension to register, must be a key in `LAZY_EXTENSIONS`.
+        '''
+
+        names = LAZY_EXTENSIONS[extension] or command_names(extension)
+        stubs = []
 
+        @commands.is_owner()
+        async def load(ctx, *, arguments:str=None):
+            # remove the stubs so the real commands can be added
+            for stub in stubs:
+                self.remove_command(stub.name)
+
+            try:
+                with self.timeline.step(f"lazy load {extension}"):
+                    self.load_extension(extension)
+
+            except Exception:
+                # keep the stubs so loading can be tried again
+                for stub in stubs:
+                    self.add_command(stub)
+
+                raise
+
+            # invoke the real command, the stub already took the rate limit tokens
+            real = await self.get_context(ctx.message)
+            real.rate_limited = True
+            await self.invoke(real)
+
+        for name in names:
+            stubs.append(commands.Command(
+                load,
+                name=name[0],
+                aliases=name[1:],
+                hidden=True,
+                brief=f"Load {extension} and run this command."
+            ))
+            self.add_command(stubs[-1])
+
+    @property
+    def command_index(self) -> CommandIndex:
+        """Snapshot of all the commands in the bot.
+
+        Built the first time it is used after the command set changed.
+        Use :attr:`CommandIndex.version` to know if a cached result made from
+        a earlier snapshot is out of date.
 
         returns
         -------
-        List[Union[:class:`commands.command`, :class:`commands.group`]]
+        :class:`utils.command_index.CommandIndex`
         """
 
-        command_list = []
+        if self._command_index is None:
+            self._command_index = CommandIndex(self, self._command_index_version)
 
-        for cog in self.cogs.values():
-            # go through all cogs and the commands inside of each cog
+        return self._command_index
 
-            
-            if cog.qualified_name == "Jishaku":
-                # ignore the jishaku cog
-                continue
 
-            for cmd in cog.walk_commands():
-                
-                if cmd.parent:
-                    # ignore all commands that has a parent command
-                    continue
+    def invalidate_command_index(self):
+        """The command set has changed, rebuild the command index next time it is used."""
 
-                if not cmd.hidden or is_owner:
-                    # add the command if it is not hidden or the user is a bot owner.
-                    command_list.append(cmd)
+        self._command_index = None
+        self._command_index_version += 1
 
 
-        return command_list
+    def load_extension(self, name, *args, **kwargs):
+        try:
+            return super().load_extension(name, *args, **kwargs)
+        finally:
+            self.invalidate_command_index()
 
 
-    def get_subcommands(self, is_owner:bool=False) -> list:
-        """Get a list of all available subcommands.
+    def unload_extension(self, name, *args, **kwargs):
+        try:
+            return super().unload_extension(name, *args, **kwargs)
+        finally:
+            self.invalidate_command_index()
+
+
+    def reload_extension(self, name, *args, **kwargs):
+        try:
+            return super().reload_extension(name, *args, **kwargs)
+        finally:
+            self.invalidate_command_index()
+
+
+    def get_normal_commands(self, is_owner:bool=False) -> list:
+        """Get a list of all available commands.
 
         Generates a list of all the commands and groups that are not owner only
         and from the jishaku cog. Not that this function won't return any subcommands.
@@ -160,23 +411,24 @@ class InviteTracker(Bot):
         List[Union[:class:`commands.command`, :class:`commands.group`]]
         """
 
-        command_list = []
+        return list(self.command_index.normal(is_owner))
 
-        for cog in self.cogs.values():
 
-            # ignore the jishaku cog
-            if cog.qualified_name == "Jishaku":
-                continue
+    def get_subcommands(self, is_owner:bool=False) -> list:
+        """Get a list of all available subcommands.
 
-            for cmd in cog.walk_commands():
-                
-                if not cmd.parent:
-                    # ignore all commands that doesn't have a parent command.
-                    continue
+        Generates a list of all the subcommands that are not owner only
+        and from the jishaku cog.
+
+        args
+        ----
+        is_owner: :class:`bool`
+            if the user who is to see these commands is a bot owner.
 
-                if not cmd.hidden or is_owner:
-                    # add the command if it is not hidden and the user is not a bot owner.
-                    command_list.append(cmd)
 
+        returns
+        -------
+        List[Union[:class:`commands.command`, :class:`commands.group`]]
+        """
 
-        return command_list
+        return list(self.command_index.sub(is_owner))
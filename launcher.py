@@ -3,25 +3,93 @@
 Start the bot and all files that has to be started before it.
 '''
 
+import asyncio, logging
 from utils.config import Config
 from utils.db_manager import Cache, DataBase
 from utils.emojis import Emojis
+from utils.bus import InvalidationBus
+from utils.log_dispatcher import LogDispatcher
+from utils.metrics import Metrics
+from utils.ratelimit import RateLimiter
+from utils.menu_router import MenuRouter
+from utils.users import UserResolver
+from utils.stats import Stats
+from utils.timeseries import TimeSeries
+from utils.reloader import Reloader
+from utils.startup import StartupTimeline
+from utils.logger import setup_logging
 import bot.main as Bot
 
 if __name__ == "__main__":
     
+    # time every step of the startup
+    timeline = StartupTimeline()
+    
     # initiating config instance
-    config = Config()
+    with timeline.step("config"):
+        config = Config()
+    
+    # log through a background thread
+    listener = setup_logging(config)
+    log = logging.getLogger("launcher")
     
     # initiating bot instance, set config and load extensions
-    bot = Bot.InviteTracker(config)
-    bot.load_extensions()
+    with timeline.step("bot"):
+        bot = Bot.InviteTracker(config, timeline)
+    
+    with timeline.step("extensions"):
+        bot.load_extensions()
     
     # intiate modules
-    DataBase(bot)
-    Cache(bot, bot.db)
-    Emojis(bot)
-
+    with timeline.step("database"):
+        DataBase(bot)
+    
+    if config.db.Bus:
+        # keep caches in sync with other bot processes
+        with timeline.step("invalidation bus"):
+            InvalidationBus(bot, config.db.Bus)
+    
+    with timeline.step("cache"):
+        Cache(bot, bot.db)
+    
+    with timeline.step("emojis"):
+        Emojis(bot)
+    
+    LogDispatcher(bot)
+    
+    # serve metrics on the dashboard port
+    Metrics(bot, config.Dashboard.Port, config.Dashboard.MetricsHost or "127.0.0.1")
+    
+    # limit how often commands can be used
+    RateLimiter(bot)
+    
+    # send reactions to paginators and other menus
+    MenuRouter(bot)
+    
+    # cached user lookups
+    UserResolver(bot)
+    
+    # guild, member and channel counts
+    Stats(bot)
+    
+    # metrics over time
+    timeseries = TimeSeries(bot)
+    
+    # reload changed modules without a restart
+    Reloader(bot)
+    
+    log.info(f"Startup timeline:\n{timeline}")
+    
+    # apply config changes without a restart
+    config.add_listener("log level", lambda config: logging.getLogger().setLevel(config.log.Level))
+    asyncio.get_event_loop().create_task(config.watch())
     
     # connect database and run bot
-    bot.ignite(config.Token)
\ No newline at end of file
+    try:
+        bot.ignite(config.Token)
+    finally:
+        # keep the history for the next start
+        timeseries.save()
+        
+        # write the last log records
+        listener.stop()
\ No newline at end of file
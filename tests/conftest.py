@@ -0,0 +1,192 @@
+import asyncio, os, sqlite3, sys, time
+from types import SimpleNamespace
+
+import pytest
+
+# run the tests against the modules in this checkout
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeConfig():
+    """The config attributes the bot reads, without a file"""
+
+    def __init__(self):
+        self.Prefix = "!"
+        self.emojis = {}
+        self.listeners = {}
+
+
+    def add_listener(self, name, callback):
+        self.listeners[name] = callback
+
+
+class FakeBot():
+    """Stands in for InviteTracker without a gateway connection
+
+    Listeners are kept in `extra_events` like :class:`commands.Bot` does, and
+    :meth:`dispatch` awaits them. Tests set the other attributes they need.
+    """
+
+    def __init__(self):
+        self.cogs = {}
+        self.extensions = {}
+        self.extra_events = {}
+        self.guilds = []
+        self.latency = float("nan")
+        self.user = SimpleNamespace(id=0)
+        self.config = FakeConfig()
+
+
+    def add_listener(self, func, name=None):
+        self.extra_events.setdefault(name or func.__name__, []).append(func)
+
+
+    def remove_listener(self, func, name=None):
+        listeners = self.extra_events.get(name or func.__name__, [])
+
+        if func in listeners:
+            listeners.remove(func)
+
+
+    def get_cog(self, name):
+        return self.cogs.get(name)
+
+
+    async def dispatch(self, event, *args):
+        for listener in list(self.extra_events.get(f"on_{event}", [])):
+            await listener(*args)
+
+
+@pytest.fixture
+def bot():
+    return FakeBot()
+
+
+@pytest.fixture
+def command():
+    """Make a command with the attributes the command caches read"""
+
+    def command(name, aliases=(), hidden=False, parent=None):
+        qualified_name = f"{parent.qualified_name} {name}" if parent else name
+        return SimpleNamespace(name=name, aliases=list(aliases), hidden=hidden, parent=parent, qualified_name=qualified_name)
+
+    return command
+
+
+@pytest.fixture
+def cog():
+    """Make a cog with a list of commands"""
+
+    def cog(name, commands):
+        return SimpleNamespace(qualified_name=name, walk_commands=lambda: iter(commands))
+
+    return cog
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Control time.monotonic, the current time is clock[0]
+
+    Not for tests that run an event loop, the loop uses the same clock.
+    """
+
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    return now
+
+
+class Gateway():
+    """A real discord.py bot that is fed gateway events by the test
+
+    Events go through the parsers of its :class:`discord.state.ConnectionState`
+    like they would from the websocket, :meth:`flush` runs the listeners.
+    """
+
+    def __init__(self, loop, cls=None, **options):
+        from discord import Intents
+        from discord.ext import commands
+
+        self.loop = loop
+        self.bot = (cls or commands.Bot)(command_prefix="!", loop=loop, intents=Intents.all(), **options)
+        self.state = self.bot._connection
+
+
+    @staticmethod
+    def user(id:int) -> dict:
+        return {"id": str(id), "username": f"user{id}", "discriminator": "0001", "avatar": None}
+
+
+    def guild(self, id:int, member_count:int=0):
+        return self.state._add_guild_from_data({"id": str(id), "name": f"guild{id}", "member_count": member_count})
+
+
+    def parse(self, event:str, data:dict):
+        self.state.parsers[event](data)
+
+
+    def join(self, guild_id:int, user_id:int):
+        self.parse("GUILD_MEMBER_ADD", {"guild_id": str(guild_id), "user": self.user(user_id), "roles": [], "joined_at": "2021-01-01T00:00:00+00:00"})
+
+
+    def leave(self, guild_id:int, user_id:int):
+        self.parse("GUILD_MEMBER_REMOVE", {"guild_id": str(guild_id), "user": self.user(user_id)})
+
+
+    def flush(self):
+        """Run the listeners of the parsed events"""
+
+        for _ in range(3):
+            self.loop.run_until_complete(asyncio.sleep(0))
+
+
+@pytest.fixture
+def gateway():
+    """Make a :class:`Gateway`, options are passed to the bot
+
+    `cls` is the bot class, defaults to :class:`commands.Bot`.
+    """
+
+    pytest.importorskip("discord")
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    yield lambda **options: Gateway(loop, **options)
+
+    asyncio.set_event_loop(None)
+    loop.close()
+
+
+class Cursor():
+    def __init__(self, cursor):
+        self.description = cursor.description
+        self.rows = cursor.fetchall()
+
+    async def fetchall(self):
+        return self.rows
+
+    async def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+
+class Database():
+    """Runs the queries of :class:`utils.db_manager.DataBase` on sqlite
+
+    Tests make their tables with `connection`, the queries are kept in
+    `queries`.
+    """
+
+    def __init__(self):
+        self.connection = sqlite3.connect(":memory:")
+        self.queries = []
+
+    async def execute(self, query, args=(), commit=False):
+        self.queries.append(query)
+        return Cursor(self.connection.execute(query.replace("%s", "?"), args))
+
+
+@pytest.fixture
+def database():
+    database = Database()
+    yield database
+    database.connection.close()
@@ -0,0 +1,59 @@
+import asyncio, os, socket
+
+import pytest
+
+from utils.bus import InvalidationBus
+
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs unix sockets")
+
+
+def make_bus(bot, path, pid, monkeypatch):
+    with monkeypatch.context() as m:
+        # every process has its own socket
+        m.setattr(os, "getpid", lambda: pid)
+        return InvalidationBus(bot, str(path))
+
+
+def test_messages_reach_every_other_process(bot, tmp_path, monkeypatch):
+    async def main():
+        first, second, third = (make_bus(bot, tmp_path, pid, monkeypatch) for pid in (1, 2, 3))
+        received = {1: [], 2: [], 3: []}
+
+        for pid, bus in ((1, first), (2, second), (3, third)):
+            async def callback(key, pid=pid):
+                received[pid].append(key)
+
+            bus.subscribe("prefixes", callback)
+
+        first.publish("prefixes", 123)
+        first.publish("prefixes")
+        first.publish("blacklist", 1)
+
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+
+        for bus in (first, second, third):
+            bus.close()
+
+        return received
+
+    received = asyncio.run(main())
+
+    assert received == {1: [], 2: ["123", None], 3: ["123", None]}
+
+
+def test_sockets_of_stopped_processes_are_removed(bot, tmp_path, monkeypatch):
+    async def main():
+        bus = make_bus(bot, tmp_path, 1, monkeypatch)
+        gone = make_bus(bot, tmp_path, 2, monkeypatch)
+        # a process that stopped without removing its socket
+        gone.loop.remove_reader(gone.socket.fileno())
+        gone.socket.close()
+
+        bus.publish("prefixes", 1)
+        bus.close()
+
+    asyncio.run(main())
+
+    assert os.listdir(tmp_path) == []
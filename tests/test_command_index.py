@@ -0,0 +1,37 @@
+import pytest
+
+from utils.command_index import CommandIndex
+
+
+@pytest.fixture
+def commands(bot, command, cog):
+    info = command("info", aliases=["i"])
+    prefix = command("prefix")
+    reset = command("reset", parent=prefix)
+    secret = command("reload", hidden=True)
+    secret_sub = command("all", hidden=True, parent=secret)
+
+    for c in (cog("Info", [info, prefix, reset]), cog("Owner", [secret, secret_sub]), cog("Jishaku", [command("jsk")])):
+        bot.cogs[c.qualified_name] = c
+
+    return info, prefix, reset, secret, secret_sub
+
+
+def test_hidden_commands_are_owner_only(bot, commands):
+    info, prefix, reset, secret, secret_sub = commands
+    index = CommandIndex(bot, 1)
+
+    assert index.normal() == (info, prefix)
+    assert index.normal(is_owner=True) == (info, prefix, secret)
+    assert index.sub() == (reset,)
+    assert index.sub(is_owner=True) == (reset, secret_sub)
+
+
+def test_names_include_aliases_and_skip_jishaku(bot, commands):
+    info, prefix, reset, secret, secret_sub = commands
+    index = CommandIndex(bot, 3)
+
+    assert index.version == 3
+    assert index.name_map() == {"info": info, "i": info, "prefix": prefix}
+    assert index.name_map(is_owner=True)["reload"] is secret
+    assert "jsk" not in index.name_map(is_owner=True)
@@ -0,0 +1,112 @@
+import os
+
+import pytest
+import yaml
+
+from utils.config import Config, InvalidValue, MissingKey, MissingValue, SCHEMA
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def values():
+    with open(os.path.join(ROOT, "config.yml")) as file:
+        values = yaml.safe_load(file)
+
+    # a valid config, the example file leaves some values empty
+    for key, (_, types, can_be_empty, _) in SCHEMA.items():
+        if values.get(key) in (None, "") and not can_be_empty:
+            values[key] = types[0]("1")
+
+    return values
+
+
+@pytest.fixture
+def write(tmp_path, monkeypatch):
+    for name in list(os.environ):
+        if name.startswith("INVITE_TRACKER_"):
+            monkeypatch.delenv(name)
+
+    path = tmp_path / "config.yml"
+
+    def write(values):
+        path.write_text(yaml.safe_dump(values))
+        # a new modification time, even on file systems with coarse times
+        os.utime(path, (0, os.stat(path).st_mtime + 1))
+        return str(path)
+
+    return write
+
+
+def test_attributes_follow_the_schema(values, write):
+    config = Config(write(values))
+
+    assert config.Prefix == values["Prefix"]
+    assert config.db.Host == values["Host"]
+    assert config.Dashboard.Port == values["PORT"]
+    assert config.emojis["yes"] == (values["confirm"] or "")
+    assert config.CheckConfig()
+
+
+def test_invalid_files_are_rejected(values, write):
+    with pytest.raises(MissingKey):
+        Config(write({k: v for k, v in values.items() if k != "Prefix"}))
+
+    with pytest.raises(MissingValue):
+        Config(write({**values, "Token": ""}))
+
+    with pytest.raises(InvalidValue):
+        Config(write({**values, "Port": "3306"}))
+
+    # bool is an int, but not a valid one
+    with pytest.raises(InvalidValue):
+        Config(write({**values, "RecentMembers": True}))
+
+    # not used yet, so it may be missing
+    Config(write({k: v for k, v in values.items() if k != "Secret"}))
+
+
+def test_environment_overrides(values, write, monkeypatch):
+    monkeypatch.setenv("INVITE_TRACKER_DB_HOST", "db.example")
+    monkeypatch.setenv("INVITE_TRACKER_DB_PORT", "3307")
+    monkeypatch.setenv("INVITE_TRACKER_DASHBOARD_PORT", "8081")
+    monkeypatch.setenv("INVITE_TRACKER_PREFIX", "!")
+
+    config = Config(write(values))
+
+    assert config.db.Host == "db.example"
+    assert config.db.Port == 3307
+    assert config.Dashboard.Port == 8081
+    # strings are used as they are, not parsed as yaml
+    assert config.Prefix == "!"
+
+
+def test_reload_reports_changes_and_calls_listeners(values, write):
+    path = write(values)
+    config = Config(path)
+    calls = []
+
+    config.add_listener("test", lambda c: calls.append(c.Prefix))
+    config.add_listener("broken", lambda c: 1 / 0)
+
+    write({**values, "Prefix": "?", "Color": 1})
+    assert sorted(config.reload()) == ["Color", "Prefix"]
+    assert config.Prefix == "?"
+    assert calls == ["?"]
+
+    config.remove_listener("test")
+    write({**values, "Prefix": "!"})
+    config.reload()
+    assert calls == ["?"]
+
+
+def test_invalid_reload_keeps_the_config(values, write):
+    config = Config(write(values))
+
+    write({**values, "Prefix": 1})
+
+    with pytest.raises(InvalidValue):
+        config.reload()
+
+    assert config.Prefix == values["Prefix"]
@@ -0,0 +1,74 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from utils.emojis import Emojis
+
+
+def make_channel(guild_id, external, checks):
+    def permissions_in(channel):
+        checks.append(channel.id)
+        return SimpleNamespace(use_external_emojis=external)
+
+    guild = SimpleNamespace(id=guild_id, me=SimpleNamespace(permissions_in=permissions_in))
+    return SimpleNamespace(id=guild_id * 10, guild=guild)
+
+
+@pytest.fixture
+def emojis(bot):
+    bot.known = {1: SimpleNamespace(id=1, guild_id=100)}
+    bot.lookups = 0
+
+    def get_emoji(id):
+        bot.lookups += 1
+        return bot.known.get(id)
+
+    bot.get_emoji = get_emoji
+    bot.config.emojis = {"yes": "<:yes:1>", "no": "<a:no:2>", "loading": "⏳", "voice": ""}
+
+    return Emojis(bot)
+
+
+def test_configured_emojis(bot, emojis):
+    dm = SimpleNamespace(guild=None)
+
+    assert bot.smart_emojis is emojis
+    assert emojis.get_emoji("voice", dm) == "⚠️"
+    assert emojis.get_emoji("loading", dm) == "⏳"
+    # the bot can't see emoji 2
+    assert emojis.get_emoji("no", dm) == "❗"
+    assert emojis.get_emoji("yes", dm) == "<:yes:1>"
+    # only looked up once, when the index was made
+    assert bot.lookups == 2
+
+
+def test_external_emojis_need_permission(bot, emojis):
+    checks = []
+
+    home = make_channel(100, external=False, checks=checks)
+    allowed = make_channel(200, external=True, checks=checks)
+    denied = make_channel(300, external=False, checks=checks)
+
+    assert emojis.get_emoji("yes", home) == "<:yes:1>"
+    assert emojis.get_emoji("yes", allowed) == "<:yes:1>"
+    assert emojis.get_emoji("yes", denied) == "‼️"
+    assert emojis.get_emoji("yes", denied) == "‼️"
+    # the permission is remembered per channel
+    assert checks == [allowed.id, denied.id]
+
+    asyncio.run(emojis.on_guild_channel_update(denied, denied))
+    emojis.get_emoji("yes", denied)
+    assert checks == [allowed.id, denied.id, denied.id]
+
+
+def test_index_updates(bot, emojis):
+
+    # emoji 2 was added to a guild the bot is in
+    bot.known[2] = SimpleNamespace(id=2, guild_id=100)
+    asyncio.run(emojis.on_guild_emojis_update(None, [], [bot.known[2]]))
+    assert emojis.get_emoji("no", SimpleNamespace(guild=None)) == "<a:no:2>"
+
+    # a reloaded config with other emojis
+    bot.config.listeners["emojis"](SimpleNamespace(emojis={"yes": "<:other:3>"}))
+    assert emojis.get_emoji("yes", SimpleNamespace(guild=None)) == "❗"
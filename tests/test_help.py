@@ -0,0 +1,134 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("discord")
+pytest.importorskip("discord.ext.menus")
+
+from discord.ext import commands
+
+from bot.cogs import help
+from bot.cogs.help import HelpCache, MyHelp
+
+
+@commands.command(name="info", aliases=["i"], help="Show info.")
+async def info(ctx):
+    pass
+
+
+@commands.command(name="invites", help="Show invites.")
+async def invites(ctx, user:int):
+    pass
+
+
+@commands.group(name="settings")
+async def settings(ctx):
+    pass
+
+
+@settings.command(name="show")
+async def show(ctx):
+    pass
+
+
+@pytest.fixture
+def help_command(bot):
+    bot.config.Color = 0
+    bot.help_cache = HelpCache()
+    bot.command_index = SimpleNamespace(version=1, normal=lambda is_owner: [info, invites, settings])
+    bot.user = SimpleNamespace(id=0, display_name="bot")
+
+    async def is_owner(user):
+        return False
+
+    bot.is_owner = is_owner
+
+    help_command = MyHelp()
+    help_command.context = SimpleNamespace(bot=bot, guild=None, prefix="!", author=None, message=SimpleNamespace(content="!help invites"))
+    help_command.renders = 0
+
+    generate = help_command.generate_command_embed
+
+    def generate_command_embed(command):
+        help_command.renders += 1
+        return generate(command)
+
+    help_command.generate_command_embed = generate_command_embed
+    return help_command
+
+
+def test_least_recently_used_renders_are_removed():
+    cache = HelpCache(size=2)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert list(cache.renders) == ["a", "c"]
+
+
+def test_pages_are_rendered_once_per_key(help_command):
+    embeds, indexes = help_command.render_pages("key", [info, invites, settings])
+
+    assert [embed.footer.text for embed in embeds] == ["Page: 1/3", "Page: 2/3", "Page: 3/3"]
+    assert indexes == {"info": 0, "invites": 1, "settings": 2}
+
+    assert help_command.render_pages("key", [info, invites, settings]) == (embeds, indexes)
+    assert help_command.renders == 3
+
+    # like after the commands changed
+    help_command.render_pages("other key", [info])
+    assert help_command.renders == 4
+
+
+def test_command_help_starts_at_the_command(help_command):
+    async def main():
+        return await help_command.generate_embeds_for_normal_command(invites)
+
+    embeds, index = asyncio.run(main())
+    again, _ = asyncio.run(main())
+
+    assert index == 1
+    assert embeds[1].title == "invites help"
+    assert "`!invites <user>`" in [field.value for field in embeds[1].fields]
+    # a copy, so the paginator can't change the cached pages
+    assert embeds is not again and embeds == again
+    assert help_command.renders == 3
+
+
+def test_subcommand_help(help_command):
+    help_command.context.message.content = "!help settings show"
+
+    embeds, index = asyncio.run(help_command.generate_embeds_for_subcommand(show))
+
+    assert (len(embeds), index) == (1, 0)
+    assert embeds[0].title == "show help"
+
+
+def test_commands_missing_from_the_index_get_one_page(help_command):
+    @commands.command(name="debug")
+    async def debug(ctx):
+        pass
+
+    embeds, index = asyncio.run(help_command.generate_embeds_for_normal_command(debug))
+
+    assert (len(embeds), index) == (1, 0)
+    assert embeds[0].title == "debug help"
+
+
+def test_the_cache_is_kept_on_reload_and_cleared_with_the_config(bot):
+    bot.cogs["Info"] = commands.Cog()
+    bot.help_command = None
+
+    help.setup(bot)
+    cache = bot.help_cache
+    cache.set("key", "render")
+
+    help.setup(bot)
+    assert bot.help_cache is cache and cache.get("key") == "render"
+
+    bot.config.listeners["help"](bot.config)
+    assert cache.renders == {}
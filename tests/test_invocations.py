@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+from utils.invocations import Invocations
+
+
+def make_message(id, content):
+    return SimpleNamespace(id=id, content=content)
+
+
+def test_seen_only_with_the_same_content(bot):
+    invocations = Invocations(bot)
+    message = make_message(1, "!info")
+
+    assert bot.invocations is invocations
+    assert not invocations.seen(message)
+
+    invocations.record(message)
+    assert invocations.seen(message)
+
+    message.content = "!invites"
+    assert not invocations.seen(message)
+    assert not invocations.seen(make_message(2, "!info"))
+
+
+def test_record_again_keeps_the_response(bot):
+    invocations = Invocations(bot)
+    message = make_message(1, "!info")
+
+    invocation = invocations.record(message)
+    invocation.response = "response"
+
+    message.content = "!invites"
+    assert invocations.record(message) is invocation
+    assert invocation.response == "response"
+    assert invocations.seen(message)
+    assert len(invocations) == 1
+
+
+def test_oldest_invocation_is_forgotten(bot):
+    invocations = Invocations(bot, size=2)
+
+    for id in range(3):
+        invocations.record(make_message(id, "!info"))
+
+    assert len(invocations) == 2
+    assert invocations.get(0) is None
+    assert invocations.get(1) is not None and invocations.get(2) is not None
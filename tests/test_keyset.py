@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiomysql")
+
+from utils.db_manager import KeysetSource
+
+
+def make_table(database, ids):
+    database.connection.execute("CREATE TABLE blacklist (index_id INTEGER PRIMARY KEY, id INTEGER, type TEXT)")
+    database.connection.executemany("INSERT INTO blacklist VALUES (?, ?, ?)", [(i, i * 10, "user" if i % 3 else "server") for i in ids])
+    return database
+
+
+def make_source(db, **kwargs):
+    return KeysetSource(db, "blacklist", "index_id", lambda rows, index: [row[0] for row in rows], per_page=3, **kwargs)
+
+
+def pages(source, *indexes):
+    async def main():
+        return [await source(index) for index in indexes]
+
+    return asyncio.run(main())
+
+
+def test_first_and_last_page(database):
+    db = make_table(database, range(1, 9))
+    source = make_source(db)
+
+    assert asyncio.run(source.count()) == 3
+    assert pages(source, 0, 1, 2, 3) == [[1, 2, 3], [4, 5, 6], [7, 8], None]
+
+
+def test_pages_can_be_skipped_and_revisited(database):
+    db = make_table(database, range(1, 11))
+    source = make_source(db)
+
+    # only the keys of pages 0 and 1 are read on the way
+    assert pages(source, 2) == [[7, 8, 9]]
+    assert db.queries[0].startswith("SELECT index_id FROM")
+    assert source.boundaries == {0: None, 1: 3, 2: 6, 3: 9}
+
+    db.queries.clear()
+    # visited, one query each
+    assert pages(source, 1, 3) == [[4, 5, 6], [10]]
+    assert len(db.queries) == 2
+
+    # the table ends before page 5
+    assert pages(source, 5) == [None]
+
+
+def test_empty_table(database):
+    source = make_source(make_table(database, []))
+
+    assert asyncio.run(source.count()) == 0
+    assert pages(source, 0, 1) == [None, None]
+
+
+def test_rows_deleted_between_pages(database):
+    db = make_table(database, range(1, 11))
+    source = make_source(db)
+
+    assert pages(source, 0) == [[1, 2, 3]]
+
+    # the last row of the page and a row of the next page
+    db.connection.execute("DELETE FROM blacklist WHERE index_id IN (3, 5)")
+
+    # the next page starts after the key, even if it is gone
+    assert pages(source, 1, 0) == [[4, 6, 7], [1, 2, 4]]
+
+
+def test_where_condition(database):
+    source = make_source(make_table(database, range(1, 11)), columns="index_id, id", where="type = %s", args=("user",))
+
+    assert asyncio.run(source.count()) == 3
+    assert pages(source, 0, 1, 2) == [[1, 2, 4], [5, 7, 8], [10]]
@@ -0,0 +1,116 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+discord = pytest.importorskip("discord")
+
+from utils.log_dispatcher import LogDispatcher, MAX_LENGTH
+
+
+class FakeHTTP():
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.messages = []
+
+    async def request(self, route, json):
+        if self.fail:
+            raise discord.HTTPException(SimpleNamespace(status=400, reason="Bad Request"), "Invalid Form Body")
+
+        self.messages.append((route.channel_id, json["embeds"]))
+
+
+@pytest.fixture
+def dispatcher(bot):
+    bot.http = FakeHTTP()
+    return LogDispatcher(bot, interval=0.01)
+
+
+def channel(id):
+    return SimpleNamespace(id=id)
+
+
+def embed(length=10):
+    return discord.Embed(title="x" * length)
+
+
+def test_batches_of_at_most_ten_embeds(bot, dispatcher):
+    async def main():
+        for _ in range(15):
+            dispatcher.submit(channel(1), embed())
+
+        dispatcher.submit(channel(2), embed())
+        await asyncio.sleep(0.05)
+
+    asyncio.run(main())
+
+    sizes = sorted((id, len(embeds)) for id, embeds in bot.http.messages)
+    assert sizes == [(1, 5), (1, 10), (2, 1)]
+    assert (dispatcher.submitted, dispatcher.sent, dispatcher.failed) == (16, 16, 0)
+
+
+def test_batches_stay_under_the_length_limit(bot, dispatcher):
+    async def main():
+        for _ in range(4):
+            dispatcher.submit(channel(1), embed(2000))
+
+        # too long for any message
+        dispatcher.submit(channel(1), embed(MAX_LENGTH + 1))
+        dispatcher.submit(channel(1), embed())
+        await asyncio.sleep(0.06)
+
+    asyncio.run(main())
+
+    batches = [embeds for _, embeds in bot.http.messages]
+    assert [len(embeds) for embeds in batches] == [3, 2]
+    assert all(sum(len(e["title"]) for e in embeds) <= MAX_LENGTH for embeds in batches)
+    assert (dispatcher.sent, dispatcher.failed) == (5, 1)
+
+
+def test_dropped_embeds_are_summarized(bot):
+    bot.http = FakeHTTP()
+    dispatcher = LogDispatcher(bot, interval=0.01, size=2)
+
+    async def main():
+        for _ in range(5):
+            dispatcher.submit(channel(1), embed())
+
+        await asyncio.sleep(0.03)
+
+    asyncio.run(main())
+
+    (_, embeds), = bot.http.messages
+    assert embeds[0]["title"] == "Log events dropped"
+    assert "`3`" in embeds[0]["description"]
+    assert len(embeds) == 3
+    assert dispatcher.dropped == 3
+
+
+def test_failed_batches_are_counted(bot, dispatcher):
+    bot.http.fail = True
+
+    async def main():
+        dispatcher.submit(channel(1), embed())
+        dispatcher.submit(channel(1), embed())
+        await asyncio.sleep(0.03)
+
+    asyncio.run(main())
+
+    assert (dispatcher.sent, dispatcher.failed) == (0, 2)
+
+
+def test_idle_channels_are_forgotten(bot, dispatcher):
+    async def main():
+        dispatcher.submit(channel(1), embed())
+        await asyncio.sleep(0.05)
+
+        assert dispatcher.queues == {}
+        assert dispatcher.task.done()
+
+        # starts again
+        dispatcher.submit(channel(2), embed())
+        await asyncio.sleep(0.02)
+
+    asyncio.run(main())
+
+    assert [id for id, _ in bot.http.messages] == [1, 2]
@@ -0,0 +1,105 @@
+import json, logging
+from types import SimpleNamespace
+
+from utils.logger import BackgroundHandler, ContextFilter, DuplicateFilter, JSONFormatter, event_context, log_context
+
+
+def make_record(msg="message", args=None, level=logging.INFO, exc_info=None):
+    return logging.LogRecord("test", level, __file__, 1, msg, args, exc_info)
+
+
+def test_duplicates_are_counted_until_the_interval_passes(clock):
+    duplicates = DuplicateFilter(interval=10)
+
+    assert duplicates.filter(make_record())
+    assert not duplicates.filter(make_record())
+    assert not duplicates.filter(make_record())
+    # another message passes
+    assert duplicates.filter(make_record("other"))
+
+    clock[0] += 10
+    record = make_record()
+    assert duplicates.filter(record)
+    assert record.suppressed == 2
+
+
+def test_duplicate_filter_is_bounded():
+    duplicates = DuplicateFilter(size=2)
+
+    for msg in ("a", "b", "c"):
+        duplicates.filter(make_record(msg))
+
+    assert len(duplicates.seen) == 1
+
+
+def test_records_are_json_with_the_context():
+    token = log_context.set({"guild": 1, "command": "info"})
+
+    try:
+        record = make_record("%s joined", ("someone",))
+        ContextFilter().filter(record)
+    finally:
+        log_context.reset(token)
+
+    entry = json.loads(JSONFormatter().format(record))
+
+    assert entry["message"] == "someone joined"
+    assert entry["level"] == "INFO"
+    assert (entry["guild"], entry["command"]) == (1, "info")
+    assert entry["time"].endswith("Z")
+    assert "suppressed" not in entry
+
+
+def test_queued_records_keep_the_exception_text():
+    try:
+        1 / 0
+    except ZeroDivisionError as e:
+        record = make_record("%s failed", ("task",), logging.ERROR, (type(e), e, e.__traceback__))
+
+    prepared = BackgroundHandler(None).prepare(record)
+
+    assert prepared.msg == "task failed" and prepared.args is None
+    assert prepared.exc_info is None
+    assert "ZeroDivisionError" in json.loads(JSONFormatter().format(prepared))["exception"]
+
+
+def test_event_context_finds_the_guild():
+    guild = SimpleNamespace(id=1, shard_id=2, member_count=10)
+    member = SimpleNamespace(id=3, guild=guild)
+
+    assert event_context("member_join", (member,)) == {"event": "member_join", "guild": 1, "shard": 2}
+    assert event_context("guild_join", (guild,)) == {"event": "guild_join", "guild": 1, "shard": 2}
+    assert event_context("raw_reaction_add", (SimpleNamespace(guild_id=1),)) == {"event": "raw_reaction_add", "guild": 1}
+    # a direct message
+    assert event_context("message", (SimpleNamespace(guild=None),)) == {"event": "message"}
+
+
+def test_event_listeners_log_with_the_context(gateway):
+    from bot.main import InviteTracker
+
+    class Bot(InviteTracker):
+        # only the discord.py setup, no config or database
+        def __init__(self, **options):
+            super(InviteTracker, self).__init__(**options)
+
+    events = gateway(cls=Bot)
+    events.guild(1)
+    contexts = []
+
+    async def on_member_join(member):
+        contexts.append(log_context.get())
+
+        # events dispatched by a listener keep its context
+        events.bot.dispatch("custom")
+
+    async def on_custom():
+        contexts.append(log_context.get())
+
+    events.bot.add_listener(on_member_join)
+    events.bot.add_listener(on_custom)
+
+    events.join(1, 2)
+    events.flush()
+
+    assert contexts == [{"event": "member_join", "guild": 1, "shard": None}] * 2
+    assert log_context.get() == {}
@@ -0,0 +1,137 @@
+from types import SimpleNamespace
+
+import pytest
+
+discord = pytest.importorskip("discord")
+
+from utils.members import RecentMembers
+
+
+@pytest.fixture
+def lean(gateway):
+    """A bot without a member cache, like with LeanMembers on"""
+
+    return gateway(member_cache_flags=discord.MemberCacheFlags.none(), chunk_guilds_at_startup=False)
+
+
+class FakeGuild():
+    def __init__(self, id, members=(), gateway=()):
+        self.id = id
+        self.members = {m.id: m for m in members}
+        self.gateway = {m.id: m for m in gateway}
+        self.queries = []
+
+    def get_member(self, id):
+        return self.members.get(id)
+
+    async def query_members(self, user_ids, cache):
+        self.queries.append((user_ids, cache))
+        return [self.gateway[id] for id in user_ids if id in self.gateway]
+
+
+def member(guild_id, id):
+    return SimpleNamespace(id=id, guild=SimpleNamespace(id=guild_id))
+
+
+def test_least_recently_seen_member_is_removed(lean):
+    members = RecentMembers(lean.bot, size=2)
+    first, second, third = member(1, 1), member(1, 2), member(2, 1)
+
+    members.add(first)
+    members.add(second)
+    # seen again, so the newest
+    members.add(first)
+    members.add(third)
+
+    assert len(members) == 2
+    assert members.get(1, 2) is None
+    assert members.get(1, 1) is first and members.get(2, 1) is third
+
+
+def test_fetch_asks_the_gateway_last(lean):
+    cached, queried = member(1, 1), member(1, 2)
+    guild = FakeGuild(1, members=[cached], gateway=[queried])
+    members = RecentMembers(lean.bot)
+
+    async def main():
+        assert await members.fetch(guild, 1) is cached
+        assert await members.fetch(guild, 2) is queried
+        # cached now
+        assert await members.fetch(guild, 2) is queried
+        assert await members.fetch(guild, 3) is None
+
+    lean.loop.run_until_complete(main())
+
+    assert guild.queries == [([2], False), ([3], False)]
+
+
+def test_leaves_of_uncached_members_are_seen(lean):
+    members = RecentMembers(lean.bot)
+    guild = lean.guild(1, member_count=10)
+    leaves = []
+
+    async def on_raw_member_remove(payload):
+        leaves.append((payload.guild_id, payload.user.id))
+
+    lean.bot.add_listener(on_raw_member_remove)
+
+    lean.join(1, 2)
+    lean.flush()
+    # only in the recent members, discord.py has no member cache
+    assert guild.get_member(2) is None
+    joined = members.get(1, 2)
+    assert joined is not None
+
+    members.add(member(1, 3))
+    lean.leave(1, 2)
+    # never cached anywhere
+    lean.leave(1, 4)
+    lean.flush()
+
+    assert leaves == [(1, 2), (1, 4)]
+    # the member that left is the most recently seen again
+    assert list(members.members) == [(1, 3), (1, 2)]
+    assert members.get(1, 2) is joined
+    assert guild.member_count == 9
+
+
+def test_leaves_of_cached_members_are_sent_once(gateway):
+    full = gateway()
+    members = RecentMembers(full.bot)
+    full.guild(1)
+    removed, raw = [], []
+
+    async def on_member_remove(member):
+        removed.append(member.id)
+
+    async def on_raw_member_remove(payload):
+        raw.append(payload.user.id)
+
+    full.bot.add_listener(on_member_remove)
+    full.bot.add_listener(on_raw_member_remove)
+
+    full.join(1, 2)
+    full.leave(1, 2)
+    # a leave in a guild the bot isn't in is ignored
+    full.leave(5, 2)
+    full.flush()
+
+    assert removed == [2] and raw == [2]
+    assert members.get(1, 2) is not None
+
+
+def test_reloading_wraps_the_parser_once(lean):
+    RecentMembers(lean.bot)
+    members = RecentMembers(lean.bot)
+    lean.guild(1)
+    leaves = []
+
+    async def on_raw_member_remove(payload):
+        leaves.append(payload.user.id)
+
+    lean.bot.add_listener(on_raw_member_remove)
+    lean.leave(1, 2)
+    lean.flush()
+
+    assert leaves == [2]
+    assert lean.bot.recent_members is members
@@ -0,0 +1,142 @@
+import asyncio
+from types import SimpleNamespace
+
+from utils.menu_router import MenuRouter
+
+
+def payload(message_id):
+    return SimpleNamespace(message_id=message_id)
+
+
+class FakeMenu():
+    def __init__(self, used=True):
+        self.used = used
+        self.reactions = 0
+        self.closed = []
+
+    async def handler(self, payload):
+        self.reactions += 1
+        return self.used
+
+    async def close(self, reason):
+        self.closed.append(reason)
+
+
+def test_reactions_go_to_their_menu(bot):
+    async def main():
+        router = MenuRouter(bot, resolution=0.01)
+        first, second = FakeMenu(), FakeMenu()
+        router.register(1, first.handler, first.close, 60)
+        router.register(2, second.handler, second.close, 60)
+
+        await router.on_raw_reaction_add(payload(1))
+        await router.on_raw_reaction_remove(payload(1))
+        await router.on_raw_reaction_add(payload(3))
+
+        assert (first.reactions, second.reactions) == (2, 0)
+
+        router.unregister(1)
+        await router.on_raw_reaction_add(payload(1))
+        assert first.reactions == 2 and first.closed == []
+        router.unregister(2)
+
+    asyncio.run(main())
+
+
+def test_menus_time_out(bot):
+    async def main():
+        router = MenuRouter(bot, resolution=0.01)
+        menu = FakeMenu()
+        router.register(1, menu.handler, menu.close, 0.03)
+
+        await asyncio.sleep(0.1)
+
+        assert menu.closed == ["timeout"]
+        assert len(router) == 0 and router.wheel == {}
+
+    asyncio.run(main())
+
+
+def test_used_reactions_move_the_timeout(bot):
+    async def main():
+        router = MenuRouter(bot, resolution=0.01)
+        used, ignored = FakeMenu(), FakeMenu(used=False)
+        router.register(1, used.handler, used.close, 0.1)
+        router.register(2, ignored.handler, ignored.close, 0.1)
+
+        for _ in range(4):
+            await asyncio.sleep(0.04)
+            await router.on_raw_reaction_add(payload(1))
+            await router.on_raw_reaction_add(payload(2))
+
+        assert used.closed == []
+        assert ignored.closed == ["timeout"]
+
+        await asyncio.sleep(0.2)
+        assert used.closed == ["timeout"]
+
+    asyncio.run(main())
+
+
+def test_menus_without_timeout_never_expire(bot):
+    async def main():
+        router = MenuRouter(bot, resolution=0.01)
+        menu = FakeMenu()
+        router.register(1, menu.handler, menu.close, None)
+        await router.on_raw_reaction_add(payload(1))
+
+        assert router.wheel == {}
+        assert router.task is None
+
+        await asyncio.sleep(0.05)
+        assert menu.closed == [] and len(router) == 1
+
+    asyncio.run(main())
+
+
+def test_oldest_menu_is_evicted_from_the_wheel(bot):
+    async def main():
+        router = MenuRouter(bot, limit=2, resolution=0.01)
+        menus = [FakeMenu() for _ in range(3)]
+
+        for id, menu in enumerate(menus):
+            router.register(id, menu.handler, menu.close, 60)
+
+        await asyncio.sleep(0)
+
+        assert menus[0].closed == ["evicted"]
+        assert list(router.routes) == [1, 2]
+        assert set().union(*router.wheel.values()) == {1, 2}
+
+        router.unregister(1)
+        router.unregister(2)
+        assert router.wheel == {}
+
+    asyncio.run(main())
+
+
+def test_registering_a_message_again_replaces_its_menu(bot):
+    async def main():
+        router = MenuRouter(bot, limit=2, resolution=0.01)
+        old, other, new = FakeMenu(), FakeMenu(), FakeMenu()
+
+        router.register(1, old.handler, old.close, 60)
+        router.register(2, other.handler, other.close, 60)
+        router.register(1, new.handler, new.close, 0.03)
+        await asyncio.sleep(0)
+
+        assert old.closed == ["replaced"]
+        # the new menu is the newest, so the other one is evicted first
+        assert list(router.routes) == [2, 1]
+
+        await router.on_raw_reaction_add(payload(1))
+        assert (old.reactions, new.reactions) == (0, 1)
+
+        # only the new deadline is in the wheel
+        assert sum(1 in menus for menus in router.wheel.values()) == 1
+
+        await asyncio.sleep(0.1)
+        assert new.closed == ["timeout"] and old.closed == ["replaced"]
+        router.unregister(2)
+
+    asyncio.run(main())
@@ -0,0 +1,122 @@
+import asyncio, logging
+
+from utils.metrics import Counter, Gauge, Histogram, Metrics, RateLimitFilter, Total
+
+
+def test_counter_and_label_escaping():
+    counter = Counter("commands_total", "Commands invoked.", ("command",))
+    counter.inc("info")
+    counter.inc("info", amount=2)
+    counter.inc('say "hi"\n')
+
+    assert list(counter.render()) == [
+        'invitetracker_commands_total{command="info"} 3',
+        'invitetracker_commands_total{command="say \\"hi\\"\\n"} 1'
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("seconds", "Time.", buckets=(0.1, 1.0))
+
+    for value in (0.05, 0.1, 0.5, 5):
+        histogram.observe(value)
+
+    assert list(histogram.render()) == [
+        'invitetracker_seconds_bucket{le="0.1"} 2',
+        'invitetracker_seconds_bucket{le="1.0"} 3',
+        'invitetracker_seconds_bucket{le="+Inf"} 4',
+        "invitetracker_seconds_sum 5.65",
+        "invitetracker_seconds_count 4"
+    ]
+
+
+def test_gauges_without_a_value_are_left_out():
+    assert list(Gauge("a", "A.", lambda: 1 / 0).render()) == []
+    assert list(Gauge("b", "B.", lambda: None).render()) == []
+    assert list(Gauge("c", "C.", lambda: {("x",): 2}, ("state",)).render()) == ['invitetracker_c{state="x"} 2']
+
+
+def test_served_on_localhost(bot):
+    bot.guilds = [1, 2]
+
+    async def main():
+        metrics = Metrics(bot, 0)
+
+        while metrics.server is None:
+            await asyncio.sleep(0)
+
+        host, port = metrics.server.sockets[0].getsockname()[:2]
+        assert host == "127.0.0.1"
+
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        response = await reader.read()
+        writer.close()
+        metrics.close()
+
+        return response.decode()
+
+    response = asyncio.run(main())
+
+    assert response.startswith("HTTP/1.1 200 OK")
+    lines = response.splitlines()
+    assert "invitetracker_guilds 2" in lines
+    # no heartbeat yet
+    assert not any(line.startswith("invitetracker_gateway_latency_seconds") for line in lines)
+
+
+def test_bind_failures_are_logged(bot, caplog):
+    async def main():
+        server = await asyncio.start_server(lambda r, w: None, host="127.0.0.1", port=0)
+        port = server.sockets[0].getsockname()[1]
+
+        try:
+            metrics = Metrics(bot, port)
+            await metrics.start()
+            metrics.close()
+        finally:
+            server.close()
+
+        return metrics
+
+    with caplog.at_level(logging.ERROR, logger="utils.metrics"):
+        metrics = asyncio.run(main())
+
+    assert metrics.server is None
+    assert "Failed to serve metrics" in caplog.text
+
+
+def test_rate_limits_are_counted_once(bot, caplog):
+    http = logging.getLogger("discord.http")
+
+    async def main():
+        metrics = Metrics(bot, 0)
+
+        http.warning(RateLimitFilter.LIMITED, 1.5, "bucket")
+        await asyncio.sleep(0)
+
+        # a global 429 is logged twice in a row
+        http.warning(RateLimitFilter.LIMITED, 2.0, "bucket")
+        http.warning(RateLimitFilter.GLOBAL, 2.0)
+        await asyncio.sleep(0)
+
+        # waiting for a exhausted bucket is only logged at debug
+        http.debug(RateLimitFilter.EXHAUSTED, "bucket", 0.25)
+
+        metrics.close()
+        return metrics
+
+    with caplog.at_level(logging.WARNING):
+        metrics = asyncio.run(main())
+
+    assert metrics.rate_limits.values == {("bucket",): 1, ("global",): 1, ("exhausted",): 1}
+    assert metrics.rate_limit_wait.values == {("bucket",): 1.5, ("global",): 2.0, ("exhausted",): 0.25}
+    # the log handlers still only get the warnings
+    assert [r.levelno for r in caplog.records if r.name == "discord.http"] == [logging.WARNING] * 3
+
+
+def test_totals_are_counters():
+    total = Total("cache_hits_total", "Cache hits since startup.", lambda: {("suggestions",): 3}, ("cache",))
+
+    assert total.type == "counter"
+    assert list(total.render()) == ['invitetracker_cache_hits_total{cache="suggestions"} 3']
@@ -0,0 +1,233 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+discord = pytest.importorskip("discord")
+pytest.importorskip("discord.ext.menus")
+
+from utils import paginator as paginator_module
+from utils.paginator import EMPTY_PAGE, EditPacer, Paginator
+
+
+class FakeMessage():
+    def __init__(self, channel_id=1):
+        self.channel = SimpleNamespace(id=channel_id)
+        self.edits = []
+
+    async def edit(self, content=None, embed=None):
+        self.edits.append(embed.footer.text if embed else content)
+
+
+class Source():
+    """Renders "page n" for the first `size` pages and counts the renders"""
+
+    def __init__(self, size):
+        self.size = size
+        self.renders = []
+
+    async def __call__(self, index):
+        self.renders.append(index)
+        await asyncio.sleep(0)
+        return f"page {index}" if index < self.size else None
+
+
+def make_paginator(source, **kwargs):
+    paginator = Paginator(source=source, **kwargs)
+    paginator.message = FakeMessage()
+    return paginator
+
+
+def test_pages_are_rendered_once_and_the_recent_ones_kept():
+    source = Source(10)
+    paginator = make_paginator(source, cache_size=2)
+
+    async def main():
+        # asked for twice at once, rendered once
+        assert await asyncio.gather(paginator.get_page(0), paginator.get_page(0)) == ["page 0", "page 0"]
+        await paginator.get_page(1)
+        await paginator.get_page(0)
+        await paginator.get_page(2)
+
+    asyncio.run(main())
+
+    assert source.renders == [0, 1, 2]
+    # page 1 was shown the longest time ago
+    assert list(paginator._rendered) == [0, 2]
+
+
+def test_the_end_of_the_source_is_found():
+    source = Source(2)
+    paginator = make_paginator(source)
+
+    async def main():
+        assert paginator.page_count is None
+        await paginator.forward(None)
+        await paginator.forward(None)
+
+        assert paginator.page == 1 and paginator.page_count == 2
+        # known now, so not rendered again
+        await paginator.forward(None)
+        await paginator._updater
+
+    asyncio.run(main())
+
+    assert source.renders.count(2) == 1
+    assert paginator.page == 1
+
+
+def test_a_page_past_the_end_shows_the_last_page():
+    # rows were removed since the total was counted
+    paginator = make_paginator(Source(3), page=5, total=7)
+
+    async def main():
+        await paginator._get_message()
+
+    asyncio.run(main())
+
+    assert paginator.page == 2
+    assert paginator.message.edits == ["page 2"]
+
+
+def test_an_empty_source_shows_no_results():
+    paginator = make_paginator(Source(0))
+
+    asyncio.run(paginator._get_message())
+
+    assert paginator.page_count == 0
+    assert paginator.message.edits == [EMPTY_PAGE]
+
+
+def test_footers_show_the_page_count_once_known():
+    async def source(index):
+        return discord.Embed(title=str(index)) if index < 1 else None
+
+    paginator = make_paginator(source)
+
+    async def main():
+        await paginator._get_message()
+        # the prefetch finds the end
+        await asyncio.sleep(0.01)
+        await paginator._get_message()
+
+    asyncio.run(main())
+
+    assert paginator.message.edits == ["Page: 1", "Page: 1/1"]
+    # the page itself has no footer
+    assert not paginator._rendered[0].footer
+
+
+def test_the_pages_next_to_the_current_page_are_prefetched():
+    source = Source(10)
+    paginator = make_paginator(source, page=3)
+
+    async def main():
+        await paginator._get_message()
+        assert set(paginator._rendering) == {2, 4}
+        await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+
+    assert sorted(source.renders) == [2, 3, 4]
+    assert paginator._rendering == {}
+
+
+def test_failed_prefetches_are_logged(caplog):
+    async def source(index):
+        if index == 1:
+            raise ValueError("broken page")
+        return "page"
+
+    paginator = make_paginator(source)
+
+    async def main():
+        await paginator._get_message()
+        await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+
+    assert paginator._rendering == {}
+    assert "Failed to render page 1" in caplog.text
+
+
+def test_stopping_cancels_the_prefetches():
+    paginator = make_paginator(Source(10), page=3)
+
+    async def main():
+        await paginator._get_message()
+        tasks = list(paginator._rendering.values())
+        paginator._cancel_tasks()
+        await asyncio.sleep(0)
+
+        assert paginator._rendering == {}
+        assert all(task.cancelled() for task in tasks)
+
+    asyncio.run(main())
+
+
+def wait(pacer, channel_id):
+    """Run EditPacer.wait for a edit that doesn't have to wait"""
+
+    with pytest.raises(StopIteration):
+        pacer.wait(channel_id).send(None)
+
+
+def test_quick_reactions_make_one_edit(monkeypatch):
+    monkeypatch.setattr(paginator_module, "pacer", EditPacer(limit=1, per=0.05))
+    paginator = make_paginator(None, pages=[f"page {i}" for i in range(5)])
+
+    async def main():
+        await paginator.forward(None)
+        await paginator._updater
+
+        # the channel has to wait for its next edit
+        for _ in range(3):
+            await paginator.forward(None)
+
+        await paginator._updater
+
+    asyncio.run(main())
+
+    # the waiting edit shows the page selected last
+    assert paginator.message.edits == ["page 1", "page 4"]
+    assert paginator.skipped_edits == 2
+
+
+def test_pacer_limits_edits_in_each_channel():
+    pacer = EditPacer(limit=2, per=0.05)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        await pacer.wait(1)
+        await pacer.wait(1)
+        # another channel has its own limit
+        await pacer.wait(2)
+        assert loop.time() - start < 0.05
+
+        await pacer.wait(1)
+        assert loop.time() - start >= 0.05
+
+    asyncio.run(main())
+
+
+def test_pacer_forgets_idle_channels(clock):
+    pacer = EditPacer(limit=5, per=5)
+
+    wait(pacer, 1)
+    clock[0] += 3
+    wait(pacer, 2)
+    clock[0] += 1
+    # edited again, so the newest
+    wait(pacer, 1)
+    assert list(pacer.channels) == [2, 1]
+
+    clock[0] += 4.5
+    wait(pacer, 3)
+    # channel 2 has had no edits in the last period
+    assert list(pacer.channels) == [1, 3]
+
+    clock[0] += 5
+    wait(pacer, 3)
+    assert list(pacer.channels) == [3]
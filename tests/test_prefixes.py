@@ -0,0 +1,82 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("aiomysql")
+
+from bot.main import InviteTracker
+from utils.db_manager import prefixes
+
+
+def make_prefixes(bot, database):
+    """Make a prefix cache for a bot process, the bot publishes to `published`"""
+
+    bot.db = database
+    bot.cache = SimpleNamespace()
+    bot.published = []
+    bot.bus = SimpleNamespace(publish=lambda table, key: bot.published.append((table, key)))
+
+    bot.cache.prefixes = prefixes(bot, "prefixes")
+    asyncio.run(bot.cache.prefixes.fetch())
+    return bot.cache.prefixes
+
+
+@pytest.fixture
+def table(database):
+    database.connection.execute("CREATE TABLE prefixes (guild_id INTEGER PRIMARY KEY, prefix TEXT)")
+    database.connection.execute("INSERT INTO prefixes VALUES (1, '?')")
+    return database
+
+
+def message(guild_id):
+    return SimpleNamespace(guild=SimpleNamespace(id=guild_id) if guild_id else None)
+
+
+def test_prefixes_resolve_without_the_database(bot, table):
+    make_prefixes(bot, table)
+    table.queries.clear()
+
+    assert InviteTracker.resolve_prefix(bot, message(1)) == "?"
+    # not in the table, so known to use the default
+    assert InviteTracker.resolve_prefix(bot, message(2)) == "!"
+    assert InviteTracker.resolve_prefix(bot, message(None)) == "!"
+    assert table.queries == []
+
+
+def test_prefixes_before_the_cache_is_ready(bot):
+    assert InviteTracker.resolve_prefix(bot, message(1)) == "!"
+
+
+def test_setting_a_prefix_writes_through(bot, table):
+    cache = make_prefixes(bot, table)
+
+    async def main():
+        await cache.set(2, "$")
+        # the default prefix removes the row
+        await cache.set(1, "!")
+
+    asyncio.run(main())
+
+    assert cache.data == {2: "$"}
+    assert table.connection.execute("SELECT guild_id, prefix FROM prefixes").fetchall() == [(2, "$")]
+    assert bot.published == [("prefixes", 2), ("prefixes", 1)]
+
+
+def test_other_processes_see_prefix_changes(bot, table):
+    # another process with its own cache of the same table
+    other = make_prefixes(SimpleNamespace(config=bot.config, add_listener=bot.add_listener), table)
+    cache = make_prefixes(bot, table)
+
+    async def main():
+        await cache.set(1, "!")
+        await cache.set(3, "%")
+
+        # the bus sends the keys as strings
+        for _, key in bot.published:
+            await other.invalidate(str(key))
+
+    asyncio.run(main())
+
+    assert other.get(1) == "!" and 1 not in other.data
+    assert other.get(3) == "%"
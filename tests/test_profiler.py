@@ -0,0 +1,62 @@
+import asyncio, time
+from collections import Counter
+
+import pytest
+
+from utils.profiler import Profile, SamplingProfiler
+
+
+class Busy():
+    def spin(self, seconds):
+        end = time.perf_counter() + seconds
+
+        while time.perf_counter() < end:
+            pass
+
+
+def test_profile_functions_and_folded():
+    profile = Profile(Counter({("a:main", "b:work"): 3, ("a:main",): 1}), Counter(), 1.0)
+    own, total = profile.functions()
+
+    assert profile.samples == 4
+    assert own == {"b:work": 3, "a:main": 1}
+    assert total == {"a:main": 4, "b:work": 3}
+    assert profile.folded() == "a:main;b:work 3\na:main 1"
+
+
+def test_samples_are_grouped_by_cog(bot):
+    bot.cogs["Busy"] = Busy()
+    profiler = SamplingProfiler(bot, interval=0.001)
+
+    async def main():
+        task = asyncio.ensure_future(profiler.run(0.2))
+        await asyncio.sleep(0)
+
+        # block the event loop in the cog while the profiler runs
+        bot.cogs["Busy"].spin(0.1)
+        return await task
+
+    profile = asyncio.run(main())
+
+    assert profile.samples > 0
+    assert profile.cogs["Busy"] > 0
+    assert any(stack[-1] == f"{__name__}:spin" for stack in profile.stacks)
+    # nothing is kept that would hold on to old code after a reload
+    assert profiler.labels == {}
+    assert not profiler.running
+
+
+def test_only_one_run_at_a_time(bot):
+    profiler = SamplingProfiler(bot, interval=0.001)
+
+    async def main():
+        task = asyncio.ensure_future(profiler.run(0.05))
+        await asyncio.sleep(0)
+
+        try:
+            await profiler.run(0.01)
+        finally:
+            await task
+
+    with pytest.raises(RuntimeError, match="already running"):
+        asyncio.run(main())
@@ -0,0 +1,114 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("discord")
+
+from utils.ratelimit import Buckets, RateLimited, RateLimiter, TokenBucket
+
+
+def make_ctx(user=1, guild=1, command="info"):
+    return SimpleNamespace(
+        author=SimpleNamespace(id=user),
+        guild=SimpleNamespace(id=guild) if guild is not None else None,
+        # unknown commands have no command
+        command=SimpleNamespace(qualified_name=command) if command is not None else None
+    )
+
+
+def test_token_bucket_refills_up_to_capacity():
+    bucket = TokenBucket(0, now=0)
+
+    bucket.refill(rate=2, capacity=5, now=1)
+    assert bucket.tokens == 2
+
+    bucket.refill(rate=2, capacity=5, now=10)
+    assert bucket.tokens == 5
+    assert bucket.updated == 10
+
+
+def test_buckets_take_until_empty():
+    buckets = Buckets(rate=1, capacity=2)
+
+    assert buckets.take("a", 0)
+    assert buckets.take("a", 0)
+    assert not buckets.take("a", 0)
+    # another key has its own bucket
+    assert buckets.take("b", 0)
+    # one token a second
+    assert buckets.take("a", 1)
+
+
+def test_buckets_evict_idle_and_least_recently_used():
+    buckets = Buckets(rate=1, capacity=2, size=2)
+
+    buckets.take("a", 0)
+    buckets.take("b", 1)
+    buckets.take("a", 1)
+    buckets.take("c", 1.5)
+    # "b" was used the longest time ago
+    assert list(buckets.buckets) == ["a", "c"]
+
+    # full again after capacity / rate seconds, so no longer kept
+    buckets.get("d", 10)
+    assert list(buckets.buckets) == ["d"]
+
+
+def test_rejected_command_takes_no_tokens(bot, clock):
+    limiter = RateLimiter(bot, user=(1, 5), guild=(1, 1), total=(1, 100))
+
+    limiter.check(make_ctx(user=1))
+
+    with pytest.raises(RateLimited) as e:
+        limiter.check(make_ctx(user=2))
+
+    assert e.value.scope == "guild"
+    assert limiter.rejections.values == {("guild",): 1}
+    # the guild rejected it, the user and global buckets are untouched
+    assert limiter.users.buckets[2].tokens == 5
+    assert limiter.total.buckets[None].tokens == 99
+
+
+def test_user_bucket_and_direct_messages(bot, clock):
+    limiter = RateLimiter(bot, user=(1, 2), guild=(1, 100), total=(1, 100))
+
+    limiter.check(make_ctx(guild=None))
+    limiter.check(make_ctx(guild=None))
+
+    with pytest.raises(RateLimited) as e:
+        limiter.check(make_ctx(guild=None))
+
+    assert e.value.scope == "user"
+    assert len(limiter.guilds) == 0
+
+    clock[0] += 1
+    limiter.check(make_ctx(guild=None))
+
+
+def test_low_priority_commands_are_shed(bot, clock):
+    limiter = RateLimiter(bot, user=(1, 100), guild=(1, 100), total=(1, 4), shed=0.5)
+
+    limiter.check(make_ctx(command="help"))
+    limiter.check(make_ctx(command="info"))
+    limiter.check(make_ctx(command="info"))
+
+    # one of four tokens left, low priority commands wait for half
+    with pytest.raises(RateLimited) as e:
+        limiter.check(make_ctx(command="help"))
+
+    assert e.value.scope == "shed"
+    limiter.check(make_ctx(command="info"))
+
+
+def test_unknown_commands_only_take_user_tokens(bot, clock):
+    limiter = RateLimiter(bot, user=(1, 2), guild=(1, 100), total=(1, 4), shed=0.5)
+
+    limiter.check(make_ctx(command=None))
+    limiter.check(make_ctx(command=None))
+
+    with pytest.raises(RateLimited) as e:
+        limiter.check(make_ctx(command=None))
+
+    assert e.value.scope == "user"
+    # the guild and global buckets are never touched
+    assert len(limiter.guilds) == 0 and len(limiter.total) == 0
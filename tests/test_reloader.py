@@ -0,0 +1,68 @@
+import types
+
+import pytest
+
+pytest.importorskip("discord")
+
+from utils.reloader import Reloader
+
+
+@pytest.fixture
+def reloader(bot):
+    return Reloader(bot)
+
+
+IMPORTS = {
+    "utils.config": set(),
+    "utils.metrics": set(),
+    "utils.ratelimit": {"utils.metrics"},
+    "utils.db_manager": {"utils.config"},
+    "bot.main": {"utils.db_manager", "utils.ratelimit"},
+    "bot.cogs.owner": {"utils.ratelimit"}
+}
+
+
+def test_dependents_include_indirect_imports(reloader):
+    reloader.imports = IMPORTS
+
+    assert reloader.dependents({"utils.metrics"}) == {"utils.metrics", "utils.ratelimit", "bot.main", "bot.cogs.owner"}
+    assert reloader.dependents({"bot.main"}) == {"bot.main"}
+
+
+def test_order_puts_dependencies_first(reloader):
+    reloader.imports = IMPORTS
+    order = reloader.order(set(IMPORTS))
+
+    assert sorted(order) == sorted(IMPORTS)
+
+    for name, imports in IMPORTS.items():
+        for dependency in imports:
+            assert order.index(dependency) < order.index(name)
+
+
+def test_order_survives_import_cycles(reloader):
+    reloader.imports = {"a": {"b"}, "b": {"a"}, "c": {"a"}}
+    order = reloader.order({"a", "b", "c"})
+
+    assert sorted(order) == ["a", "b", "c"]
+    assert order[-1] == "c"
+
+
+def test_live_objects_get_the_reloaded_class(bot, reloader):
+    old = types.ModuleType("utils.fake")
+    exec("class Cache():\n    def on_ready(self):\n        return 'old'", old.__dict__)
+
+    new = types.ModuleType("utils.fake")
+    exec("class Cache():\n    def on_ready(self):\n        return 'new'", new.__dict__)
+
+    bot.cache = old.Cache()
+    bot.extra_events["on_ready"] = [bot.cache.on_ready]
+
+    objects = reloader._live_objects({"utils.fake": old})
+    assert objects == [bot.cache]
+
+    swapped = reloader._swap(objects, new)
+    reloader._rebind(swapped)
+
+    assert type(bot.cache) is new.Cache
+    assert bot.extra_events["on_ready"][0]() == "new"
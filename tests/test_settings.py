@@ -0,0 +1,183 @@
+import asyncio, datetime
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("aiomysql")
+discord = pytest.importorskip("discord")
+
+from bot.cogs.settings import Settings
+from utils.db_manager import GuildSettings, guild_settings
+
+
+class Cursor():
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def fetchall(self):
+        return self.rows
+
+
+class FakeDB():
+    """Answers the settings queries from a dict of rows by guild id"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    async def execute(self, query, args=(), commit=False):
+        self.queries.append((query.split()[0], args))
+        await asyncio.sleep(0)
+
+        if query.startswith("SELECT"):
+            return Cursor([(id, *self.rows[id]) for id in args if id in self.rows])
+
+
+@pytest.fixture
+def settings(bot):
+    bot.db = FakeDB({1: (10, 20, 7), 2: (None, None, None)})
+    bot.cache = SimpleNamespace()
+    bot.published = []
+    bot.bus = SimpleNamespace(publish=lambda table, key: bot.published.append((table, key)))
+
+    bot.cache.guild_settings = guild_settings(bot, "guild_settings")
+    return bot.cache.guild_settings
+
+
+def test_settings_are_loaded_once(bot, settings):
+    async def main():
+        first, again = await asyncio.gather(settings.get(1), settings.get(1))
+        assert first is again
+        assert (first.log_channel, first.autorole, first.min_account_age) == (10, 20, 7)
+
+        # no row, so the defaults
+        assert (await settings.get(3)).min_account_age == 0
+        await settings.get(3)
+
+    asyncio.run(main())
+
+    assert bot.db.queries == [("SELECT", (1,)), ("SELECT", (3,))]
+
+
+def test_null_account_age_is_off():
+    assert GuildSettings(1, None, None, None).min_account_age == 0
+
+
+def test_settings_for_all_guilds_are_loaded_on_ready(bot, settings):
+    bot.guilds = [SimpleNamespace(id=id) for id in (1, 2, 3)]
+
+    async def main():
+        await settings.on_ready()
+        await settings.get(2)
+
+        await settings.on_guild_remove(bot.guilds[0])
+
+    asyncio.run(main())
+
+    assert bot.db.queries == [("SELECT", (1, 2, 3))]
+    assert settings.cached(1) is None
+    assert settings.cached(2).min_account_age == 0
+
+
+def test_changes_are_written_then_cached(bot, settings):
+    async def main():
+        record = await settings.get(1)
+        await settings.set(1, autorole=None, min_account_age=3)
+
+        assert record.autorole is None and record.min_account_age == 3
+
+        with pytest.raises(settings.InvalidEnumValue):
+            await settings.set(1, prefix="?")
+
+    asyncio.run(main())
+
+    assert bot.db.queries[1] == ("INSERT", (1, None, 3))
+    assert bot.published == [("guild_settings", 1)]
+
+
+def test_only_cached_guilds_are_invalidated(bot, settings):
+    async def main():
+        await settings.get(1)
+        bot.db.rows[1] = (11, None, 0)
+
+        await settings.invalidate("1")
+        await settings.invalidate("2")
+
+    asyncio.run(main())
+
+    assert settings.cached(1).log_channel == 11
+    assert settings.cached(2) is None
+
+
+class FakeMember():
+    def __init__(self, guild, days, bot=False):
+        self.guild = guild
+        self.bot = bot
+        self.created_at = datetime.datetime.utcnow() - datetime.timedelta(days=days)
+        self.mention = "<@1>"
+        self.avatar_url = "https://cdn.discordapp.com/embed/avatars/0.png"
+        self.roles = []
+
+    async def add_roles(self, role, reason=None):
+        self.roles.append(role)
+
+
+def make_guild(id, permissions=True):
+    me = SimpleNamespace(guild_permissions=SimpleNamespace(manage_roles=True), top_role=10)
+    channel = SimpleNamespace(id=10, permissions_for=lambda member: SimpleNamespace(send_messages=permissions, embed_links=permissions))
+
+    return SimpleNamespace(
+        id=id, me=me,
+        get_role={20: 5}.get,
+        get_channel={10: channel}.get
+    )
+
+
+@pytest.fixture
+def joins(bot, settings):
+    bot.logged = []
+    bot.log_dispatcher = SimpleNamespace(submit=lambda channel, embed: bot.logged.append(embed.title))
+
+    return Settings(bot)
+
+
+def test_new_members_get_the_autorole_and_are_logged(bot, joins):
+    member = FakeMember(make_guild(1), days=30)
+
+    asyncio.run(joins.member_joined(member))
+
+    assert member.roles == [5]
+    assert bot.logged == ["Member joined"]
+
+
+def test_young_accounts_are_fake(bot, joins):
+    member = FakeMember(make_guild(1), days=1)
+
+    asyncio.run(joins.member_joined(member))
+
+    assert member.roles == []
+    assert bot.logged == ["Fake account joined"]
+
+
+def test_joins_without_settings(bot, joins):
+    # a NULL account age and no log channel or autorole
+    member = FakeMember(make_guild(2), days=0)
+    bots = FakeMember(make_guild(1), days=0, bot=True)
+
+    async def main():
+        await joins.member_joined(member)
+        await joins.member_joined(bots)
+
+    asyncio.run(main())
+
+    assert member.roles == [] and bots.roles == []
+    assert bot.logged == []
+
+
+def test_joins_are_not_logged_without_permissions(bot, joins):
+    member = FakeMember(make_guild(1, permissions=False), days=30)
+
+    asyncio.run(joins.member_joined(member))
+
+    assert member.roles == [5]
+    assert bot.logged == []
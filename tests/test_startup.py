@@ -0,0 +1,41 @@
+import pytest
+
+from utils.startup import StartupTimeline
+
+
+def test_steps_are_timed_in_order():
+    timeline = StartupTimeline()
+
+    with timeline.step("config") as config:
+        pass
+
+    with timeline.step("database"):
+        pass
+
+    assert [step.name for step in timeline.steps] == ["config", "database"]
+    assert timeline.steps[0] is config
+    assert config.duration >= 0
+    assert timeline.steps[1].offset >= config.offset + config.duration
+
+
+def test_failed_steps_are_kept():
+    timeline = StartupTimeline()
+
+    with pytest.raises(ImportError):
+        with timeline.step("load bot.cogs.broken"):
+            raise ImportError("broken")
+
+    assert [step.name for step in timeline.steps] == ["load bot.cogs.broken"]
+
+
+def test_str_lists_every_step_and_the_total():
+    timeline = StartupTimeline()
+
+    with timeline.step("load bot.cogs.info"):
+        pass
+
+    lines = str(timeline).splitlines()
+
+    assert len(lines) == 3
+    assert lines[1].endswith("load bot.cogs.info")
+    assert lines[2].endswith("total")
@@ -0,0 +1,78 @@
+import pytest
+
+discord = pytest.importorskip("discord")
+
+from utils.stats import Stats
+
+
+def channel(id, guild_id, type=0):
+    return {"id": str(id), "guild_id": str(guild_id), "type": type, "name": f"channel{id}", "position": 0, "permission_overwrites": []}
+
+
+def guild(id, member_count, channels=()):
+    return {"id": str(id), "name": f"guild{id}", "member_count": member_count, "channels": list(channels), "roles": [], "members": []}
+
+
+@pytest.fixture
+def lean(gateway):
+    return gateway(member_cache_flags=discord.MemberCacheFlags.none(), chunk_guilds_at_startup=False)
+
+
+def test_counts_after_ready(lean):
+    stats = Stats(lean.bot)
+    lean.state._add_guild_from_data(guild(1, 10, [channel(11, 1), channel(12, 1, type=2)]))
+    lean.state._add_guild_from_data(guild(2, 5, [channel(21, 2)]))
+
+    stats.count()
+
+    assert (stats.guilds, stats.members) == (2, 15)
+    assert (stats.text_channels, stats.voice_channels) == (2, 1)
+
+
+def test_members_follow_joins_and_leaves_without_a_member_cache(lean):
+    stats = Stats(lean.bot)
+    lean.guild(1, member_count=10)
+    stats.count()
+
+    for user in range(100, 110):
+        lean.join(1, user)
+
+    for user in range(100, 105):
+        lean.leave(1, user)
+
+    # members that joined before the bot started
+    lean.leave(1, 2)
+    lean.flush()
+
+    assert stats.members == 14
+
+
+def test_channel_events(lean):
+    stats = Stats(lean.bot)
+    lean.state._add_guild_from_data(guild(1, 1, [channel(11, 1)]))
+    stats.count()
+
+    lean.parse("CHANNEL_CREATE", channel(12, 1, type=2))
+    lean.parse("CHANNEL_UPDATE", channel(11, 1, type=5))
+    lean.flush()
+
+    assert (stats.text_channels, stats.voice_channels) == (0, 1)
+    assert stats.channels[discord.ChannelType.news] == 1
+
+    lean.parse("CHANNEL_DELETE", channel(12, 1, type=2))
+    lean.flush()
+
+    assert stats.voice_channels == 0
+
+
+def test_guild_join_and_remove(lean):
+    stats = Stats(lean.bot)
+    stats.count()
+    joined = lean.state._add_guild_from_data(guild(1, 7, [channel(11, 1)]))
+
+    lean.loop.run_until_complete(stats.on_guild_join(joined))
+    assert (stats.guilds, stats.members, stats.text_channels) == (1, 7, 1)
+
+    lean.state._remove_guild(joined)
+    lean.loop.run_until_complete(stats.on_guild_remove(joined))
+    assert (stats.guilds, stats.members, stats.text_channels) == (0, 0, 0)
@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from utils.command_index import CommandIndex
+from utils.suggestions import BKTree, Suggestions, distance
+
+
+@pytest.fixture
+def suggestions(bot, command, cog):
+    info = command("info", aliases=["i"])
+    invites = command("invites", aliases=["inv"])
+    reload = command("reload", hidden=True)
+
+    bot.cogs["Info"] = cog("Info", [info, invites, reload])
+    bot.command_index = CommandIndex(bot, 1)
+
+    return Suggestions(bot, size=2)
+
+
+def test_distance():
+    assert distance("", "") == 0
+    assert distance("info", "info") == 0
+    assert distance("info", "") == 4
+    assert distance("kitten", "sitting") == 3
+    assert distance("ab", "ba") == 2
+    assert distance("prefix", "prfix") == distance("prfix", "prefix") == 1
+
+
+def test_bktree_matches_brute_force():
+    rng = random.Random(0)
+    words = {"".join(rng.choice("abcd") for _ in range(rng.randint(1, 6))) for _ in range(200)}
+    tree = BKTree(words)
+
+    for word in ["abc", "dddd", "a", "bacd"]:
+        for max_distance in range(4):
+            expected = sorted((distance(word, w), w) for w in words if distance(word, w) <= max_distance)
+            assert sorted(tree.search(word, max_distance)) == expected
+
+
+def test_bktree_empty_and_duplicates():
+    assert BKTree().search("info", 3) == []
+
+    tree = BKTree(["info", "info"])
+    assert tree.search("info", 0) == [(0, "info")]
+
+
+def test_suggest_closest_first_and_aliases_once(suggestions):
+    # "info" is one edit away, the alias "inv" two
+    assert suggestions.suggest("INFI") == ["info", "invites"]
+    assert suggestions.suggest("invite") == ["invites"]
+    # "i" and "info" are both within range of "in" but are the same command
+    assert suggestions.suggest("in").count("info") == 1
+
+
+def test_owner_commands_are_only_suggested_to_owners(suggestions):
+    assert suggestions.suggest("relaod") == []
+    assert suggestions.suggest("relaod", is_owner=True) == ["reload"]
+
+
+def test_cache_is_bounded_and_rebuilt_on_new_version(bot, command, cog, suggestions):
+    suggestions.suggest("infi")
+    suggestions.suggest("infi")
+    assert (suggestions.hits, suggestions.misses) == (1, 1)
+
+    suggestions.suggest("invit")
+    suggestions.suggest("inv")
+    assert len(suggestions.cache) == 2
+    assert (False, "infi") not in suggestions.cache
+
+    bot.cogs["Info"] = cog("Info", [command("stats")])
+    bot.command_index = CommandIndex(bot, 2)
+    assert suggestions.suggest("stat") == ["stats"]
+    assert suggestions.suggest("infi") == []
+    assert len(suggestions.cache) == 2
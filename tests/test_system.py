@@ -0,0 +1,94 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("discord")
+
+from bot.cogs.system import System
+
+
+def make_channel(id, allowed=True):
+    permissions = SimpleNamespace(embed_links=allowed, send_messages=allowed)
+    me = SimpleNamespace(permissions_in=lambda channel: permissions)
+
+    return SimpleNamespace(id=id, name=f"channel{id}", guild=SimpleNamespace(me=me), permissions=permissions)
+
+
+@pytest.fixture
+def system(bot):
+    bot.channels = {1: make_channel(1), 2: make_channel(2, allowed=False)}
+    bot.ready = True
+    bot.lookups = []
+
+    def get_channel(id):
+        bot.lookups.append(id)
+        return bot.channels.get(id)
+
+    bot.get_channel = get_channel
+    bot.is_ready = lambda: bot.ready
+
+    return System(bot)
+
+
+def test_channels_are_resolved_once(bot, system, caplog):
+    for _ in range(2):
+        assert system.get_config_channel(1) is bot.channels[1]
+        # missing permissions
+        assert system.get_config_channel(2) is None
+        # deleted
+        assert system.get_config_channel(3) is None
+
+    assert system.get_config_channel(None) is None
+    assert bot.lookups == [1, 2, 3]
+    # warned once, not for every log message
+    assert caplog.text.count("Missing permissions in channel2") == 1
+    assert caplog.text.count("Log channel 3 not found") == 1
+
+
+def test_channels_are_not_cached_as_missing_before_ready(bot, system):
+    bot.ready = False
+
+    assert system.get_config_channel(3) is None
+
+    bot.channels[3] = make_channel(3)
+    assert system.get_config_channel(3) is bot.channels[3]
+
+
+@pytest.mark.parametrize("event, args", [
+    ("on_ready", ()),
+    ("on_guild_channel_update", (None, None)),
+    ("on_guild_channel_delete", (None,)),
+    ("on_guild_role_update", (None, None)),
+    ("on_member_update", (SimpleNamespace(id=0, roles=[1]), SimpleNamespace(id=0, roles=[1, 2])))
+])
+def test_changes_resolve_the_channels_again(bot, system, event, args):
+    system.get_config_channel(2)
+
+    # the bot was given the permissions
+    bot.channels[2].permissions.embed_links = bot.channels[2].permissions.send_messages = True
+
+    for name, listener in system.get_listeners():
+        if name == event:
+            asyncio.run(listener(*args))
+
+    assert system.get_config_channel(2) is bot.channels[2]
+
+
+def test_other_members_do_not_clear_the_channels(bot, system):
+    system.get_config_channel(1)
+
+    listener = dict(system.get_listeners())["on_member_update"]
+    asyncio.run(listener(SimpleNamespace(id=5, roles=[]), SimpleNamespace(id=5, roles=[1])))
+    # the bot's roles stayed the same
+    asyncio.run(listener(SimpleNamespace(id=0, roles=[1]), SimpleNamespace(id=0, roles=[1])))
+
+    assert system.channels == {1: bot.channels[1]}
+
+
+def test_reloading_the_config_clears_the_channels(bot, system):
+    system.get_config_channel(1)
+
+    bot.config.listeners["system"](bot.config)
+
+    assert system.channels == {}
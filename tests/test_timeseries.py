@@ -0,0 +1,85 @@
+import math, time
+
+from utils import timeseries
+from utils.timeseries import Ring, Series, TimeSeries, sparkline
+
+
+def test_ring_keeps_the_newest_values():
+    ring = Ring(3)
+    assert ring.values() == []
+
+    for value in range(5):
+        ring.append(value)
+
+    assert ring.values() == [2.0, 3.0, 4.0]
+
+
+def test_series_averages_tiers_without_missing_values():
+    series = Series("test")
+
+    for minute in range(120):
+        series.add(math.nan if minute == 0 else 1.0 if minute < 60 else 3.0)
+
+    assert len(series.tiers["1m"].values()) == 120
+    assert series.tiers["1h"].values() == [1.0, 3.0]
+    assert series.tiers["1d"].values() == []
+    assert series.pending["1d"] == [59 + 180.0, 119]
+
+
+def test_pack_unpack_roundtrip():
+    series = Series("joins", "/min")
+
+    for minute in range(90):
+        series.add(minute)
+
+    data = memoryview(b"x" + series.pack())
+    name, samples, tiers, offset = Series.unpack(data, 1)
+
+    assert (name, samples, offset) == ("joins", 90, len(data))
+
+    for tier, (count, pending, values) in tiers.items():
+        ring = series.tiers[tier]
+        assert count == ring.count
+        assert pending == series.pending[tier]
+        assert values.tobytes() == ring.data.tobytes()
+
+
+def test_save_and_load(bot, tmp_path, monkeypatch):
+    path = str(tmp_path / "timeseries.bin")
+    saved = TimeSeries(bot, path=path)
+
+    for value in range(3):
+        saved["guilds"].add(value)
+
+    saved.save()
+
+    # loaded two minutes later, the missed minutes are left empty
+    now = time.time()
+    monkeypatch.setattr(timeseries.time, "time", lambda: now + 120)
+    loaded = TimeSeries(bot, path=path)
+
+    values = loaded["guilds"].tiers["1m"].values()
+    assert values[:3] == [0.0, 1.0, 2.0]
+    assert len(values) == 5 and all(math.isnan(v) for v in values[3:])
+
+
+def test_damaged_files_are_ignored(bot, tmp_path):
+    path = tmp_path / "timeseries.bin"
+
+    path.write_bytes(b"not a time series")
+    assert TimeSeries(bot, path=str(path))["guilds"].samples == 0
+
+    path.write_bytes(timeseries.MAGIC + b"\x00")
+    assert TimeSeries(bot, path=str(path))["guilds"].samples == 0
+
+
+def test_sparkline():
+    assert sparkline([]) == ""
+    assert sparkline([math.nan]) == ""
+    assert sparkline([1, 1]) == "▁▁"
+    assert sparkline([0, math.nan, 7]) == "▁ █"
+    # averaged down to the width
+    line = sparkline(list(range(100)), width=10)
+    assert len(line) == 10
+    assert line[0] == "▁" and line[-1] == "█"
+    assert list(line) == sorted(line)
@@ -0,0 +1,78 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+discord = pytest.importorskip("discord")
+
+from utils.users import UserResolver
+
+
+def http_error(status):
+    response = SimpleNamespace(status=status, reason="error")
+    error = discord.NotFound if status == 404 else discord.HTTPException
+    return error(response, "error")
+
+
+@pytest.fixture
+def resolver(bot):
+    bot.cached_users = {1: SimpleNamespace(id=1)}
+    bot.errors = {}
+    bot.fetches = []
+
+    async def fetch_user(id):
+        bot.fetches.append(id)
+        await asyncio.sleep(0)
+
+        if id in bot.errors:
+            raise bot.errors[id]
+
+        return SimpleNamespace(id=id)
+
+    bot.get_user = bot.cached_users.get
+    bot.fetch_user = fetch_user
+
+    return UserResolver(bot)
+
+
+def test_users_are_fetched_once(bot, resolver):
+    async def main():
+        users = await resolver.resolve_many([1, 2, 2, 3])
+        assert sorted(users) == [1, 2, 3]
+        # cached now
+        assert (await resolver.resolve(2)).id == 2
+
+    asyncio.run(main())
+
+    assert bot.fetches == [2, 3]
+    assert len(resolver) == 2
+
+
+def test_missing_users_are_cached(bot, resolver):
+    bot.errors[2] = http_error(404)
+
+    async def main():
+        assert await resolver.resolve(2) is None
+        assert await resolver.resolve(2) is None
+
+    asyncio.run(main())
+
+    assert bot.fetches == [2]
+    assert resolver.cached(2) == (True, None)
+
+
+def test_failed_fetches_are_not_cached(bot, resolver, caplog):
+    bot.errors[2] = http_error(500)
+
+    async def main():
+        # the other ids still resolve
+        users = await resolver.resolve_many([2, 3])
+        assert users[2] is None and users[3].id == 3
+
+        del bot.errors[2]
+        assert (await resolver.resolve(2)).id == 2
+
+    asyncio.run(main())
+
+    assert bot.fetches == [2, 3, 2]
+    assert "Failed to fetch user 2" in caplog.text
@@ -0,0 +1,132 @@
+'''Invalidation bus.
+
+Send small cache invalidation messages between bot processes on the same host.
+'''
+
+import asyncio, os, socket
+
+
+class InvalidationBus():
+    """Cross-process invalidation bus
+
+    Every bot process binds a unix datagram socket inside a shared folder.
+    When one process writes to the database it publishes a message to every
+    other socket in that folder, and the processes that receive it refresh
+    the affected cache entries. No broker or external service is needed, the
+    folder itself is the list of peers.
+
+    A message is a single datagram on the form "{channel} {key}" where key is
+    "*" if the whole channel should be refreshed.
+
+    Args:
+    -----
+    bot: :class:`commands.Bot`
+        The bot
+    path: :class:`str`
+        The folder the sockets for all processes are placed in.
+    """
+
+    def __init__(self, bot, path:str):
+        self.bot = bot
+        self.bot.bus = self
+        self.path = path
+        self.handlers = {}
+        self.loop = asyncio.get_event_loop()
+
+        os.makedirs(self.path, exist_ok=True)
+
+        # bind this process to its own socket
+        self.address = os.path.join(self.path, f"{os.getpid()}.sock")
+        if os.path.exists(self.address):
+            # left over from a earlier process with the same pid
+            os.unlink(self.address)
+
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.socket.bind(self.address)
+        self.socket.setblocking(False)
+
+        # read messages as soon as they arrive
+        self.loop.add_reader(self.socket.fileno(), self._receive)
+
+
+    def subscribe(self, channel:str, callback):
+        """Listen for invalidations on a channel
+
+        args
+        ----
+        channel: :class:`str`
+            The channel to listen on, usually the name of a database table.
+        callback: Callable[[Optional[:class:`str`]], Awaitable]
+            Coroutine function called with the invalidated key, or None if
+            everything in the channel should be refreshed.
+        """
+
+        self.handlers[channel] = callback
+
+
+    def publish(self, channel:str, key=None):
+        """Tell all other processes that something changed
+
+        args
+        ----
+        channel: :class:`str`
+            The channel the change was made in.
+        key: Optional[Union[:class:`int`, :class:`str`]]
+            The key that changed. None if the whole channel changed.
+            Defaults to None.
+        """
+
+        message = f"{channel} {'*' if key is None else key}".encode()
+
+        for entry in os.scandir(self.path):
+            # go through all peers
+
+            if entry.path == self.address or not entry.name.endswith(".sock"):
+                # never send to this process
+                continue
+
+            try:
+                self.socket.sendto(message, entry.path)
+
+            except (ConnectionRefusedError, FileNotFoundError):
+                # the process that owned the socket is gone
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
+
+            except BlockingIOError:
+                # the peers buffer is full, it will have to catch up on its next fetch
+                pass
+
+
+    def _receive(self):
+        """Read all waiting messages and run their handlers"""
+
+        while True:
+            try:
+                message = self.socket.recv(512)
+            except BlockingIOError:
+                # no more messages
+                return
+
+            channel, _, key = message.decode().partition(" ")
+            callback = self.handlers.get(channel)
+
+            if not callback:
+                # nothing in this process cares about this channel
+                continue
+
+            self.loop.create_task(callback(None if key == "*" else key))
+
+
+    def close(self):
+        """Stop listening and remove this process socket"""
+
+        self.loop.remove_reader(self.socket.fileno())
+        self.socket.close()
+
+        try:
+            os.unlink(self.address)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,114 @@
+'''Command index.
+
+A precomputed snapshot of all the bot commands.
+'''
+
+
+class CommandIndex():
+    """Snapshot of the bot commands
+
+    Walks every cog once and sorts the commands into top-level commands and
+    subcommands, each split into the ones everyone can see and the ones only
+    bot owners can see. Commands from the Jishaku cog are never included.
+    The snapshot should be treated as read only, a new one is made by the bot
+    when the command set changes.
+
+    Args:
+    -----
+    bot: :class:`commands.Bot`
+        The bot to index the commands of.
+    version: :class:`int`
+        The version of this snapshot. Every new snapshot has a higher version
+        so other caches can use it as a key.
+    """
+
+    __slots__ = ("version", "commands", "owner_commands", "subcommands", "owner_subcommands", "names", "owner_names")
+
+    def __init__(self, bot, version:int):
+        self.version = version
+
+        commands, owner_commands = [], []
+        subcommands, owner_subcommands = [], []
+
+        for cog in bot.cogs.values():
+            # go through all cogs and the commands inside of each cog
+
+            if cog.qualified_name == "Jishaku":
+                # ignore the jishaku cog
+                continue
+
+            for cmd in cog.walk_commands():
+
+                if cmd.parent:
+                    # the command is a subcommand
+                    owner_subcommands.append(cmd)
+
+                    if not cmd.hidden:
+                        subcommands.append(cmd)
+
+                    continue
+
+                owner_commands.append(cmd)
+
+                if not cmd.hidden:
+                    commands.append(cmd)
+
+        self.commands = tuple(commands)
+        self.owner_commands = tuple(owner_commands)
+        self.subcommands = tuple(subcommands)
+        self.owner_subcommands = tuple(owner_subcommands)
+
+        # top-level command names and aliases
+        self.names = self._names(self.commands)
+        self.owner_names = self._names(self.owner_commands)
+
+
+    @staticmethod
+    def _names(commands) -> dict:
+        """Map the names and aliases of a list of commands to the commands"""
+
+        names = {}
+
+        for cmd in commands:
+            names[cmd.name] = cmd
+
+            for alias in cmd.aliases:
+                names[alias] = cmd
+
+        return names
+
+
+    def normal(self, is_owner:bool=False) -> tuple:
+        """All top-level commands a user can see
+
+        args
+        ----
+        is_owner: :class:`bool`
+            if the user who is to see these commands is a bot owner.
+        """
+
+        return self.owner_commands if is_owner else self.commands
+
+
+    def sub(self, is_owner:bool=False) -> tuple:
+        """All subcommands a user can see
+
+        args
+        ----
+        is_owner: :class:`bool`
+            if the user who is to see these commands is a bot owner.
+        """
+
+        return self.owner_subcommands if is_owner else self.subcommands
+
+
+    def name_map(self, is_owner:bool=False) -> dict:
+        """Top-level command names and aliases a user can see
+
+        args
+        ----
+        is_owner: :class:`bool`
+            if the user who is to see these commands is a bot owner.
+        """
+
+        return self.owner_names if is_owner else self.names
@@ -3,9 +3,18 @@
 Manage the config file and request attributes.
 '''
 
+import asyncio, logging, os
 import yaml
 
-from yaml import Loader
+
+# use the C loader if pyyaml was built with libyaml
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# environment variables starting with this override config values, named
+# after the attribute, for example INVITE_TRACKER_DB_HOST overrides Host
+ENV_PREFIX = "INVITE_TRACKER_"
+
+log = logging.getLogger(__name__)
 
 
 class MissingKey(Exception):
@@ -14,11 +23,67 @@ class MissingKey(Exception):
 class MissingValue(Exception):
     pass
 
+class InvalidValue(Exception):
+    pass
+
 
 class Sub():
     pass
 
 
+# every key in the config file
+# key: (attribute, allowed types, can be empty, needs restart)
+SCHEMA = {
+    # bot
+    "Token":          ("Token",             (str,),             False, True),
+    "Secret":         ("Secret",            (str,),             True,  True),
+    "Prefix":         ("Prefix",            (str,),             False, False),
+    "Color":          ("Color",             (int,),             True,  False),
+    "Description":    ("Description",       (str,),             False, False),
+
+    # logging
+    "Servers":        ("logging.Servers",   (int,),             True,  False),
+    "Commands":       ("logging.Commands",  (int,),             True,  False),
+    "Errors":         ("logging.Errors",    (int,),             True,  False),
+    "DMs":            ("logging.DMs",       (int,),             True,  False),
+    "Website":        ("logging.Website",   (int,),             True,  False),
+    "Events":         ("logging.Events",    (int,),             True,  False),
+
+    # log files
+    "LogFile":        ("log.File",          (str,),             True,  True),
+    "LogLevel":       ("log.Level",         (str,),             False, False),
+    "LogSize":        ("log.Size",          (int, float),       False, True),
+    "LogBackups":     ("log.Backups",       (int,),             True,  True),
+
+    # database
+    "Host":           ("db.Host",           (str,),             False, True),
+    "Port":           ("db.Port",           (int,),             False, True),
+    "User":           ("db.User",           (str,),             False, True),
+    "Password":       ("db.Password",       (str,),             False, True),
+    "DBName":         ("db.DBName",         (str,),             False, True),
+    "Bus":            ("db.Bus",            (str,),             True,  True),
+
+    # startup
+    "LazyLoad":       ("LazyLoad",          (bool,),            True,  True),
+
+    # members
+    "LeanMembers":    ("members.Lean",      (bool,),            True,  True),
+    "RecentMembers":  ("members.Recent",    (int,),             False, True),
+
+    # emojis
+    "confirm":        ("emojis.yes",        (str,),             True,  False),
+    "deny":           ("emojis.no",         (str,),             True,  False),
+    "loading":        ("emojis.loading",    (str,),             True,  False),
+    "voice_channels": ("emojis.voice",      (str,),             True,  False),
+    "text_channels":  ("emojis.text",       (str,),             True,  False),
+
+    # Dashbaord
+    "URL":            ("Dashboard.Url",     (str,),             False, True),
+    "PORT":           ("Dashboard.Port",    (int,),             False, True),
+    "MetricsHost":    ("Dashboard.MetricsHost", (str,),         True,  True),
+}
+
+
 
 class Config():
     """A Config manager
@@ -27,6 +92,12 @@ class Config():
     The Config file contains things as token and website info.
     This class is to help getting info and making sure the file has
     the right syntax.
+
+    The file is parsed once and checked against `SCHEMA`. Environment
+    variables starting with `ENV_PREFIX` override the values in the file.
+    The config can be reloaded while the bot is running, either by calling
+    :meth:`reload` or when the file changes if :meth:`watch` is running.
+    Listeners added with :meth:`add_listener` are called after each reload.
     """
 
 
@@ -39,78 +110,188 @@ class Config():
         """
 
         self.filename = filename
-        self.file = open(self.filename, "r")
-        self.stream = yaml.load(self.file.read(), Loader=Loader)
-
-        self.CheckConfig()
-
-        # bot
-        self.Token  = self.stream["Token"]
-        self.Secret = self.stream["Secret"]
-        self.Prefix = self.stream["Prefix"]
-        self.Color  = self.stream["Color"]
-        self.Description = self.stream["Description"]
-        
-        # logging
-        self.logging = Sub()
-        self.logging.Servers    = self.stream["Servers"]
-        self.logging.Commands   = self.stream["Commands"]
-        self.logging.Errors     = self.stream["Errors"]
-        self.logging.DMs        = self.stream["DMs"]
-        self.logging.Website    = self.stream["Website"]
-        self.logging.Events     = self.stream["Events"]
-
-        # database
-        self.db = Sub()
-        self.db.Host = self.stream["Host"]
-        self.db.Port = self.stream["Port"]
-        self.db.User = self.stream["User"]
-        self.db.Password = self.stream["Password"]
-        self.db.DBName = self.stream["DBName"]
-
-        # Dashbaord
-        self.Dashboard = Sub()
-        self.Dashboard.Url = self.stream["URL"]
-        self.Dashboard.Port = self.stream["PORT"]
-
-        # emojis
-        self.emojis = {
-            "yes": self.stream["confirm"], "no": self.stream["deny"],
-            "voice": self.stream["voice_channels"], "text": self.stream["text_channels"],
-            "loading": self.stream["loading"]
-        }
-
-    
-    def CheckConfig(self) -> bool:     
-        """Check the config file
-        
-        Make sure all values and 
+        self.listeners = {}
+        self.mtime = None
+
+        self._apply(self._load())
+
+
+    def _load(self) -> dict:
+        """Parse and check the config file
+
+        returns
+        -------
+        :class:`dict`
+            The values in the file, with the environment overrides.
         """
 
-        file = open(self.filename, "r")
-        stream = yaml.load(file.read(), Loader=Loader)
-
-        args = [
-            "Token", "Prefix", "Color", "Description", "Servers", "Commands", "Errors", "DMs",
-            "Website", "Events", "Host", "Port", "User", "Password", "confirm", "deny", "loading",
-            "voice_channels", "text_channels"
-        ] # all keys that has to be in config file
-        can_be_empty = [
-            "Color", "Servers", "Commands", "Errors", "DMs", "Website", "Events", "deny", "confirm",
-            "loading", "voice_channels", "text_channels"
-        ] # they keys that can still be 0 or None
-
-        for arg in args:
-            if not arg in stream.keys():
-                # the entire key is gone
-                raise MissingKey(f"The '{arg}' key is missing in config file({self.filename}). Make sure you are using a up-to-date file.")
+        self.mtime = os.stat(self.filename).st_mtime
+
+        with open(self.filename, "r") as file:
+            stream = yaml.load(file, Loader=Loader) or {}
+
+        for key, (attribute, types, *_) in SCHEMA.items():
+            # override values from environment variables
+            value = os.environ.get(ENV_PREFIX + attribute.replace(".", "_").upper())
 
-            if arg in can_be_empty:
-                # the argument is allowed to be None
+            if value is None:
                 continue
 
-            if not stream[arg]:
+            # strings are used as they are, other types are parsed like yaml
+            stream[key] = value if str in types else yaml.load(value, Loader=Loader)
+
+        self.validate(stream)
+        return stream
+
+
+    def _apply(self, stream:dict):
+        """Set the attributes from the parsed values
+
+        All attributes are replaced at once, so nothing ever sees a mix of
+        old and new values.
+        """
+
+        values = {"stream": stream, "emojis": {}}
+
+        for key, (attribute, *_) in SCHEMA.items():
+            section, _, name = attribute.rpartition(".")
+
+            if section == "emojis":
+                values["emojis"][name] = stream.get(key) or ""
+            elif section:
+                setattr(values.setdefault(section, Sub()), name, stream.get(key))
+            else:
+                values[name] = stream.get(key)
+
+        self.__dict__.update(values)
+
+
+    def validate(self, stream:dict) -> bool:
+        """Check that parsed config values match the schema
+
+        args
+        ----
+        stream: :class:`dict`
+            The parsed config values.
+
+        raises
+        ------
+        :Exception:`MissingKey`
+            A key that has to be in the file is missing.
+        :Exception:`MissingValue`
+            A key that can't be empty is empty.
+        :Exception:`InvalidValue`
+            A value has the wrong type.
+        """
+
+        for key, (_, types, can_be_empty, _) in SCHEMA.items():
+            if not key in stream.keys():
+                if key == "Secret":
+                    # not used yet
+                    continue
+
+                # the entire key is gone
+                raise MissingKey(f"The '{key}' key is missing in config file({self.filename}). Make sure you are using a up-to-date file.")
+
+            value = stream[key]
+
+            if value is None or value == "":
+                if can_be_empty:
+                    # the argument is allowed to be None
+                    continue
+
                 # there is no value for this argument
-                raise MissingValue(f"No value for '{arg}' has been set. Make sure all values in the config file({self.filename}) is set right and restart the bot.")
-        
+                raise MissingValue(f"No value for '{key}' has been set. Make sure all values in the config file({self.filename}) is set right and restart the bot.")
+
+            if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+                raise InvalidValue(f"The value for '{key}' in config file({self.filename}) should be {' or '.join(t.__name__ for t in types)}, not {type(value).__name__}.")
+
         return True
+
+
+    def CheckConfig(self) -> bool:
+        """Check the config file
+
+        Make sure all keys exist and all values are valid.
+        """
+
+        return bool(self._load())
+
+
+    def add_listener(self, name:str, callback):
+        """Call a function after each reload
+
+        args
+        ----
+        name: :class:`str`
+            A name for the listener. A new listener with the same name
+            replaces the old one, so reloaded extensions can add theirs again.
+        callback: Callable[[:class:`Config`], Any]
+            Called with the config after it was reloaded.
+        """
+
+        self.listeners[name] = callback
+
+
+    def remove_listener(self, name:str):
+        """Stop calling a listener after reloads"""
+
+        self.listeners.pop(name, None)
+
+
+    def reload(self) -> list:
+        """Reload the config file
+
+        If the file is invalid the current config is kept and the error is
+        raised. Values that are only used at startup, like the token or the
+        database, are updated but need a restart to take effect.
+
+        returns
+        -------
+        List[:class:`str`]
+            The keys that changed.
+        """
+
+        stream = self._load()
+        changed = [key for key in SCHEMA if stream.get(key) != self.stream.get(key)]
+
+        self._apply(stream)
+
+        for name, callback in list(self.listeners.items()):
+            try:
+                callback(self)
+            except Exception as e:
+                log.error(f"Config listener {name} failed", exc_info=e)
+
+        restart = [key for key in changed if SCHEMA[key][3]]
+
+        if restart:
+            log.warning(f"Config values that need a restart changed: {', '.join(restart)}")
+
+        return changed
+
+
+    async def watch(self, interval:float=5.0):
+        """Reload the config when the file changes
+
+        args
+        ----
+        interval: :class:`float`
+            Seconds between each check. Defaults to 5.0.
+        """
+
+        while True:
+            await asyncio.sleep(interval)
+
+            try:
+                if os.stat(self.filename).st_mtime == self.mtime:
+                    continue
+
+                changed = self.reload()
+
+            except Exception as e:
+                # keep the current config until the file is fixed
+                log.error(f"Failed to reload config file({self.filename})", exc_info=e)
+
+            else:
+                log.info(f"Reloaded config file({self.filename}), changed: {', '.join(changed) or 'nothing'}")
@@ -0,0 +1,47 @@
+'''Command context.
+
+The context used for all commands.
+'''
+
+import discord
+from discord.ext import commands
+
+
+class Context(commands.Context):
+    """Command context
+
+    Works like :class:`commands.Context` but when a command is invoked again
+    by editing the message, the first message sent edits the response from
+    the earlier invocation instead of sending a new one.
+    """
+
+    def __init__(self, **attrs):
+        super().__init__(**attrs)
+        self.responded = False
+        # if the rate limiter already took tokens for this message
+        self.rate_limited = False
+
+
+    async def send(self, content=None, **kwargs):
+        invocations = getattr(self.bot, "invocations", None)
+        invocation = invocations.get(self.message.id) if invocations else None
+        first = not self.responded
+        self.responded = True
+
+        if first and invocation and invocation.response and set(kwargs) <= {"embed"}:
+            # the command was invoked by this message before, edit the old response
+            try:
+                await invocation.response.edit(content=content, embed=kwargs.get("embed"))
+            except discord.NotFound:
+                # the old response was deleted, send a new one
+                pass
+            else:
+                return invocation.response
+
+        message = await super().send(content, **kwargs)
+
+        if first and invocations:
+            # remember the response so it can be edited
+            invocations.record(self.message).response = message
+
+        return message
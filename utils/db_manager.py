@@ -1,18 +1,22 @@
-import asyncio
+import asyncio, logging
 import aiomysql as mysql
 from discord.ext.commands import Bot
 from typing import Optional
 
+
+log = logging.getLogger(__name__)
+
 class SubCache(object):
     
     class InvalidEnumValue(Exception):
         pass
     
-    def __init__(self, bot, table):
+    def __init__(self, bot, table, key:str="id"):
         self.bot = bot
         self.db = bot.db
         self.parent = bot.cache
         self.table = table
+        self.key = key
         self.data = []
     
     async def fetch(self):
@@ -26,6 +30,49 @@ class SubCache(object):
         
         for result in results:
             self.data.append(result)
+    
+    async def invalidate(self, key=None):
+        """Refresh cached rows after another process changed them
+        
+        Called by the invalidation bus. Only the rows with the key are
+        fetched again, if no key is given the entire table is fetched.
+        
+        args
+        ----
+        key: Optional[:class:`str`]
+            The value of the key column for the rows that changed.
+            Defaults to None.
+        """
+        
+        if key is None:
+            return await self.fetch()
+        
+        cursor = await self.db.execute(f"SELECT * FROM {self.table} WHERE {self.key} = %s", (key,))
+        results = await cursor.fetchall()
+        
+        # position of the key column in each row
+        column = [c[0] for c in cursor.description].index(self.key)
+        
+        # replace the old rows with the new ones
+        self.data = [d for d in self.data if str(d[column]) != str(key)]
+        self.data.extend(results)
+    
+    def publish(self, key=None):
+        """Tell other bot processes that rows in this table changed
+        
+        Does nothing if no invalidation bus is running.
+        
+        args
+        ----
+        key: Optional[:class:`int`]
+            The value of the key column for the rows that changed.
+            Defaults to None.
+        """
+        
+        bus = getattr(self.bot, "bus", None)
+        
+        if bus:
+            bus.publish(self.table, key)
 
 class blacklist(SubCache):
     async def add(self, id:int, type:str, reason:Optional[str]="No reason specified."):
@@ -61,6 +108,277 @@ class blacklist(SubCache):
         
         index = (await cursor.fetchall())[0][0]
         self.data.append((index, id, type, reason))
+        self.publish(id)
+
+
+class prefixes(SubCache):
+    """Custom prefixes for guilds
+    
+    Every row in the prefixes table (guild_id, prefix) is kept in memory as a
+    dict, so resolving the prefix for a message never touches the database.
+    As the whole table is loaded, a guild that is not in the dict is known to
+    use the default prefix.
+    """
+    
+    def __init__(self, bot, table, key:str="guild_id"):
+        super().__init__(bot, table, key)
+        self.data = {}
+    
+    async def fetch(self):
+        """Fetch all custom prefixes"""
+        
+        cursor = await self.db.execute(f"SELECT guild_id, prefix FROM {self.table}")
+        self.data = dict(await cursor.fetchall())
+    
+    async def invalidate(self, key=None):
+        """Refresh the prefix for a guild after another process changed it
+        
+        args
+        ----
+        key: Optional[:class:`str`]
+            The id of the guild. If None all prefixes are fetched.
+            Defaults to None.
+        """
+        
+        if key is None:
+            return await self.fetch()
+        
+        cursor = await self.db.execute(f"SELECT prefix FROM {self.table} WHERE guild_id = %s", (key,))
+        result = await cursor.fetchone()
+        
+        if result:
+            self.data[int(key)] = result[0]
+        else:
+            # the guild went back to the default prefix
+            self.data.pop(int(key), None)
+    
+    def get(self, guild_id:int) -> str:
+        """Get the prefix for a guild
+        
+        args
+        ----
+        guild_id: :class:`int`
+            The id of the guild.
+        
+        returns
+        -------
+        :class:`str`
+            The custom prefix, or the default prefix if the guild has none.
+        """
+        
+        return self.data.get(guild_id, self.bot.config.Prefix)
+    
+    async def set(self, guild_id:int, prefix:str):
+        """Set the prefix for a guild
+        
+        The database is updated before the cache. Setting the prefix to
+        the default prefix removes the custom prefix.
+        
+        args
+        ----
+        guild_id: :class:`int`
+            The id of the guild.
+        prefix: :class:`str`
+            The new prefix.
+        """
+        
+        if prefix == self.bot.config.Prefix:
+            await self.db.execute(f"DELETE FROM {self.table} WHERE guild_id = %s", (guild_id,), commit=True)
+            self.data.pop(guild_id, None)
+        
+        else:
+            await self.db.execute(f"REPLACE INTO {self.table} (guild_id, prefix) VALUES (%s, %s)", (guild_id, prefix), commit=True)
+            self.data[guild_id] = prefix
+        
+        self.publish(guild_id)
+
+
+class GuildSettings(object):
+    """The settings for one guild
+    
+    args
+    ----
+    guild_id: :class:`int`
+        The id of the guild.
+    log_channel: Optional[:class:`int`]
+        The id of the channel joins are logged in. Defaults to None.
+    autorole: Optional[:class:`int`]
+        The id of the role new members get. Defaults to None.
+    min_account_age: Optional[:class:`int`]
+        Accounts younger than this many days are treated as fake,
+        0 or None turns it off. Defaults to 0.
+    """
+    
+    __slots__ = ("guild_id", "log_channel", "autorole", "min_account_age")
+    
+    def __init__(self, guild_id:int, log_channel:Optional[int]=None, autorole:Optional[int]=None, min_account_age:int=0):
+        self.guild_id = guild_id
+        self.log_channel = log_channel
+        self.autorole = autorole
+        # the column is NULL for rows made before it existed
+        self.min_account_age = min_account_age or 0
+
+
+class guild_settings(SubCache):
+    """Settings for guilds
+    
+    Rows in the guild_settings table (guild_id, log_channel, autorole,
+    min_account_age) are loaded the first time a guild is used and kept as
+    :class:`GuildSettings` records. Guilds without a row get a record with
+    the defaults, so they don't hit the database again either. When the bot
+    is ready the settings for all its guilds are loaded with one query.
+    Changes are written to the database before the cache.
+    
+    The prefix is kept in the :class:`prefixes` subcache, which always has
+    the whole table in memory so resolving a prefix never waits.
+    """
+    
+    # the setting columns, in the order of the record arguments
+    COLUMNS = ("log_channel", "autorole", "min_account_age")
+    
+    def __init__(self, bot, table, key:str="guild_id"):
+        super().__init__(bot, table, key)
+        self.data = {}
+        self.loading = {}
+        
+        # load the settings for every guild of this shard at once
+        self.bot.add_listener(self.on_ready)
+        self.bot.add_listener(self.on_guild_remove)
+    
+    async def fetch(self):
+        """Fetch the settings for all cached guilds again"""
+        
+        guilds = list(self.data)
+        self.data = {}
+        
+        await self.preload(guilds)
+    
+    async def invalidate(self, key=None):
+        """Refresh the settings for a guild after another process changed them
+        
+        Guilds that aren't cached are ignored, they are loaded when used.
+        
+        args
+        ----
+        key: Optional[:class:`str`]
+            The id of the guild. If None all cached guilds are fetched.
+            Defaults to None.
+        """
+        
+        if key is None:
+            return await self.fetch()
+        
+        if int(key) in self.data:
+            await self.preload([int(key)], force=True)
+    
+    async def preload(self, guild_ids, *, force:bool=False):
+        """Load the settings for many guilds with one query
+        
+        args
+        ----
+        guild_ids: Iterable[:class:`int`]
+            The ids of the guilds.
+        
+        kwargs
+        ------
+        force: :class:`bool`
+            Load guilds that are already cached too. Defaults to False.
+        """
+        
+        ids = [id for id in guild_ids if force or id not in self.data]
+        
+        if not ids:
+            return
+        
+        cursor = await self.db.execute(
+            f"SELECT guild_id, {', '.join(self.COLUMNS)} FROM {self.table} WHERE guild_id IN ({', '.join(['%s'] * len(ids))})",
+            tuple(ids)
+        )
+        rows = {row[0]: row[1:] for row in await cursor.fetchall()}
+        
+        for id in ids:
+            # guilds without a row use the defaults
+            self.data[id] = GuildSettings(id, *rows.get(id, ()))
+    
+    def cached(self, guild_id:int) -> Optional[GuildSettings]:
+        """Get the settings for a guild without loading them
+        
+        returns
+        -------
+        Optional[:class:`GuildSettings`]
+            The settings, or None if they haven't been loaded.
+        """
+        
+        return self.data.get(guild_id)
+    
+    async def get(self, guild_id:int) -> GuildSettings:
+        """Get the settings for a guild
+        
+        They are loaded from the database the first time. A guild that is
+        already being loaded is not loaded again.
+        
+        args
+        ----
+        guild_id: :class:`int`
+            The id of the guild.
+        
+        returns
+        -------
+        :class:`GuildSettings`
+            The settings for the guild.
+        """
+        
+        settings = self.data.get(guild_id)
+        
+        if settings is not None:
+            return settings
+        
+        if guild_id not in self.loading:
+            self.loading[guild_id] = asyncio.ensure_future(self.preload([guild_id]))
+            self.loading[guild_id].add_done_callback(lambda _: self.loading.pop(guild_id, None))
+        
+        await asyncio.shield(self.loading[guild_id])
+        return self.data[guild_id]
+    
+    async def set(self, guild_id:int, **settings):
+        """Change settings for a guild
+        
+        args
+        ----
+        guild_id: :class:`int`
+            The id of the guild.
+        **settings
+            The new values, by column name.
+        
+        raises
+        -------
+        :Exception:`InvalidEnumValue`
+            A setting doesn't exist.
+        """
+        
+        for name in settings:
+            if name not in self.COLUMNS:
+                raise self.InvalidEnumValue(f'Setting can only be one of {", ".join(self.COLUMNS)} and not "{name}"')
+        
+        record = await self.get(guild_id)
+        columns = ", ".join(settings)
+        
+        await self.db.execute(
+            f"INSERT INTO {self.table} (guild_id, {columns}) VALUES (%s, {', '.join(['%s'] * len(settings))}) "
+            f"ON DUPLICATE KEY UPDATE {', '.join(f'{c} = VALUES({c})' for c in settings)}",
+            (guild_id, *settings.values()), commit=True
+        )
+        
+        for name, value in settings.items():
+            setattr(record, name, value)
+        
+        self.publish(guild_id)
+    
+    async def on_ready(self):
+        await self.preload([guild.id for guild in self.bot.guilds])
+    
+    async def on_guild_remove(self, guild):
+        self.data.pop(guild.id, None)
 
 
 class Cache():
@@ -74,6 +392,26 @@ class Cache():
         self.bot.cache = self
         self.db     = db    # the database
         self.blacklist = blacklist(bot, "blacklist")
+        self.prefixes = prefixes(bot, "prefixes")
+        self.guild_settings = guild_settings(bot, "guild_settings")
+        self.subcaches = [self.blacklist, self.prefixes, self.guild_settings]
+        
+        bus = getattr(bot, "bus", None)
+        
+        if bus:
+            # refresh subcaches when other processes write to their tables
+            for subcache in self.subcaches:
+                bus.subscribe(subcache.table, subcache.invalidate)
+        
+        # fill all subcaches before the bot starts
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(self.load())
+    
+    async def load(self):
+        """Fetch the data for all subcaches"""
+        
+        for subcache in self.subcaches:
+            await subcache.fetch()
 
 class DataBase():
     """Database manager.
@@ -128,12 +466,12 @@ class DataBase():
                 loop = loop
             )
         except Exception as e:
-            print(e)
+            log.error("Failed to connect to database", exc_info=e)
             return False
         else:
             # connection was successfully established
             
-            print("\nSuccessfully connected to database!")
+            log.info("Successfully connected to database!")
             self.connected = True
             
             # return database object
@@ -183,4 +521,126 @@ class DataBase():
                     await con.commit()
                 
                 # return cursor
-                return cursor
\ No newline at end of file
+                return cursor
+
+class KeysetSource():
+    """Paginator page source that reads pages from a table
+    
+    Each page is read with keyset pagination, `WHERE key > last ORDER BY key
+    LIMIT n`, so reading a page costs the same no matter how far into the
+    table it is. The last key of each visited page is remembered, which makes
+    going back to a visited page a single query. Only these keys are kept,
+    the rows are passed to `render` and then dropped.
+    
+    Use a instance as the `source` of :class:`utils.paginator.Paginator`.
+    
+    args
+    ----
+    db: :class:`DataBase`
+        The database.
+    table: :class:`str`
+        The table to read from.
+    key: :class:`str`
+        A unique, indexed column to order by.
+    render: Callable[[List[:class:`tuple`], :class:`int`], Union[:class:`discord.Embed`, :class:`str`]]
+        Makes a page from the rows and the page index. Can be a coroutine function.
+    
+    kwargs
+    ------
+    columns: :class:`str`
+        The columns to select, must include the key. Defaults to "*".
+    where: Optional[:class:`str`]
+        Extra condition for the rows. Defaults to None.
+    args: :class:`tuple`
+        Arguments for the where condition. Defaults to ().
+    per_page: :class:`int`
+        Rows on each page. Defaults to 10.
+    """
+    
+    def __init__(self, db, table:str, key:str, render, *, columns:str="*", where:Optional[str]=None, args:tuple=(), per_page:int=10):
+        self.db = db
+        self.table = table
+        self.key = key
+        self.render = render
+        self.columns = columns
+        self.where = where
+        self.args = args
+        self.per_page = per_page
+        
+        # the last key before each page, None for the first page
+        self.boundaries = {0: None}
+    
+    async def _select(self, columns:str, after):
+        """Select one page of rows after a key"""
+        
+        conditions, args = [], []
+        
+        if after is not None:
+            conditions.append(f"{self.key} > %s")
+            args.append(after)
+        
+        if self.where:
+            conditions.append(f"({self.where})")
+            args.extend(self.args)
+        
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        return await self.db.execute(
+            f"SELECT {columns} FROM {self.table}{where} ORDER BY {self.key} LIMIT %s",
+            (*args, self.per_page)
+        )
+    
+    async def count(self) -> int:
+        """Get the amount of pages"""
+        
+        where = f" WHERE {self.where}" if self.where else ""
+        cursor = await self.db.execute(f"SELECT COUNT(*) FROM {self.table}{where}", self.args)
+        
+        rows = (await cursor.fetchone())[0]
+        return -(-rows // self.per_page)
+    
+    async def __call__(self, index:int):
+        """Get a page
+        
+        args
+        ----
+        index: :class:`int`
+            The index of the page.
+        
+        returns
+        -------
+        Optional[Union[:class:`discord.Embed`, :class:`str`]]
+            The rendered page, or None if there are no rows on it.
+        """
+        
+        if index not in self.boundaries:
+            # walk from the closest visited page, only reading the keys
+            page = max(i for i in self.boundaries if i < index)
+            
+            while page < index:
+                cursor = await self._select(self.key, self.boundaries[page])
+                keys = await cursor.fetchall()
+                
+                if len(keys) < self.per_page:
+                    # the table ends before the page
+                    return None
+                
+                page += 1
+                self.boundaries[page] = keys[-1][0]
+        
+        cursor = await self._select(self.columns, self.boundaries[index])
+        rows = await cursor.fetchall()
+        
+        if not rows:
+            return None
+        
+        # remember where the next page starts
+        column = [c[0] for c in cursor.description].index(self.key)
+        self.boundaries[index+1] = rows[-1][column]
+        
+        page = self.render(rows, index)
+        
+        if asyncio.iscoroutine(page):
+            page = await page
+        
+        return page
@@ -2,9 +2,16 @@
 Automaticaly check if a amoji is availible or not.
 """
 
+import re
+
+
+# the id in a custom emoji, like <:name:id> or <a:name:id>
+CUSTOM_EMOJI = re.compile(r"<a?:\w+:(\d+)>")
+
+
 class UnavailiblEmoji(Exception):
     """Emoji doesn't exist
-    
+
     This exception is called if a emoji is unavailible.
     """
     pass
@@ -17,6 +24,11 @@ class Emojis():
     ❗❗ means the bot is missing necessary permissions to use the emoji
     ❗ means the bot does not have access to the emoji
 
+    Which configured emojis the bot can see is looked up once and kept in a
+    small index, that is updated when the emojis or guilds of the bot change.
+    If the bot can use external emojis in a channel is remembered until the
+    channel, the roles or the bot's roles change.
+
     Args:
     -----
     bot: :class:`commands.Bot`
@@ -28,6 +40,51 @@ class Emojis():
         self.bot.smart_emojis = self
         self.emojis = bot.config.emojis
 
+        # the emoji object for each configured custom emoji, None if the bot can't see it
+        self.available = {}
+        # if the bot can use external emojis, by channel id
+        self.external = {}
+
+        self.index()
+
+        # use the new emojis when the config is reloaded
+        bot.config.add_listener("emojis", self.refresh)
+
+        for listener in (self.on_ready, self.on_guild_emojis_update, self.on_guild_join, self.on_guild_remove,
+                         self.on_guild_channel_update, self.on_guild_channel_delete, self.on_guild_role_update, self.on_member_update):
+            self.bot.add_listener(listener)
+
+    def refresh(self, config):
+        """Use the emojis from a reloaded config"""
+
+        self.emojis = config.emojis
+        self.index()
+
+    def index(self, ids=None):
+        """Look up the configured custom emojis
+
+        args
+        ----
+        ids: Optional[Set[:class:`int`]]
+            Only look up the emojis with these ids. Defaults to None, which
+            looks up all of them.
+        """
+
+        if ids is None:
+            self.available = {}
+
+        for emoji in self.emojis.values():
+            match = CUSTOM_EMOJI.fullmatch(emoji)
+
+            if match is None:
+                # not set or a unicode emoji
+                continue
+
+            id = int(match.group(1))
+
+            if ids is None or id in ids:
+                self.available[emoji] = self.bot.get_emoji(id)
+
     def get_emoji(self, emoji:str, location):
         """Get emoji if availible
 
@@ -35,22 +92,66 @@ class Emojis():
         directly from config as it can result in problems.
         """
 
-        if self.emojis[emoji] == "": # the emoji is not set
+        value = self.emojis[emoji]
+
+        if value == "": # the emoji is not set
             return "⚠️" # emoji isn't configured
-        
-        emojis = [e.__str__() for e in self.bot.emojis] # list of emoji names
-        if not self.emojis[emoji] in emojis: # the emoji is not availible to bot
+
+        if not value in self.available: # a unicode emoji, always availible
+            return value
+
+        custom = self.available[value]
+        if custom is None: # the emoji is not availible to bot
             return "❗" # emoji doesn't exist
-        
 
         if location.guild is None: # the emoji can be used no matter what
-            return self.emojis[emoji]
-        
+            return value
+
         # If the bot does not have 'use_external_emojis',
         # does the emoji exist in the guild emojis
-        if not location.guild.me.permissions_in(location).use_external_emojis:
-            if not self.emojis[emoji] in location.guild.emojis:
-                return "‼️" # missing perms
-        
+        if custom.guild_id != location.guild.id and not self.can_use_external(location):
+            return "‼️" # missing perms
+
         # return emoji
-        return self.emojis[emoji]
\ No newline at end of file
+        return value
+
+    def can_use_external(self, channel) -> bool:
+        """If the bot can use emojis from other guilds in a channel"""
+
+        allowed = self.external.get(channel.id)
+
+        if allowed is None:
+            allowed = self.external[channel.id] = channel.guild.me.permissions_in(channel).use_external_emojis
+
+        return allowed
+
+    async def on_ready(self):
+        self.index()
+        self.external.clear()
+
+    async def on_guild_emojis_update(self, guild, before, after):
+        # only look up the configured emojis that were changed
+        self.index({emoji.id for emoji in (*before, *after)})
+
+    async def on_guild_join(self, guild):
+        self.index({emoji.id for emoji in guild.emojis})
+
+    async def on_guild_remove(self, guild):
+        self.index({emoji.id for emoji in guild.emojis})
+
+        for channel in guild.channels:
+            self.external.pop(channel.id, None)
+
+    async def on_guild_channel_update(self, before, after):
+        self.external.pop(after.id, None)
+
+    async def on_guild_channel_delete(self, channel):
+        self.external.pop(channel.id, None)
+
+    async def on_guild_role_update(self, before, after):
+        # the permissions of every channel might have changed
+        self.external.clear()
+
+    async def on_member_update(self, before, after):
+        if after.id == self.bot.user.id and before.roles != after.roles:
+            self.external.clear()
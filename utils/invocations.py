@@ -0,0 +1,103 @@
+'''Recent invocations.
+
+Remember the messages that recently invoked a command and what the bot
+answered them with.
+'''
+
+import hashlib
+from collections import OrderedDict
+
+
+class Invocation():
+    """A message that invoked a command
+
+    Args:
+    -----
+    digest: :class:`bytes`
+        Hash of the message content when the command was invoked.
+    """
+
+    __slots__ = ("digest", "response")
+
+    def __init__(self, digest:bytes):
+        self.digest = digest
+        self.response = None
+
+
+class Invocations():
+    """Recently invoked commands
+
+    Keeps a hash of the content of the messages that recently invoked a
+    command, and the first message the bot sent in response. Used to skip
+    edits that don't change a command and to edit the old response when a
+    command is edited. When the cache is full the oldest invocation is removed.
+
+    Args:
+    -----
+    bot: :class:`commands.Bot`
+        The bot
+    size: :class:`int`
+        The max amount of invocations to remember. Defaults to 1000.
+    """
+
+    def __init__(self, bot, size:int=1000):
+        self.bot = bot
+        self.bot.invocations = self
+        self.size = size
+        self.invocations = OrderedDict()
+
+
+    def __len__(self):
+        return len(self.invocations)
+
+
+    @staticmethod
+    def digest(message) -> bytes:
+        """Hash the content of a message"""
+
+        return hashlib.blake2b(message.content.encode(), digest_size=8).digest()
+
+
+    def get(self, message_id:int):
+        """Get the invocation for a message
+
+        returns
+        -------
+        Optional[:class:`Invocation`]
+            The invocation, or None if the message hasn't invoked a command recently.
+        """
+
+        return self.invocations.get(message_id)
+
+
+    def seen(self, message) -> bool:
+        """If a message has already invoked a command with its current content"""
+
+        invocation = self.invocations.get(message.id)
+        return invocation is not None and invocation.digest == self.digest(message)
+
+
+    def record(self, message) -> Invocation:
+        """Remember that a message invoked a command
+
+        If the message has invoked a command before, the earlier response is kept.
+
+        args
+        ----
+        message: :class:`discord.Message`
+            The message that invoked a command.
+        """
+
+        invocation = self.invocations.get(message.id)
+
+        if invocation is None:
+            invocation = self.invocations[message.id] = Invocation(self.digest(message))
+
+            if len(self.invocations) > self.size:
+                # forget the oldest invocation
+                self.invocations.popitem(last=False)
+
+        else:
+            invocation.digest = self.digest(message)
+
+        return invocation
@@ -0,0 +1,178 @@
+'''Log dispatcher.
+
+Send log embeds to the log channels in batches.
+'''
+
+import asyncio, discord, logging
+from collections import deque
+from discord.http import Route
+
+
+# the max amount of embeds discord allows in one message
+MAX_EMBEDS = 10
+
+# the max amount of characters in all embeds of one message
+MAX_LENGTH = 6000
+
+log = logging.getLogger(__name__)
+
+
+class ChannelQueue():
+    """The waiting log embeds for one channel
+
+    Args:
+    -----
+    channel: :class:`discord.TextChannel`
+        The channel the embeds are sent to.
+    size: :class:`int`
+        The max amount of waiting embeds.
+    """
+
+    __slots__ = ("channel", "size", "embeds", "dropped")
+
+    def __init__(self, channel, size:int):
+        self.channel = channel
+        self.size = size
+        self.embeds = deque()
+        self.dropped = 0
+
+
+class LogDispatcher():
+    """Batched log sender
+
+    Listeners add their log embeds with :meth:`submit`, which never waits.
+    A background task sends the waiting embeds of each channel every
+    interval, up to 10 embeds and 6000 characters in one message. If more
+    embeds are added to a channel than its queue can hold they are dropped
+    and counted, and a summary of how many were dropped is sent with the
+    next batch. Channels without anything to send are forgotten, and the
+    task stops when there are none left.
+
+    Args:
+    -----
+    bot: :class:`commands.Bot`
+        The bot
+    interval: :class:`float`
+        Seconds between each batch. Defaults to 2.0.
+    size: :class:`int`
+        The max amount of waiting embeds per channel. Defaults to 100.
+    """
+
+    def __init__(self, bot, interval:float=2.0, size:int=100):
+        self.bot = bot
+        self.bot.log_dispatcher = self
+        self.interval = interval
+        self.size = size
+        self.queues = {}
+        self.task = None
+
+        # counters
+        self.submitted = 0
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+
+
+    def submit(self, channel, embed:discord.Embed):
+        """Add a log embed to be sent
+
+        args
+        ----
+        channel: :class:`discord.TextChannel`
+            The log channel.
+        embed: :class:`discord.Embed`
+            The log embed.
+        """
+
+        if self.task is None or self.task.done():
+            # start sending in the background
+            self.task = asyncio.ensure_future(self._run())
+
+        queue = self.queues.get(channel.id)
+
+        if queue is None:
+            queue = self.queues[channel.id] = ChannelQueue(channel, self.size)
+
+        self.submitted += 1
+
+        if len(queue.embeds) >= queue.size:
+            # the channel is overloaded, only count the event
+            queue.dropped += 1
+            self.dropped += 1
+            return
+
+        queue.channel = channel
+        queue.embeds.append(embed)
+
+
+    async def _run(self):
+        """Send a batch to each channel every interval"""
+
+        while self.queues:
+            await asyncio.sleep(self.interval)
+
+            for id, queue in list(self.queues.items()):
+                if queue.embeds or queue.dropped:
+                    await self._flush(queue)
+
+                else:
+                    # idle, made again by the next submit
+                    del self.queues[id]
+
+
+    async def _flush(self, queue:ChannelQueue):
+        """Send the next batch of a channel"""
+
+        embeds = []
+        length = 0
+
+        if queue.dropped:
+            # tell how many events never made it
+            embeds.append(discord.Embed(
+                title="Log events dropped",
+                description=f"`{queue.dropped}` log event(s) were dropped because too many were sent at once.",
+                color=0xFFA500
+            ))
+            queue.dropped = 0
+            length += len(embeds[0])
+
+        while queue.embeds and len(embeds) < MAX_EMBEDS:
+            size = len(queue.embeds[0])
+
+            if size > MAX_LENGTH:
+                # can never be sent
+                queue.embeds.popleft()
+                self.failed += 1
+                log.warning(f"Dropped a log embed of {size} characters for {queue.channel}")
+                continue
+
+            if length + size > MAX_LENGTH:
+                # the rest goes in the next batch
+                break
+
+            embeds.append(queue.embeds.popleft())
+            length += size
+
+        if not embeds:
+            return
+
+        # discord.py only sends one embed per message, so use the route directly
+        route = Route("POST", "/channels/{channel_id}/messages", channel_id=queue.channel.id)
+
+        try:
+            await self.bot.http.request(route, json={"embeds": [e.to_dict() for e in embeds]})
+
+        except Exception as e:
+            # the batch is lost, but the next ones can still be sent
+            self.failed += len(embeds)
+            log.warning(f"Failed to send {len(embeds)} log(s) to {queue.channel}: {e}")
+
+        else:
+            self.sent += len(embeds)
+
+
+    def close(self):
+        """Stop sending"""
+
+        if self.task:
+            self.task.cancel()
@@ -0,0 +1,184 @@
+'''Logging setup.
+
+Send log records through a queue to a background thread that writes them
+as JSON lines to rotating files.
+'''
+
+import contextvars, datetime, json, logging, os, queue, time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+
+# fields added to every record logged in the current context,
+# like the guild, shard and command being handled
+log_context = contextvars.ContextVar("log_context", default={})
+
+
+def event_context(event:str, args) -> dict:
+    """Get the log context for a event
+
+    The guild and shard are taken from the first argument that has a guild,
+    like a member, message or channel, is a guild or is a raw event payload.
+
+    args
+    ----
+    event: :class:`str`
+        The name of the event.
+    args: :class:`tuple`
+        The arguments the event is dispatched with.
+
+    returns
+    -------
+    :class:`dict`
+        The fields for `log_context`.
+    """
+
+    context = {"event": event}
+
+    for arg in args:
+        guild = getattr(arg, "guild", None)
+
+        if guild is None and hasattr(arg, "shard_id") and hasattr(arg, "member_count"):
+            # the argument is the guild
+            guild = arg
+
+        if guild is not None:
+            context["guild"] = guild.id
+            context["shard"] = guild.shard_id
+            break
+
+        if getattr(arg, "guild_id", None) is not None:
+            # a raw event payload
+            context["guild"] = arg.guild_id
+            break
+
+    return context
+
+
+class ContextFilter(logging.Filter):
+    """Add the fields in `log_context` to each record"""
+
+    def filter(self, record):
+        record.context = log_context.get()
+        return True
+
+
+class DuplicateFilter(logging.Filter):
+    """Rate limit duplicate messages
+
+    Only the first record with the same logger, level and message in each
+    interval passes. The first record after the interval gets a `suppressed`
+    field with the amount of records that were dropped.
+
+    Args:
+    -----
+    interval: :class:`float`
+        Seconds a message is suppressed after being logged. Defaults to 60.0.
+    size: :class:`int`
+        Max amount of messages to remember. Defaults to 1000.
+    """
+
+    def __init__(self, interval:float=60.0, size:int=1000):
+        super().__init__()
+        self.interval = interval
+        self.size = size
+        self.seen = {}
+
+
+    def filter(self, record):
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        entry = self.seen.get(key)
+
+        if entry and now - entry[0] < self.interval:
+            # logged recently, only count it
+            entry[1] += 1
+            return False
+
+        if entry and entry[1]:
+            record.suppressed = entry[1]
+
+        if len(self.seen) >= self.size and key not in self.seen:
+            # forget all messages rather than grow
+            self.seen.clear()
+
+        self.seen[key] = [now, 0]
+        return True
+
+
+class BackgroundHandler(QueueHandler):
+    """Queue handler that keeps the exception text and extra fields"""
+
+    def prepare(self, record):
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.datetime.utcfromtimestamp(record.created).isoformat() + "Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **getattr(record, "context", {})
+        }
+
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+
+        return json.dumps(entry, default=str)
+
+
+def setup_logging(config) -> QueueListener:
+    """Set up logging for the bot
+
+    Every record is put on a queue by the thread that logs it, a background
+    thread then writes it to the console and to the log file. Nothing that
+    logs ever waits for the console or the disk.
+
+    args
+    ----
+    config: :class:`utils.config.Config`
+        The config, uses the values in `config.log`.
+
+    returns
+    -------
+    :class:`logging.handlers.QueueListener`
+        The running listener. Stop it before exiting to write the last records.
+    """
+
+    handlers = [logging.StreamHandler()]
+    handlers[0].setFormatter(logging.Formatter("[%(levelname)s] %(name)s: %(message)s"))
+
+    if config.log.File:
+        # json lines in rotating files
+        os.makedirs(os.path.dirname(config.log.File) or ".", exist_ok=True)
+
+        file = RotatingFileHandler(config.log.File, maxBytes=config.log.Size * 1024 * 1024, backupCount=config.log.Backups, encoding="utf-8")
+        file.setFormatter(JSONFormatter())
+        handlers.append(file)
+
+    records = queue.SimpleQueue()
+    handler = BackgroundHandler(records)
+    handler.addFilter(ContextFilter())
+    handler.addFilter(DuplicateFilter())
+
+    root = logging.getLogger()
+    root.setLevel(config.log.Level)
+    root.addHandler(handler)
+
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+
+    return listener
@@ -0,0 +1,194 @@
+'''Member cache.
+
+A small bounded cache of recently seen members, used instead of keeping
+every member of every guild in memory.
+'''
+
+import functools
+from collections import OrderedDict
+
+
+class RawMemberRemove():
+    """A member left a guild, sent as the `raw_member_remove` event
+
+    Unlike `member_remove` it is sent for every member that leaves, also
+    when the member wasn't cached.
+
+    Args:
+    -----
+    guild_id: :class:`int`
+        The id of the guild the member left.
+    user: :class:`discord.User`
+        The user that left.
+    """
+
+    __slots__ = ("guild_id", "user")
+
+    def __init__(self, guild_id:int, user):
+        self.guild_id = guild_id
+        self.user = user
+
+
+class RecentMembers():
+    """Recently seen members
+
+    Keeps the members that most recently joined or left a guild, up to a set
+    size. When the cache is full the member that was seen the longest time ago
+    is removed. Members that are not in the cache are requested from discord
+    on demand instead of chunking every guild at startup.
+
+    discord.py only sends `member_remove` for members in its member cache,
+    which stays empty without chunking. The parser of the gateway event is
+    wrapped so every leave is sent as `raw_member_remove` too.
+
+    Args:
+    -----
+    bot: :class:`commands.Bot`
+        The bot
+    size: :class:`int`
+        The max amount of members to keep. Defaults to 1000.
+    """
+
+    def __init__(self, bot, size:int=1000):
+        self.bot = bot
+        self.bot.recent_members = self
+        self.size = size
+        self.members = OrderedDict()
+
+        self._watch_leaves()
+
+        self.bot.add_listener(self.on_member_join)
+        self.bot.add_listener(self.on_member_remove)
+        self.bot.add_listener(self.on_raw_member_remove)
+
+
+    def __len__(self):
+        return len(self.members)
+
+
+    def _watch_leaves(self):
+        """Send `raw_member_remove` for every GUILD_MEMBER_REMOVE event"""
+
+        state = self.bot._connection
+        parsers = state.parsers
+        # the discord.py parser, also when this runs again after a reload
+        parse = getattr(parsers["GUILD_MEMBER_REMOVE"], "__wrapped__", parsers["GUILD_MEMBER_REMOVE"])
+
+        @functools.wraps(parse)
+        def parse_guild_member_remove(data):
+            parse(data)
+
+            guild_id = int(data["guild_id"])
+
+            if state._get_guild(guild_id) is not None:
+                state.dispatch("raw_member_remove", RawMemberRemove(guild_id, state.store_user(data["user"])))
+
+        # the gateway reads the parsers from this dict for each event
+        parsers["GUILD_MEMBER_REMOVE"] = parse_guild_member_remove
+
+
+    def add(self, member):
+        """Add a member to the cache
+
+        If the member is already cached it counts as the most recently seen.
+
+        args
+        ----
+        member: :class:`discord.Member`
+            The member to add.
+        """
+
+        key = (member.guild.id, member.id)
+
+        self.members[key] = member
+        self.members.move_to_end(key)
+
+        if len(self.members) > self.size:
+            # remove the member seen the longest time ago
+            self.members.popitem(last=False)
+
+
+    def get(self, guild_id:int, member_id:int):
+        """Get a cached member
+
+        args
+        ----
+        guild_id: :class:`int`
+            The id of the guild the member is in.
+        member_id: :class:`int`
+            The id of the member.
+
+        returns
+        -------
+        Optional[:class:`discord.Member`]
+            The member, or None if it is not cached.
+        """
+
+        return self.members.get((guild_id, member_id))
+
+
+    async def fetch(self, guild, member_id:int):
+        """Get a member, requesting it from discord if necessary
+
+        Checks the guild member cache, then this cache and lastly asks the
+        gateway for only this member.
+
+        args
+        ----
+        guild: :class:`discord.Guild`
+            The guild the member is in.
+        member_id: :class:`int`
+            The id of the member.
+
+        returns
+        -------
+        Optional[:class:`discord.Member`]
+            The member, or None if it is not in the guild.
+        """
+
+        member = guild.get_member(member_id) or self.get(guild.id, member_id)
+
+        if member:
+            return member
+
+        # request the member from the gateway without caching it in the guild
+        members = await guild.query_members(user_ids=[member_id], cache=False)
+
+        if not members:
+            # not in the guild
+            return None
+
+        self.add(members[0])
+        return members[0]
+
+
+    async def chunk(self, guild):
+        """Request all members of a guild
+
+        Only to be used by features that really need the full member list of
+        a guild, as chunking is no longer done at startup.
+
+        args
+        ----
+        guild: :class:`discord.Guild`
+            The guild to chunk.
+        """
+
+        if not guild.chunked:
+            await guild.chunk()
+
+
+    async def on_member_join(self, member):
+        self.add(member)
+
+
+    async def on_member_remove(self, member):
+        self.add(member)
+
+
+    async def on_raw_member_remove(self, payload:RawMemberRemove):
+        # members discord.py didn't have cached
+        member = self.get(payload.guild_id, payload.user.id)
+
+        if member is not None:
+            self.add(member)
@@ -0,0 +1,194 @@
+'''Menu router.
+
+Send reactions to the menu they were added to.
+'''
+
+import asyncio, time
+from collections import OrderedDict
+from typing import Optional
+
+
+class Route():
+    """A menu registered in the router
+
+    Args:
+    -----
+    handler: Callable[[:class:`discord.RawReactionActionEvent`], Awaitable[:class:`bool`]]
+        Called with each reaction on the menu message. Returns if the
+        reaction was used, which resets the timeout.
+    close: Callable[[:class:`str`], Awaitable]
+        Called when the menu is removed by the router, with the reason:
+        "timeout", "evicted" or "replaced".
+    timeout: Optional[:class:`float`]
+        Seconds without a used reaction before the menu times out.
+        None means it never times out.
+    """
+
+    __slots__ = ("handler", "close", "timeout", "deadline", "slot")
+
+    def __init__(self, handler, close, timeout:Optional[float]):
+        self.handler = handler
+        self.close = close
+        self.timeout = timeout
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        # the wheel slot of the deadline
+        self.slot = None
+
+
+class MenuRouter():
+    """Central reaction router for menus
+
+    Listens for raw reaction events once and sends each of them to the menu
+    on that message with a single dict lookup, instead of every menu waiting
+    for every reaction. Timeouts for all menus are handled by one task with a
+    timing wheel, and if there are more than `limit` menus the oldest is
+    closed.
+
+    Args:
+    -----
+    bot: :class:`commands.Bot`
+        The bot
+    limit: :class:`int`
+        The max amount of open menus. Defaults to 500.
+    resolution: :class:`float`
+        Seconds per slot in the timing wheel. Defaults to 1.0.
+    """
+
+    def __init__(self, bot, limit:int=500, resolution:float=1.0):
+        self.bot = bot
+        self.bot.menu_router = self
+        self.limit = limit
+        self.resolution = resolution
+        self.routes = OrderedDict()
+        self.wheel = {}
+        self.tick = None
+        self.task = None
+
+        self.bot.add_listener(self.on_raw_reaction_add)
+        self.bot.add_listener(self.on_raw_reaction_remove)
+
+
+    def __len__(self):
+        return len(self.routes)
+
+
+    def register(self, message_id:int, handler, close, timeout:Optional[float]):
+        """Start routing the reactions on a message
+
+        args
+        ----
+        message_id: :class:`int`
+            The id of the menu message.
+        handler: Callable[[:class:`discord.RawReactionActionEvent`], Awaitable[:class:`bool`]]
+            Called with each reaction on the message. Returns if the
+            reaction was used, which resets the timeout.
+        close: Callable[[:class:`str`], Awaitable]
+            Called when the menu times out, is evicted or another menu is
+            registered on the same message, with the reason.
+        timeout: Optional[:class:`float`]
+            Seconds without a used reaction before the menu times out.
+            None means it never times out.
+        """
+
+        replaced = self.routes.pop(message_id, None)
+
+        if replaced is not None:
+            # like a help command edited into another one, reusing the response
+            self._unschedule(message_id, replaced)
+            asyncio.ensure_future(replaced.close("replaced"))
+
+        route = self.routes[message_id] = Route(handler, close, timeout)
+        self._schedule(message_id, route)
+
+        if len(self.routes) > self.limit:
+            # close the oldest menu
+            oldest, evicted = self.routes.popitem(last=False)
+            self._unschedule(oldest, evicted)
+            asyncio.ensure_future(evicted.close("evicted"))
+
+        if self.wheel and (self.task is None or self.task.done()):
+            self.task = asyncio.ensure_future(self._run())
+
+
+    def unregister(self, message_id:int):
+        """Stop routing the reactions on a message, without closing the menu"""
+
+        route = self.routes.pop(message_id, None)
+
+        if route is not None:
+            self._unschedule(message_id, route)
+
+
+    def _schedule(self, message_id:int, route:Route):
+        """Add a menu to the wheel slot of its deadline"""
+
+        if route.deadline is None:
+            # never times out
+            return
+
+        self._unschedule(message_id, route)
+        route.slot = int(route.deadline / self.resolution) + 1
+        self.wheel.setdefault(route.slot, set()).add(message_id)
+
+
+    def _unschedule(self, message_id:int, route:Route):
+        """Remove a menu from its wheel slot"""
+
+        menus = self.wheel.get(route.slot)
+
+        if menus is not None:
+            menus.discard(message_id)
+
+            if not menus:
+                del self.wheel[route.slot]
+
+        route.slot = None
+
+
+    async def _dispatch(self, payload):
+        route = self.routes.get(payload.message_id)
+
+        if route is None:
+            # not a menu
+            return
+
+        if await route.handler(payload) and payload.message_id in self.routes and route.timeout is not None:
+            # the menu was used, move its timeout forward
+            route.deadline = time.monotonic() + route.timeout
+            self._schedule(payload.message_id, route)
+
+
+    async def on_raw_reaction_add(self, payload):
+        await self._dispatch(payload)
+
+
+    async def on_raw_reaction_remove(self, payload):
+        await self._dispatch(payload)
+
+
+    async def _run(self):
+        """Close the menus that timed out, one wheel slot at a time"""
+
+        self.tick = int(time.monotonic() / self.resolution)
+
+        while self.wheel:
+            await asyncio.sleep(self.resolution)
+            now = time.monotonic()
+            current = int(now / self.resolution)
+
+            for slot in range(self.tick, current + 1):
+                for message_id in self.wheel.pop(slot, ()):
+                    route = self.routes.get(message_id)
+
+                    if route is None or route.deadline > now:
+                        # closed already or the deadline was moved
+                        continue
+
+                    route.slot = None
+                    del self.routes[message_id]
+                    asyncio.ensure_future(route.close("timeout"))
+
+            self.tick = current + 1
+
+        # nothing left to time out
+        self.wheel.clear()
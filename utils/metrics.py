@@ -0,0 +1,444 @@
+'''Metrics.
+
+Collect bot metrics and serve them in the Prometheus text format.
+'''
+
+import asyncio, bisect, logging, time
+
+
+PREFIX = "invitetracker"
+
+log = logging.getLogger(__name__)
+
+# command latency buckets in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(names, values) -> str:
+    """Format label names and values as {name="value",...}"""
+
+    if not names:
+        return ""
+
+    pairs = []
+
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter():
+    """A value that only goes up
+
+    Args:
+    -----
+    name: :class:`str`
+        The metric name, without the prefix.
+    help: :class:`str`
+        What the metric counts.
+    labels: Tuple[:class:`str`]
+        The label names. Defaults to no labels.
+    """
+
+    type = "counter"
+
+    def __init__(self, name:str, help:str, labels:tuple=()):
+        self.name = f"{PREFIX}_{name}"
+        self.help = help
+        self.labels = labels
+        self.values = {}
+
+
+    def inc(self, *labels, amount:float=1):
+        """Increase the counter for a set of label values"""
+
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+
+    def render(self):
+        for labels, value in self.values.items():
+            yield f"{self.name}{_labels(self.labels, labels)} {value}"
+
+
+class Histogram():
+    """Counts of observed values in buckets
+
+    Args:
+    -----
+    name: :class:`str`
+        The metric name, without the prefix.
+    help: :class:`str`
+        What the metric observes.
+    labels: Tuple[:class:`str`]
+        The label names. Defaults to no labels.
+    buckets: Tuple[:class:`float`]
+        The upper bounds of the buckets, sorted. Defaults to `BUCKETS`.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name:str, help:str, labels:tuple=(), buckets:tuple=BUCKETS):
+        self.name = f"{PREFIX}_{name}"
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self.values = {}
+
+
+    def observe(self, value:float, *labels):
+        """Add a observed value for a set of label values"""
+
+        entry = self.values.get(labels)
+
+        if entry is None:
+            # one count per bucket, one for +Inf and the sum
+            entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+
+    def render(self):
+        names = self.labels + ("le",)
+
+        for labels, (counts, total) in self.values.items():
+            cumulative = 0
+
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                yield f"{self.name}_bucket{_labels(names, labels + (bound,))} {cumulative}"
+
+            yield f"{self.name}_sum{_labels(self.labels, labels)} {total}"
+            yield f"{self.name}_count{_labels(self.labels, labels)} {cumulative}"
+
+
+class Gauge():
+    """A value read when the metrics are collected
+
+    Args:
+    -----
+    name: :class:`str`
+        The metric name, without the prefix.
+    help: :class:`str`
+        What the metric measures.
+    function: Callable[[], Union[:class:`float`, Dict[Tuple, :class:`float`], None]]
+        Returns the current value, a dict of label values to values, or None
+        if there is no value right now.
+    labels: Tuple[:class:`str`]
+        The label names. Defaults to no labels.
+    """
+
+    type = "gauge"
+
+    def __init__(self, name:str, help:str, function, labels:tuple=()):
+        self.name = f"{PREFIX}_{name}"
+        self.help = help
+        self.function = function
+        self.labels = labels
+
+
+    def render(self):
+        try:
+            value = self.function()
+        except Exception:
+            # the thing measured isn't available
+            return
+
+        if value is None:
+            return
+
+        if not isinstance(value, dict):
+            value = {(): value}
+
+        for labels, v in value.items():
+            yield f"{self.name}{_labels(self.labels, labels)} {v}"
+
+
+class Total(Gauge):
+    """A counter kept somewhere else, read when the metrics are collected
+
+    Takes the same arguments as :class:`Gauge`, the function must return a
+    value that only goes up.
+    """
+
+    type = "counter"
+
+
+class RateLimitFilter(logging.Filter):
+    """Count the REST rate limits discord.py logs
+
+    Added to the discord.http logger, which is set to DEBUG so the waits for
+    exhausted buckets are seen. After counting, records below the level of
+    the parent logger are dropped, so the log handlers get the same records
+    as before.
+
+    A 429 is logged with its bucket and then, only if it was global, a
+    second time as global. The scope is decided once the second record had
+    its chance, so a global 429 is counted once.
+
+    Args:
+    -----
+    metrics: :class:`Metrics`
+        The metrics to count in.
+    logger: :class:`logging.Logger`
+        The logger the filter is added to.
+    """
+
+    # the messages discord.py 1.7 logs, see discord/http.py
+    LIMITED = 'We are being rate limited. Retrying in %.2f seconds. Handled under the bucket "%s"'
+    GLOBAL = "Global rate limit has been hit. Retrying in %.2f seconds."
+    EXHAUSTED = "A rate limit bucket has been exhausted (bucket: %s, retry: %s)."
+
+    def __init__(self, metrics, logger:logging.Logger):
+        super().__init__()
+        self.metrics = metrics
+        self.logger = logger
+        # the seconds to wait for a 429 that isn't known to be global yet
+        self.pending = None
+
+
+    def filter(self, record):
+        if record.msg == self.LIMITED:
+            self._count_pending()
+            self.pending = float(record.args[0])
+
+            try:
+                asyncio.get_running_loop().call_soon(self._count_pending)
+            except RuntimeError:
+                # not logged from the event loop, count it right away
+                self._count_pending()
+
+        elif record.msg == self.GLOBAL:
+            if self.pending is not None:
+                self._count("global", self.pending)
+                self.pending = None
+
+        elif record.msg == self.EXHAUSTED:
+            # waiting before sending, there was no 429
+            self._count("exhausted", float(record.args[1]))
+
+        return record.levelno >= self.logger.parent.getEffectiveLevel()
+
+
+    def _count_pending(self):
+        if self.pending is not None:
+            self._count("bucket", self.pending)
+            self.pending = None
+
+
+    def _count(self, scope:str, retry:float):
+        self.metrics.rate_limits.inc(scope)
+        self.metrics.rate_limit_wait.inc(scope, amount=retry)
+
+
+class Metrics():
+    """Bot metrics
+
+    Counts command invocations, their latency and rate limits as they
+    happen. Everything else (latency, cache sizes, database pool) is read
+    when the metrics are requested, so only the counters cost anything
+    while the bot is running. The metrics are served on /metrics.
+
+    Args:
+    -----
+    bot: :class:`commands.Bot`
+        The bot
+    port: :class:`int`
+        The port to serve the metrics on.
+    host: :class:`str`
+        The address to serve the metrics on. Defaults to "127.0.0.1", so
+        they can only be read from the same machine.
+    """
+
+    def __init__(self, bot, port:int, host:str="127.0.0.1"):
+        self.bot = bot
+        self.bot.metrics = self
+        self.port = port
+        self.host = host
+        self.server = None
+        self.lag = 0.0
+
+        self.commands = Counter("commands_total", "Commands invoked.", ("command",))
+        self.command_errors = Counter("command_errors_total", "Commands that raised a error.", ("command", "error"))
+        self.command_latency = Histogram("command_seconds", "Time from invoke to completion.", ("command",))
+        self.rate_limits = Counter("rate_limits_total", "REST rate limits hit, and buckets exhausted before sending.", ("scope",))
+        self.rate_limit_wait = Counter("rate_limit_wait_seconds_total", "Seconds waited for REST rate limits.", ("scope",))
+        self.paginator_skipped_edits = Counter("paginator_skipped_edits_total", "Paginator edits replaced by a newer page before being sent.")
+
+        self.metrics = [
+            self.commands, self.command_errors, self.command_latency, self.rate_limits, self.rate_limit_wait,
+            self.paginator_skipped_edits,
+            Gauge("gateway_latency_seconds", "Gateway heartbeat latency.", self._latency),
+            Gauge("event_loop_lag_seconds", "How late the last event loop check ran.", lambda: self.lag),
+            Gauge("guilds", "Guilds the bot is in.", lambda: len(self.bot.guilds)),
+            Gauge("cache_size", "Items in each cache.", self._cache_sizes, ("cache",)),
+            Total("cache_hits_total", "Cache hits since startup.", lambda: self._suggestions("hits"), ("cache",)),
+            Total("cache_misses_total", "Cache misses since startup.", lambda: self._suggestions("misses"), ("cache",)),
+            Gauge("db_pool_connections", "Database pool connections.", self._pool, ("state",)),
+            Gauge("log_events", "Log events since startup by what happened to them.", self._logs, ("state",)),
+        ]
+
+        self.bot.add_listener(self.on_command)
+        self.bot.add_listener(self.on_command_completion)
+        self.bot.add_listener(self.on_command_error)
+        http = logging.getLogger("discord.http")
+
+        for f in list(http.filters):
+            # only one filter may decide which records pass
+            if type(f).__name__ == "RateLimitFilter":
+                http.removeFilter(f)
+
+        self.rate_limit_filter = RateLimitFilter(self, http)
+        http.addFilter(self.rate_limit_filter)
+        http.setLevel(logging.DEBUG)
+
+        loop = asyncio.get_event_loop()
+        loop.create_task(self.start())
+        loop.create_task(self._measure_lag())
+
+
+    def add(self, metric):
+        """Add a metric to be served
+
+        args
+        ----
+        metric: Union[:class:`Counter`, :class:`Histogram`, :class:`Gauge`]
+            The metric.
+        """
+
+        self.metrics.append(metric)
+        return metric
+
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format"""
+
+        lines = []
+
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+
+        return "\n".join(lines) + "\n"
+
+
+    # --collectors--
+
+    def _latency(self):
+        latency = self.bot.latency
+        return None if latency != latency else latency # nan before the first heartbeat
+
+    def _cache_sizes(self):
+        sizes = {}
+
+        cache = getattr(self.bot, "cache", None)
+        if cache:
+            for subcache in cache.subcaches:
+                sizes[(subcache.table,)] = len(subcache.data)
+
+        for name in ["invocations", "recent_members"]:
+            value = getattr(self.bot, name, None)
+            if value is not None:
+                sizes[(name,)] = len(value)
+
+        system = self.bot.get_cog("System")
+        if system:
+            sizes[("command_suggestions",)] = len(system.suggestions.cache)
+
+        return sizes
+
+    def _suggestions(self, attribute):
+        system = self.bot.get_cog("System")
+        return {("command_suggestions",): getattr(system.suggestions, attribute)}
+
+    def _pool(self):
+        pool = self.bot.db.db
+        return {("open",): pool.size, ("free",): pool.freesize, ("max",): pool.maxsize}
+
+    def _logs(self):
+        dispatcher = self.bot.log_dispatcher
+        return {
+            ("submitted",): dispatcher.submitted, ("sent",): dispatcher.sent,
+            ("dropped",): dispatcher.dropped, ("failed",): dispatcher.failed
+        }
+
+
+    # --listeners--
+
+    async def on_command(self, ctx):
+        ctx.started = time.perf_counter()
+        self.commands.inc(ctx.command.qualified_name)
+
+    async def on_command_completion(self, ctx):
+        started = getattr(ctx, "started", None)
+
+        if started is not None:
+            self.command_latency.observe(time.perf_counter() - started, ctx.command.qualified_name)
+
+    async def on_command_error(self, ctx, error):
+        name = ctx.command.qualified_name if ctx.command else ""
+        self.command_errors.inc(name, type(error).__name__)
+
+
+    async def _measure_lag(self, interval:float=1.0):
+        """Measure how late the event loop runs a sleeping task"""
+
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            self.lag = max(0.0, time.perf_counter() - start - interval)
+
+
+    # --server--
+
+    async def start(self):
+        """Start serving the metrics"""
+
+        try:
+            self.server = await asyncio.start_server(self._handle, host=self.host, port=self.port)
+        except OSError as e:
+            # like when the port is already used, the bot keeps running without metrics
+            log.error(f"Failed to serve metrics on {self.host}:{self.port}", exc_info=e)
+
+    async def _handle(self, reader, writer):
+        """Answer one http request"""
+
+        try:
+            request = await asyncio.wait_for(reader.readline(), 5)
+
+            while (await asyncio.wait_for(reader.readline(), 5)) not in [b"\r\n", b"\n", b""]:
+                # skip the headers
+                pass
+
+            parts = request.decode("latin-1").split()
+
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, body = "200 OK", self.render().encode()
+            else:
+                status, body = "404 Not Found", b"Not Found\n"
+
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                f"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+
+        finally:
+            writer.close()
+
+
+    def close(self):
+        """Stop serving the metrics"""
+
+        logging.getLogger("discord.http").removeFilter(self.rate_limit_filter)
+
+        if self.server:
+            self.server.close()
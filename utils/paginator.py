@@ -1,6 +1,71 @@
-import discord, asyncio
+import discord, asyncio, logging, time
+from collections import OrderedDict, deque
 from discord.ext import commands, menus
-from typing import Union, List
+from typing import Union, List, Callable, Optional
+
+
+# shown when there is no page to show
+EMPTY_PAGE = "No results."
+
+log = logging.getLogger(__name__)
+
+
+class EditPacer():
+    """Pace message edits in each channel
+
+    Discord allows about 5 message edits per 5 seconds in a channel. Edits
+    wait here until they can be made without hitting that limit, shared by
+    all paginators in the same channel. Channels without edits in the last
+    period are forgotten.
+
+    Args:
+    -----
+    limit: :class:`int`
+        Max amount of edits in each period. Defaults to 5.
+    per: :class:`float`
+        The period in seconds. Defaults to 5.0.
+    """
+
+    def __init__(self, limit:int=5, per:float=5.0):
+        self.limit = limit
+        self.per = per
+        # the recent edits of each channel, the channel edited last is last
+        self.channels = OrderedDict()
+
+
+    async def wait(self, channel_id:int):
+        """Wait until a edit can be made in a channel"""
+
+        now = time.monotonic()
+
+        while self.channels:
+            # forget channels that have no edits in the period
+            edits = next(iter(self.channels.values()))
+
+            if edits and now - edits[-1] < self.per:
+                break
+
+            self.channels.popitem(last=False)
+
+        edits = self.channels.setdefault(channel_id, deque())
+        self.channels.move_to_end(channel_id)
+
+        while True:
+            now = time.monotonic()
+
+            while edits and now - edits[0] >= self.per:
+                # forget edits that are out of the period
+                edits.popleft()
+
+            if len(edits) < self.limit:
+                edits.append(now)
+                return
+
+            await asyncio.sleep(self.per - (now - edits[0]))
+
+
+# the pacer used by all paginators
+pacer = EditPacer()
 
 
 class Paginator(menus.Menu):
@@ -23,6 +88,21 @@ class Paginator(menus.Menu):
     NUMBER: Choice a page to go to by sending a number in chat.
     INFO:   Show info on what all the buttons do.
 
+    Reactions are sent to the paginator by the bot's menu router
+    (:class:`utils.menu_router.MenuRouter`) if it has one, so no task waits
+    for reactions for each paginator.
+
+    Buttons change the page right away but the message is only edited with
+    the latest page once the channel's edit rate limit allows it. Edits that
+    were replaced by a newer one before being sent are counted in
+    `skipped_edits`.
+
+    Instead of a list of pages a page source can be passed. The source is a
+    function, or a coroutine function, that takes a page index and returns the
+    page, or None if there is no such page. Pages are then only rendered when
+    they are about to be shown, the pages next to the current one are rendered
+    in the background and only the most recently used pages are kept.
+
     Args:
     ----
     page: Optional[:class:`int`]
@@ -60,15 +140,31 @@ class Paginator(menus.Menu):
         "Page: {current_page}/{total_pages}" when using them. Note that no
         embeds with a aledy set footer will have the replaced. This only
         applyes to embeds without footers. Defaults to True.
+    source: Optional[Callable[[:class:`int`], Union[:class:`discord.Embed`, :class:`str`, None]]]
+        Renders a page from its index. Can be a coroutine function. If set,
+        the pages arg is ignored. Defaults to None.
+    total: Optional[:class:`int`]
+        The amount of pages the source has. None if it is unknown, the end is
+        then found when the source returns None. Defaults to None.
+    cache_size: Optional[:class:`int`]
+        The max amount of rendered pages from the source to keep. Defaults to 5.
     """
 
-    def __init__(self, *, user:discord.User=None, users:List[discord.User]=None, page:int=0, pages:List[Union[discord.Embed, str]]=None, timeout:float=180.0, delete_message_after:bool=False, clear_reactions_after:bool=True, check_embeds:bool=True, message:discord.Message=None, replace_footer:bool=True):
+    def __init__(self, *, user:discord.User=None, users:List[discord.User]=None, page:int=0, pages:List[Union[discord.Embed, str]]=None, timeout:float=180.0, delete_message_after:bool=False, clear_reactions_after:bool=True, check_embeds:bool=True, message:discord.Message=None, replace_footer:bool=True, source:Optional[Callable]=None, total:Optional[int]=None, cache_size:int=5):
         """Init
 
         Defining all variables for paginator.
         """
 
         self.pages = pages or []
+        self.source = source
+        self.total = total
+        self.cache_size = cache_size
+        self._rendered = OrderedDict()
+        self._rendering = {}
+        self._updater = None
+        self._update_pending = False
+        self.skipped_edits = 0
         self.page = page
         self.timeout = timeout
         self.delete_message_after = delete_message_after
@@ -116,7 +212,6 @@ class Paginator(menus.Menu):
             return
 
         self.pages.insert(index, page)
-        print(self.pages)
 
 
     def remove_page(self, index:int):
@@ -157,6 +252,8 @@ class Paginator(menus.Menu):
 
         Check if the embed has a footer, if it doesn't have,
         add one that says "Page: {current_page+1}/{total_pages}"
+        The footer is set on a copy, so the page itself keeps no footer and
+        gets the current page count every time it is shown.
 
         args
         ----
@@ -168,24 +265,193 @@ class Paginator(menus.Menu):
         if embed.footer:
             return embed
 
+        embed = embed.copy()
         current_page = page
-        total_pages = len(self.pages)
+        total_pages = self.page_count
+
+        if total_pages is None:
+            # the amount of pages isn't known yet
+            embed.set_footer(text=f"Page: {current_page+1}")
+            return embed
 
         embed.set_footer(text=f"Page: {current_page+1}/{total_pages}")
         return embed
 
 
-    def _get_message(self):
-        """generate message edit coroutine
+    @property
+    def page_count(self) -> Optional[int]:
+        """The amount of pages, None if the source hasn't reached its end yet"""
+
+        if self.source is None:
+            return len(self.pages)
+
+        return self.total
+
+
+    async def _render(self, index:int):
+        """Render a page from the source and cache it"""
+
+        try:
+            page = await discord.utils.maybe_coroutine(self.source, index)
+        except IndexError:
+            page = None
+
+        if page is None:
+            # past the end of the source
+            if self.total is None or self.total > index:
+                self.total = index
+            return None
+
+        self._rendered[index] = page
+
+        if len(self._rendered) > self.cache_size:
+            # forget the least recently shown page
+            self._rendered.popitem(last=False)
+
+        return page
+
+
+    async def get_page(self, index:int):
+        """Get a page
+
+        Pages from a source are rendered if they aren't cached.
+
+        args
+        ----
+        index: :class:`int`
+            the index of the page.
+
+        returns
+        -------
+        Optional[Union[:class:`discord.Embed`, :class:`str`]]
+            The page, or None if there is no page with that index.
+        """
+
+        if index < 0 or (self.page_count is not None and index >= self.page_count):
+            return None
+
+        if self.source is None:
+            return self.pages[index]
+
+        if index in self._rendered:
+            self._rendered.move_to_end(index)
+            return self._rendered[index]
+
+        if index not in self._rendering:
+            # render it, unless it is already being rendered
+            self._rendering[index] = asyncio.ensure_future(self._render(index))
+
+        try:
+            return await asyncio.shield(self._rendering[index])
+        finally:
+            self._rendering.pop(index, None)
+
+
+    def _prefetch(self):
+        """Render the pages next to the current page in the background"""
+
+        if self.source is None:
+            return
+
+        for index in [self.page-1, self.page+1]:
+            if index in self._rendered or index in self._rendering or index < 0:
+                continue
+
+            if self.total is not None and index >= self.total:
+                continue
+
+            self._rendering[index] = task = asyncio.ensure_future(self._render(index))
+            task.add_done_callback(lambda task, index=index: self._prefetched(index, task))
+
+
+    def _prefetched(self, index:int, task:asyncio.Task):
+        """Forget a finished prefetch and log it if it failed"""
+
+        if self._rendering.get(index) is task:
+            self._rendering.pop(index)
+
+        if not task.cancelled() and task.exception():
+            log.error(f"Failed to render page {index}", exc_info=task.exception())
+
+
+    def _cancel_tasks(self):
+        """Stop rendering pages and editing the message in the background"""
+
+        for task in self._rendering.values():
+            task.cancel()
+
+        self._rendering.clear()
 
-        Generates a coroutine to edit the paginator message. If replace_footer
+        if self._updater:
+            self._updater.cancel()
+            self._update_pending = False
+
+
+    def _request_update(self):
+        """Show the current page when the rate limit allows it
+
+        If a edit is already waiting it will show the current page,
+        so no new edit is made.
+        """
+
+        if self._updater and not self._updater.done():
+            if self._update_pending:
+                # the waiting edit is replaced by this one
+                self.skipped_edits += 1
+
+                metrics = getattr(self.bot, "metrics", None)
+                if metrics:
+                    metrics.paginator_skipped_edits.inc()
+
+            self._update_pending = True
+            return
+
+        self._update_pending = True
+        self._updater = asyncio.ensure_future(self._update())
+        self._updater.add_done_callback(self._updated)
+
+
+    def _updated(self, task:asyncio.Task):
+        """Log it if editing the message failed"""
+
+        if not task.cancelled() and task.exception():
+            log.error("Failed to update paginator", exc_info=task.exception())
+
+
+    async def _update(self):
+        """Edit the message until it shows the latest requested page"""
+
+        while self._update_pending:
+            await pacer.wait(self.message.channel.id)
+
+            # the edit shows the page selected by now
+            self._update_pending = False
+            await self._get_message()
+
+
+    async def _get_message(self):
+        """edit the paginator message
+
+        Edits the paginator message to show the current page. If replace_footer
         is active and the current page is a embed a attempt at setting a new one
         will be made.
         """
 
-        page = self.pages[self.page]
+        page = await self.get_page(self.page)
         # get current page
 
+        while page is None and self.page_count and self.page >= self.page_count:
+            # the source ended before this page, show the last page
+            # every page that is missing moves the end closer
+            self.page = self.page_count-1
+            page = await self.get_page(self.page)
+
+        self._prefetch()
+
+        if page is None:
+            # nothing to show
+            return await self.message.edit(content=EMPTY_PAGE, embed=None)
+
         if isinstance(page, discord.Embed):
             # the page is a embed
 
@@ -193,13 +459,122 @@ class Paginator(menus.Menu):
                 # replace footer is active, try to replace the embed footer
                 page = self.__fix_embed(page, self.page)
 
-            # return message edit coroutine for embed page
-            return self.message.edit(content=None, embed=page)
+            # edit message with embed page
+            return await self.message.edit(content=None, embed=page)
+
+        # edit message with text only page
+        return await self.message.edit(content=page, embed=None)
+
+
+
+
+    async def start(self, ctx, *, channel=None, wait=False):
+        """Start the paginator.
+
+        Send the first page and register the paginator in the menu router.
+        If the bot has no menu router the paginator waits for reactions itself.
+
+        args
+        ----
+        ctx: :class:`discord.Context`
+            the context for this paginator.
+        channel: Optional[:class:`discord.TextChannel`]
+            the channel to send the paginator in. Defaults to the context channel.
+        wait: Optional[:class:`bool`]
+            if this should wait until the paginator is closed. Defaults to False.
+        """
+
+        router = getattr(ctx.bot, "menu_router", None)
+
+        if router is None:
+            return await super().start(ctx, channel=channel, wait=wait)
+
+        self.bot = ctx.bot
+        self.ctx = ctx
+        self._author_id = ctx.author.id
+        channel = channel or ctx.channel
+
+        me = channel.guild.me if getattr(channel, "guild", None) else ctx.bot.user
+        self._Menu__me = discord.Object(id=me.id)
+        self._verify_permissions(ctx, channel, channel.permissions_for(me))
+        self._event.clear()
+        self._running = True
+
+        if self.message is None:
+            self.message = await self.send_initial_message(ctx, channel)
+
+        if self.should_add_reactions():
+            router.register(self.message.id, self._route, self._close, self.timeout)
+            asyncio.ensure_future(self._add_reactions())
+
+        if wait:
+            await self._event.wait()
+
+
+    async def _add_reactions(self):
+        """Add a reaction for each button"""
+
+        for emoji in self.buttons:
+            try:
+                await self.message.add_reaction(emoji)
+            except discord.HTTPException:
+                return
+
+
+    async def _route(self, payload) -> bool:
+        """Handle a reaction from the menu router"""
+
+        if not self._running or not self.reaction_check(payload):
+            return False
+
+        await self.update(payload)
+        return True
 
-        # return message edit coroutine for text only page
-        return self.message.edit(content=page, embed=None)
 
+    async def _close(self, reason:str):
+        """Clean up after the paginator stopped, timed out or was evicted"""
 
+        self._running = False
+        self._event.set()
+        self._cancel_tasks()
+
+        await self.finalize(reason == "timeout")
+
+        if reason == "replaced":
+            # another menu uses the message now, leave it alone
+            return
+
+        try:
+            if self.delete_message_after:
+                await self.message.delete()
+
+            elif self.clear_reactions_after and self._can_remove_reactions:
+                await self.message.clear_reactions()
+
+            elif self.clear_reactions_after:
+                # without manage messages only the bots own reactions can be removed
+                for emoji in self.buttons:
+                    try:
+                        await self.message.remove_reaction(emoji, self._Menu__me)
+                    except discord.HTTPException:
+                        continue
+
+        except discord.HTTPException:
+            pass
+
+
+    def stop(self):
+        """Stop the paginator"""
+
+        router = getattr(self.bot, "menu_router", None)
+
+        if router is None or self.message is None:
+            self._cancel_tasks()
+            return super().stop()
+
+        if self._running:
+            router.unregister(self.message.id)
+            asyncio.ensure_future(self._close("stop"))
 
 
     async def send_initial_message(self, ctx, channel):
@@ -215,9 +590,15 @@ class Paginator(menus.Menu):
             the channel to send the initial message in.
         """
 
-        page = self.pages[self.page]
+        page = await self.get_page(self.page)
         # get current page
 
+        self._prefetch()
+
+        if page is None:
+            # nothing to show
+            return await channel.send(EMPTY_PAGE)
+
         if isinstance(page, discord.Embed):
             # the page is a embed
             if self.replace_footer:
@@ -243,7 +624,7 @@ class Paginator(menus.Menu):
         # reset page
         self.page = 0
 
-        return await self._get_message()
+        self._request_update()
 
 
     @menus.button('\U000025c0')
@@ -260,7 +641,7 @@ class Paginator(menus.Menu):
         # lower current page by 1
         self.page -= 1
 
-        return await self._get_message()
+        self._request_update()
 
 
     @menus.button('\U000023f9')
@@ -282,15 +663,20 @@ class Paginator(menus.Menu):
 
         Increase the current page by one and update message. If the current page is the total number of pages or above don't do anything.
         """
-        if self.page >= len(self.pages)-1:
-            # if current page is above or equal to total number of pages,
-            # don't do anything.
+        if self.page_count is not None:
+            if self.page >= self.page_count-1:
+                # if current page is above or equal to total number of pages,
+                # don't do anything.
+                return
+
+        elif await self.get_page(self.page+1) is None:
+            # the source has no more pages
             return
 
         # increase current page by 1
         self.page += 1
 
-        return await self._get_message()
+        self._request_update()
 
 
     @menus.button('\U000023e9')
@@ -299,7 +685,11 @@ class Paginator(menus.Menu):
 
         Set current page to last page and update message.
         """
+        if self.page_count is None:
+            # the last page isn't known yet
+            return
+
         # set current page to total number of pages.
-        self.page = len(self.pages)-1
+        self.page = self.page_count-1
 
-        return await self._get_message()
+        self._request_update()
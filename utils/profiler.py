@@ -0,0 +1,177 @@
+'''Sampling profiler.
+
+See what the event loop is spending its time on while the bot is running.
+'''
+
+import asyncio, inspect, os, sys, threading, time
+from collections import Counter
+
+
+# stacks deeper than this lose their outermost frames
+MAX_DEPTH = 128
+
+
+class Profile():
+    """The samples of a profiler run
+
+    Every sample is the stack of the event loop thread, root first, as
+    "module:function" labels.
+
+    Args:
+    -----
+    stacks: :class:`collections.Counter`
+        The amount of samples of each stack.
+    cogs: :class:`collections.Counter`
+        The amount of samples in each cog, the innermost cog of each stack.
+    duration: :class:`float`
+        Seconds the profiler ran.
+    """
+
+    def __init__(self, stacks:Counter, cogs:Counter, duration:float):
+        self.stacks = stacks
+        self.cogs = cogs
+        self.duration = duration
+        self.samples = sum(stacks.values())
+
+
+    def functions(self):
+        """Samples per function
+
+        returns
+        -------
+        Tuple[:class:`collections.Counter`, :class:`collections.Counter`]
+            The samples where the function was running itself, and the
+            samples where the function was anywhere on the stack.
+        """
+
+        own, total = Counter(), Counter()
+
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+
+            for label in set(stack):
+                total[label] += count
+
+        return own, total
+
+
+    def folded(self) -> str:
+        """The stacks in the collapsed format used by flame graph tools
+
+        Each line is a stack, root first and separated by ";", then the
+        amount of samples.
+        """
+
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common())
+
+
+class SamplingProfiler():
+    """Sample the stack of the event loop thread
+
+    A background thread looks at the stack of the event loop thread every
+    interval, so the bot doesn't need to be started under a profiler and
+    keeps running at almost full speed while it is profiled.
+
+    Args:
+    -----
+    bot: :class:`commands.Bot`
+        The bot, its cogs are used to group samples by cog.
+    interval: :class:`float`
+        Seconds between samples. Defaults to 0.005.
+    """
+
+    def __init__(self, bot, interval:float=0.005):
+        self.bot = bot
+        self.interval = interval
+        self.running = False
+        self.labels = {}
+
+
+    def _label(self, frame) -> tuple:
+        """The "module:function" label and the file of a frame, cached by code object"""
+
+        code = frame.f_code
+        label = self.labels.get(code)
+
+        if label is None:
+            label = self.labels[code] = (f"{frame.f_globals.get('__name__', '?')}:{code.co_name}", os.path.abspath(code.co_filename))
+
+        return label
+
+
+    def _sample(self, thread:int, stop:threading.Event, stacks:Counter, cogs:Counter, files:dict):
+        """Take samples until stopped, runs in the profiler thread"""
+
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(thread)
+            stack, cog = [], None
+
+            while frame is not None and len(stack) < MAX_DEPTH:
+                label, file = self._label(frame)
+                stack.append(label)
+
+                if cog is None:
+                    # the innermost frame in a cog
+                    cog = files.get(file)
+
+                frame = frame.f_back
+
+            if stack:
+                stacks[tuple(reversed(stack))] += 1
+                cogs[cog or "(no cog)"] += 1
+
+
+    async def run(self, seconds:float) -> Profile:
+        """Profile the event loop
+
+        Must be awaited in the event loop thread.
+
+        args
+        ----
+        seconds: :class:`float`
+            How long to profile.
+
+        returns
+        -------
+        :class:`Profile`
+            The samples.
+        """
+
+        if self.running:
+            raise RuntimeError("The profiler is already running.")
+
+        # labels are cached by code object, start fresh so reloaded code
+        # isn't mixed up with the old code and the old code can be freed
+        self.labels.clear()
+
+        # the source file of each cog
+        files = {}
+
+        for name, cog in self.bot.cogs.items():
+            try:
+                files[os.path.abspath(inspect.getfile(type(cog)))] = name
+            except TypeError:
+                pass
+
+        stacks, cogs = Counter(), Counter()
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=self._sample,
+            args=(threading.get_ident(), stop, stacks, cogs, files),
+            name="profiler",
+            daemon=True
+        )
+
+        self.running = True
+        start = time.perf_counter()
+        thread.start()
+
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            stop.set()
+            thread.join()
+            self.running = False
+            self.labels.clear()
+
+        return Profile(stacks, cogs, time.perf_counter() - start)
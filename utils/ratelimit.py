@@ -0,0 +1,219 @@
+'''Command rate limiting.
+
+Token buckets for users, guilds and the whole bot.
+'''
+
+import time
+from collections import OrderedDict
+from discord.ext import commands
+from utils.metrics import Counter
+
+
+# commands that are rejected first when the bot is overloaded
+LOW_PRIORITY = {"help", "bot_info"}
+
+
+class RateLimited(commands.CheckFailure):
+    """A command was rejected by the rate limiter
+
+    Args:
+    -----
+    scope: :class:`str`
+        What rejected the command: "user", "guild", "global" or "shed".
+    """
+
+    def __init__(self, scope:str):
+        self.scope = scope
+        super().__init__(f"Rate limited ({scope}).")
+
+
+class TokenBucket():
+    """A token bucket
+
+    Args:
+    -----
+    tokens: :class:`float`
+        The tokens the bucket starts with.
+    now: :class:`float`
+        The current time.
+    """
+
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens:float, now:float):
+        self.tokens = tokens
+        self.updated = now
+
+
+    def refill(self, rate:float, capacity:float, now:float):
+        """Add the tokens gained since the last update"""
+
+        self.tokens = min(capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+
+
+class Buckets():
+    """Token buckets by id
+
+    The buckets are kept in the order they were last used. Buckets that
+    haven't been used in `idle` seconds are full again and are removed, and
+    if there are more than `size` buckets the least recently used is removed.
+
+    Args:
+    -----
+    rate: :class:`float`
+        Tokens added to each bucket per second.
+    capacity: :class:`float`
+        Max tokens in each bucket.
+    size: :class:`int`
+        Max amount of buckets. Defaults to 10000.
+    """
+
+    def __init__(self, rate:float, capacity:float, size:int=10000):
+        self.rate = rate
+        self.capacity = capacity
+        self.size = size
+        self.idle = capacity / rate
+        self.buckets = OrderedDict()
+
+
+    def __len__(self):
+        return len(self.buckets)
+
+
+    def get(self, key, now:float) -> TokenBucket:
+        """Get the bucket for a key, refilled up to now
+
+        A new bucket is made, full, if the key has none.
+        """
+
+        # remove idle buckets, the least recently used are first
+        while self.buckets:
+            oldest = next(iter(self.buckets.values()))
+
+            if now - oldest.updated < self.idle:
+                break
+
+            self.buckets.popitem(last=False)
+
+        bucket = self.buckets.get(key)
+
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(self.capacity, now)
+
+            if len(self.buckets) > self.size:
+                self.buckets.popitem(last=False)
+
+        else:
+            bucket.refill(self.rate, self.capacity, now)
+            self.buckets.move_to_end(key)
+
+        return bucket
+
+
+    def take(self, key, now:float) -> bool:
+        """Take a token from a bucket
+
+        returns
+        -------
+        :class:`bool`
+            If there was a token to take.
+        """
+
+        bucket = self.get(key, now)
+
+        if bucket.tokens < 1:
+            return False
+
+        bucket.tokens -= 1
+        return True
+
+
+class RateLimiter():
+    """Rate limit command invocations
+
+    Every command takes a token from the users bucket, the guilds bucket and
+    the global bucket. If one of them is empty the command is rejected and
+    no tokens are taken from the others. Unknown commands only take a token
+    from the users bucket. When the global bucket is less than `shed` full,
+    low priority commands are rejected so the rest keep working. Rejections
+    are counted in the bot metrics as `rate_limited_total`.
+
+    Args:
+    -----
+    bot: :class:`commands.Bot`
+        The bot
+    user: Tuple[:class:`float`, :class:`float`]
+        Tokens per second and capacity for each user. Defaults to (0.5, 5).
+    guild: Tuple[:class:`float`, :class:`float`]
+        Tokens per second and capacity for each guild. Defaults to (2, 20).
+    total: Tuple[:class:`float`, :class:`float`]
+        Tokens per second and capacity for the whole bot. Defaults to (25, 100).
+    shed: :class:`float`
+        How full the global bucket must be for low priority commands to run. Defaults to 0.5.
+    """
+
+    def __init__(self, bot, user:tuple=(0.5, 5), guild:tuple=(2, 20), total:tuple=(25, 100), shed:float=0.5):
+        self.bot = bot
+        self.bot.rate_limiter = self
+        self.users = Buckets(*user)
+        self.guilds = Buckets(*guild)
+        self.total = Buckets(*total, size=1)
+        self.shed = shed
+
+        self.rejections = Counter("rate_limited_total", "Commands rejected by the rate limiter.", ("scope",))
+
+        metrics = getattr(bot, "metrics", None)
+        if metrics:
+            metrics.add(self.rejections)
+
+
+    def check(self, ctx):
+        """Take tokens for a invocation
+
+        args
+        ----
+        ctx: :class:`commands.Context`
+            The context of the invocation, its command is None for
+            unknown commands.
+
+        raises
+        ------
+        :class:`RateLimited`
+            The invocation was rejected.
+        """
+
+        now = time.monotonic()
+
+        if ctx.command and ctx.command.qualified_name in LOW_PRIORITY and self._overloaded(now):
+            self.rejections.inc("shed")
+            raise RateLimited("shed")
+
+        buckets = [("user", self.users.get(ctx.author.id, now))]
+
+        if ctx.command:
+            if ctx.guild:
+                buckets.append(("guild", self.guilds.get(ctx.guild.id, now)))
+
+            buckets.append(("global", self.total.get(None, now)))
+
+        for scope, bucket in buckets:
+            # check every bucket before taking from any of them
+            if bucket.tokens < 1:
+                self.rejections.inc(scope)
+                raise RateLimited(scope)
+
+        for _, bucket in buckets:
+            bucket.tokens -= 1
+
+
+    def _overloaded(self, now:float) -> bool:
+        """If the global bucket is below the shed level"""
+
+        bucket = self.total.buckets.get(None)
+
+        if bucket is None:
+            return False
+
+        bucket.refill(self.total.rate, self.total.capacity, now)
+        return bucket.tokens < self.total.capacity * self.shed
@@ -0,0 +1,350 @@
+'''Hot reloader.
+
+Reload changed modules and everything that imports them.
+'''
+
+import ast, importlib, logging, os, sys, time
+from discord.ext import commands
+
+
+# the folder the bot and utils packages are in
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module globals that are kept when the module is reloaded,
+# other modules and live objects hold on to them
+KEEP = {
+    "utils.logger": ("log_context",),
+    "utils.paginator": ("pacer",)
+}
+
+log = logging.getLogger(__name__)
+
+
+class ReloadStep():
+    """A timed reload step
+
+    Args:
+    -----
+    name: :class:`str`
+        The module or extension that was reloaded.
+    kind: :class:`str`
+        "module" or "extension".
+    """
+
+    __slots__ = ("name", "kind", "duration", "error")
+
+    def __init__(self, name:str, kind:str):
+        self.name = name
+        self.kind = kind
+        self.duration = 0.0
+        self.error = None
+
+
+class Reloader():
+    """Reload the bots own modules while it is running
+
+    The imports of every module in the bot and utils packages are read from
+    their source to build a dependency graph. When reloading, the modules
+    that changed since they were loaded and the modules that import them,
+    directly or through other modules, are reloaded with the dependencies
+    first. Extensions are reloaded through the bot so their cogs and
+    commands are replaced.
+
+    Objects that are already running, like the database pool and the caches,
+    are kept. Their class is replaced with the reloaded class, and listeners
+    bound to them are bound again so the new code is used. Tasks that are
+    already running keep running the old code.
+
+    Reloading is synchronous and runs on the event loop, so the bot doesn't
+    handle events or send heartbeats until it is done. Reload a few modules
+    at a time on a busy bot.
+
+    Reloaded classes are new classes. This matters most for exceptions, an
+    `except` with the old class doesn't catch the new one. Modules that
+    import a reloaded module are reloaded too, but anything holding on to
+    the old classes in another way, like a module that got them through
+    `getattr` or a running task, keeps the old ones until it is reloaded.
+
+    Args:
+    -----
+    bot: :class:`commands.Bot`
+        The bot
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.bot.reloader = self
+        self.mtimes = {}
+        self.imports = {}
+        self.scan()
+
+
+    def _modules(self) -> dict:
+        """The loaded modules in this project by name"""
+
+        modules = {}
+
+        for name, module in list(sys.modules.items()):
+            path = getattr(module, "__file__", None)
+
+            if name in ("__main__", __name__) or not path:
+                continue
+
+            if os.path.abspath(path).startswith(ROOT + os.sep) and name.split(".")[0] in ("bot", "utils"):
+                modules[name] = module
+
+        return modules
+
+
+    def scan(self) -> dict:
+        """Read the imports of every loaded module
+
+        Modules that are seen for the first time get their current
+        modification time, so only later changes count.
+
+        returns
+        -------
+        Dict[:class:`str`, :class:`module`]
+            The loaded modules in this project by name.
+        """
+
+        modules = self._modules()
+
+        for name, module in modules.items():
+            if name not in self.mtimes:
+                self.mtimes[name] = os.stat(module.__file__).st_mtime
+
+            with open(module.__file__) as file:
+                tree = ast.parse(file.read())
+
+            imports = set()
+
+            for node in tree.body:
+                # only imports at the top of the module
+                if isinstance(node, ast.Import):
+                    imports.update(alias.name for alias in node.names)
+
+                elif isinstance(node, ast.ImportFrom) and node.module:
+                    imports.add(node.module)
+                    imports.update(f"{node.module}.{alias.name}" for alias in node.names)
+
+            self.imports[name] = {i for i in imports if i in modules and i != name}
+
+        return modules
+
+
+    def changed(self, modules:dict) -> set:
+        """The modules that changed since they were loaded"""
+
+        return {name for name, module in modules.items() if os.stat(module.__file__).st_mtime != self.mtimes.get(name)}
+
+
+    def dependents(self, names:set) -> set:
+        """The modules and everything that imports them"""
+
+        found = set(names)
+        stack = list(names)
+
+        while stack:
+            name = stack.pop()
+
+            for module, imports in self.imports.items():
+                if name in imports and module not in found:
+                    found.add(module)
+                    stack.append(module)
+
+        return found
+
+
+    def order(self, names:set) -> list:
+        """Sort modules so every module comes after the modules it imports"""
+
+        ordered, visiting = [], set()
+
+        def visit(name):
+            if name in ordered or name in visiting:
+                # done, or a import cycle
+                return
+
+            visiting.add(name)
+
+            for dependency in sorted(self.imports.get(name, ())):
+                if dependency in names:
+                    visit(dependency)
+
+            visiting.discard(name)
+            ordered.append(name)
+
+        for name in sorted(names):
+            visit(name)
+
+        return ordered
+
+
+    def _live_objects(self, modules:dict) -> list:
+        """The bot and the objects on it that are instances of this project's classes"""
+
+        objects, seen = [], set()
+
+        def add(obj):
+            if id(obj) not in seen and type(obj).__module__ in modules:
+                seen.add(id(obj))
+                objects.append(obj)
+
+        add(self.bot)
+
+        for value in list(vars(self.bot).values()):
+            add(value)
+
+        # one level down, like the subcaches of the cache
+        for obj in objects[1:]:
+            for value in list(getattr(obj, "__dict__", {}).values()):
+                if isinstance(value, dict):
+                    value = value.values()
+
+                if not isinstance(value, (list, tuple, set, type({}.values()))):
+                    value = [value]
+
+                for item in list(value):
+                    add(item)
+
+        return objects
+
+
+    def _swap(self, objects:list, module):
+        """Give live objects the reloaded version of their class"""
+
+        swapped = []
+
+        for obj in objects:
+            cls = type(obj)
+
+            if cls.__module__ != module.__name__:
+                continue
+
+            new = module
+
+            try:
+                for part in cls.__qualname__.split("."):
+                    # nested classes too
+                    new = getattr(new, part)
+            except AttributeError:
+                # the class was removed
+                continue
+
+            if not isinstance(new, type) or new is cls:
+                continue
+
+            try:
+                obj.__class__ = new
+            except TypeError as e:
+                # like when __slots__ changed, the object keeps the old class
+                log.warning(f"Kept the old {cls.__qualname__} for a live object: {e}")
+            else:
+                swapped.append(obj)
+
+        return swapped
+
+
+    def _rebind(self, swapped:list):
+        """Bind listeners of swapped objects to the new methods"""
+
+        ids = {id(obj) for obj in swapped}
+
+        def rebind(function):
+            owner = getattr(function, "__self__", None)
+
+            if id(owner) in ids:
+                return getattr(owner, function.__func__.__name__, function)
+
+            return function
+
+        for event, listeners in self.bot.extra_events.items():
+            listeners[:] = [rebind(f) for f in listeners]
+
+        config = getattr(self.bot, "config", None)
+
+        if config is not None:
+            for name, callback in list(config.listeners.items()):
+                config.listeners[name] = rebind(callback)
+
+
+    def _reload_module(self, name:str, modules:dict):
+        """Reload a module that isn't a extension and keep its live objects"""
+
+        module = modules[name]
+        kept = {key: module.__dict__[key] for key in KEEP.get(name, ()) if key in module.__dict__}
+        objects = self._live_objects(modules)
+
+        importlib.reload(module)
+        module.__dict__.update(kept)
+
+        swapped = self._swap(objects + list(kept.values()), module)
+        self._rebind(swapped)
+
+
+    def _reload_extension(self, name:str):
+        try:
+            self.bot.reload_extension(name)
+        except commands.ExtensionNotLoaded:
+            self.bot.load_extension(name)
+
+
+    def reload(self, names:list=None) -> list:
+        """Reload extensions and the modules that changed
+
+        args
+        ----
+        names: Optional[List[:class:`str`]]
+            The extensions to reload. Names of other modules in this project
+            are reloaded even if they didn't change. Defaults to None, which
+            reloads all loaded extensions.
+
+        returns
+        -------
+        List[:class:`ReloadStep`]
+            Every reloaded module and extension in the order they were reloaded.
+        """
+
+        modules = self.scan()
+        extensions = set(self.bot.extensions)
+
+        if names is None:
+            names = list(self.bot.extensions)
+
+        forced = {name for name in names if name in modules and name not in extensions}
+        stale = self.order(self.dependents(self.changed(modules) | forced))
+
+        # the requested extensions first, then the extensions depending on changed modules
+        steps = [ReloadStep(name, "module") for name in stale if name not in extensions]
+        steps += [ReloadStep(name, "extension") for name in dict.fromkeys([*(n for n in names if n not in forced), *(n for n in stale if n in extensions)])]
+
+        failed = set()
+
+        for step in steps:
+            broken = self.imports.get(step.name, set()) & failed
+
+            if broken:
+                step.error = f"Skipped, {', '.join(sorted(broken))} failed to reload"
+                failed.add(step.name)
+                continue
+
+            start = time.perf_counter()
+
+            try:
+                if step.kind == "module":
+                    self._reload_module(step.name, modules)
+                else:
+                    self._reload_extension(step.name)
+
+            except Exception as e:
+                step.error = str(e) or type(e).__name__
+                failed.add(step.name)
+
+            else:
+                if step.name in modules:
+                    self.mtimes[step.name] = os.stat(modules[step.name].__file__).st_mtime
+
+            step.duration = time.perf_counter() - start
+
+        return steps
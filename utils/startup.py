@@ -0,0 +1,82 @@
+'''Startup timeline.
+
+Time each step of starting the bot.
+'''
+
+import time
+from contextlib import contextmanager
+
+
+class Step():
+    """A timed startup step
+
+    Args:
+    -----
+    name: :class:`str`
+        What was done in this step.
+    offset: :class:`float`
+        Seconds from the start of the timeline to the start of this step.
+    """
+
+    __slots__ = ("name", "offset", "duration")
+
+    def __init__(self, name:str, offset:float):
+        self.name = name
+        self.offset = offset
+        self.duration = 0.0
+
+
+class StartupTimeline():
+    """Timeline of the bot startup
+
+    Records how long every step of the startup took and when it started,
+    counted from when the timeline was created.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.steps = []
+
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the timeline was created"""
+
+        return time.perf_counter() - self.start
+
+
+    @contextmanager
+    def step(self, name:str):
+        """Time a step
+
+        Use with a with statement. The step is added to the timeline even if
+        it raises a exception.
+
+        args
+        ----
+        name: :class:`str`
+            What is done in this step.
+
+        yields
+        ------
+        :class:`Step`
+            The step, its duration is set when the with block exits.
+        """
+
+        step = Step(name, self.elapsed)
+
+        try:
+            yield step
+        finally:
+            step.duration = self.elapsed - step.offset
+            self.steps.append(step)
+
+
+    def __str__(self):
+        lines = [f"{'start':>9} {'took':>9}  step"]
+
+        for step in self.steps:
+            lines.append(f"{step.offset:8.3f}s {step.duration:8.3f}s  {step.name}")
+
+        lines.append(f"{self.elapsed:8.3f}s {'':9}  total")
+        return "\n".join(lines)
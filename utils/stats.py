@@ -0,0 +1,94 @@
+'''Bot statistics.
+
+Count guilds, members and channels without going through the cache.
+'''
+
+import discord
+from collections import Counter
+
+
+class Stats():
+    """Bot statistics counters
+
+    Guilds and channels are counted once when the bot is ready, then kept up
+    to date from gateway events, so reading a count never iterates the cache.
+    Members are added up from the member count of each guild, which
+    discord.py keeps right from every join and leave even when the members
+    aren't cached. A user in two guilds counts twice.
+
+    Args:
+    -----
+    bot: :class:`commands.Bot`
+        The bot
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.bot.stats = self
+        self.guilds = 0
+        self.channels = Counter()
+
+        for listener in (self.on_ready, self.on_guild_join, self.on_guild_remove, self.on_guild_channel_create, self.on_guild_channel_delete, self.on_guild_channel_update):
+            self.bot.add_listener(listener)
+
+
+    @property
+    def members(self) -> int:
+        return sum(guild.member_count or 0 for guild in self.bot.guilds)
+
+
+    @property
+    def text_channels(self) -> int:
+        return self.channels[discord.ChannelType.text]
+
+
+    @property
+    def voice_channels(self) -> int:
+        return self.channels[discord.ChannelType.voice]
+
+
+    def count(self):
+        """Count everything in the cache"""
+
+        self.guilds = len(self.bot.guilds)
+        self.channels = Counter()
+
+        for guild in self.bot.guilds:
+            self._add_guild(guild, 1)
+
+
+    def _add_guild(self, guild, sign:int):
+        """Add or remove the channel counts of a guild"""
+
+        for channel in guild.channels:
+            self.channels[channel.type] += sign
+
+
+    async def on_ready(self):
+        # count everything again after a reconnect
+        self.count()
+
+
+    async def on_guild_join(self, guild):
+        self.guilds += 1
+        self._add_guild(guild, 1)
+
+
+    async def on_guild_remove(self, guild):
+        self.guilds -= 1
+        self._add_guild(guild, -1)
+
+
+    async def on_guild_channel_create(self, channel):
+        self.channels[channel.type] += 1
+
+
+    async def on_guild_channel_delete(self, channel):
+        self.channels[channel.type] -= 1
+
+
+    async def on_guild_channel_update(self, before, after):
+        if before.type != after.type:
+            # like a text channel that became a news channel
+            self.channels[before.type] -= 1
+            self.channels[after.type] += 1
@@ -0,0 +1,216 @@
+'''Command suggestions.
+
+Find the commands with names close to a misspelled command.
+'''
+
+from collections import OrderedDict
+
+
+def distance(a:str, b:str) -> int:
+    """Levenshtein distance between two strings
+
+    The number of single character insertions, deletions or substitutions
+    needed to turn one string into the other.
+    """
+
+    if len(a) < len(b):
+        a, b = b, a
+
+    previous = list(range(len(b) + 1))
+
+    for i, ca in enumerate(a, 1):
+        current = [i]
+
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,            # deletion
+                current[j - 1] + 1,         # insertion
+                previous[j - 1] + (ca != cb) # substitution
+            ))
+
+        previous = current
+
+    return previous[-1]
+
+
+class BKTree():
+    """A BK-tree of words
+
+    Finds all words within a distance of a word without comparing it to every
+    word in the tree. Each node keeps its children by their distance to it, so
+    only the children that can be within range are searched.
+
+    Args:
+    -----
+    words: Iterable[:class:`str`]
+        The words to add to the tree.
+    """
+
+    __slots__ = ("root",)
+
+    def __init__(self, words=()):
+        self.root = None
+
+        for word in words:
+            self.add(word)
+
+
+    def add(self, word:str):
+        """Add a word to the tree"""
+
+        if self.root is None:
+            # a node is a tuple of the word and its children
+            self.root = (word, {})
+            return
+
+        node = self.root
+
+        while True:
+            d = distance(word, node[0])
+
+            if d == 0:
+                # already in the tree
+                return
+
+            child = node[1].get(d)
+
+            if child is None:
+                node[1][d] = (word, {})
+                return
+
+            node = child
+
+
+    def search(self, word:str, max_distance:int) -> list:
+        """Find all words within a distance of a word
+
+        args
+        ----
+        word: :class:`str`
+            The word to search for.
+        max_distance: :class:`int`
+            The max distance for a word to be included.
+
+        returns
+        -------
+        List[Tuple[:class:`int`, :class:`str`]]
+            The distance and the word for each match.
+        """
+
+        if self.root is None:
+            return []
+
+        matches = []
+        nodes = [self.root]
+
+        while nodes:
+            node = nodes.pop()
+            d = distance(word, node[0])
+
+            if d <= max_distance:
+                matches.append((d, node[0]))
+
+            for child_distance, child in node[1].items():
+                # only search the children that can be within range
+                if d - max_distance <= child_distance <= d + max_distance:
+                    nodes.append(child)
+
+        return matches
+
+
+class Suggestions():
+    """Suggest commands for misspelled command names
+
+    Keeps one BK-tree over the command names and aliases everyone can see
+    and one over the ones owners can see. The trees are rebuilt when the
+    command index of the bot gets a new version. The suggestions for each
+    attempted name are cached, up to a set amount of names.
+
+    Args:
+    -----
+    bot: :class:`commands.Bot`
+        The bot
+    size: :class:`int`
+        The max amount of attempted names to cache suggestions for. Defaults to 512.
+    limit: :class:`int`
+        The max amount of suggestions for a name. Defaults to 5.
+    """
+
+    def __init__(self, bot, size:int=512, limit:int=5):
+        self.bot = bot
+        self.size = size
+        self.limit = limit
+        self.version = None
+        self.trees = {}
+        self.names = {}
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+
+    def _rebuild(self):
+        """Build the trees again from the current command index"""
+
+        index = self.bot.command_index
+
+        for is_owner in [False, True]:
+            # map each lower case name and alias to the qualified command name
+            self.names[is_owner] = {n.lower(): c.qualified_name for n, c in index.name_map(is_owner).items()}
+            self.trees[is_owner] = BKTree(self.names[is_owner])
+
+        self.cache.clear()
+        self.version = index.version
+
+
+    def suggest(self, name:str, is_owner:bool=False) -> list:
+        """Get the commands with names close to a name
+
+        args
+        ----
+        name: :class:`str`
+            The attempted command name.
+        is_owner: :class:`bool`
+            if the user who is to see these commands is a bot owner.
+
+        returns
+        -------
+        List[:class:`str`]
+            The qualified names of the closest commands, closest first.
+        """
+
+        if self.version != self.bot.command_index.version:
+            # the commands have changed since the trees were built
+            self._rebuild()
+
+        name = name.lower()
+        key = (is_owner, name)
+
+        if key in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        self.misses += 1
+
+        # allow about one wrong character for every two characters, at most three
+        matches = self.trees[is_owner].search(name, min(3, max(1, (len(name) + 1) // 2)))
+        names = self.names[is_owner]
+
+        suggestions = []
+
+        for _, match in sorted(matches):
+            # aliases of the same command only count once
+            qualified_name = names[match]
+
+            if qualified_name not in suggestions:
+                suggestions.append(qualified_name)
+
+        suggestions = suggestions[:self.limit]
+
+        self.cache[key] = suggestions
+
+        if len(self.cache) > self.size:
+            # forget the name that was attempted the longest time ago
+            self.cache.popitem(last=False)
+
+        return suggestions
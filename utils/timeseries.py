@@ -0,0 +1,349 @@
+'''Time series.
+
+Record bot metrics over time in fixed size ring buffers.
+'''
+
+import asyncio, logging, math, os, struct, time
+from array import array
+
+
+# the tiers of each series: name, samples per value, values kept
+TIERS = (
+    ("1m", 1, 1440),  # one day of minutes
+    ("1h", 60, 168),  # one week of hours
+    ("1d", 1440, 365) # one year of days
+)
+
+# characters for the sparkline levels, lowest first
+SPARKS = "▁▂▃▄▅▆▇█"
+
+# start of the file, to know it's a time series file
+MAGIC = b"ITTS\x01"
+
+log = logging.getLogger(__name__)
+
+
+def sparkline(values, width:int=48) -> str:
+    """Draw values as a line of bar characters
+
+    Values are averaged in buckets so the line is at most `width`
+    characters long. Missing values (nan) are drawn as spaces.
+
+    args
+    ----
+    values: List[:class:`float`]
+        The values, oldest first.
+    width: :class:`int`
+        The max length of the line. Defaults to 48.
+    """
+
+    step = max(1, math.ceil(len(values) / width))
+    buckets = []
+
+    for i in range(0, len(values), step):
+        known = [v for v in values[i:i+step] if not math.isnan(v)]
+        buckets.append(sum(known) / len(known) if known else math.nan)
+
+    known = [v for v in buckets if not math.isnan(v)]
+
+    if not known:
+        return ""
+
+    low, high = min(known), max(known)
+    scale = (len(SPARKS) - 1) / (high - low) if high > low else 0
+
+    return "".join(" " if math.isnan(v) else SPARKS[round((v - low) * scale)] for v in buckets)
+
+
+class Ring():
+    """A fixed size buffer of floats that overwrites the oldest value
+
+    Args:
+    -----
+    size: :class:`int`
+        The amount of values kept.
+    """
+
+    __slots__ = ("size", "data", "count")
+
+    def __init__(self, size:int):
+        self.size = size
+        self.data = array("d", [math.nan]) * size
+        # values added since the start, the next one goes at count % size
+        self.count = 0
+
+
+    def append(self, value:float):
+        self.data[self.count % self.size] = value
+        self.count += 1
+
+
+    def values(self) -> list:
+        """The kept values, oldest first"""
+
+        if self.count < self.size:
+            return self.data[:self.count].tolist()
+
+        start = self.count % self.size
+        return (self.data[start:] + self.data[:start]).tolist()
+
+
+class Series():
+    """A metric with a ring buffer for each tier
+
+    Every value is added to the first tier, the next tiers get the average of
+    their amount of samples. Missing values (nan) are left out of averages.
+
+    Args:
+    -----
+    name: :class:`str`
+        The name of the metric.
+    unit: :class:`str`
+        The unit of the values, used when showing them. Defaults to "".
+    """
+
+    def __init__(self, name:str, unit:str=""):
+        self.name = name
+        self.unit = unit
+        self.tiers = {tier: Ring(size) for tier, _, size in TIERS}
+        self.samples = 0
+        # sum and amount of known values for the next value of each tier
+        self.pending = {tier: [0.0, 0] for tier, _, _ in TIERS}
+
+
+    def add(self, value:float):
+        """Add a sample"""
+
+        self.samples += 1
+
+        for tier, every, _ in TIERS:
+            pending = self.pending[tier]
+
+            if not math.isnan(value):
+                pending[0] += value
+                pending[1] += 1
+
+            if self.samples % every == 0:
+                self.tiers[tier].append(pending[0] / pending[1] if pending[1] else math.nan)
+                self.pending[tier] = [0.0, 0]
+
+
+    def pack(self) -> bytes:
+        """The series as bytes"""
+
+        name = self.name.encode()
+        data = [struct.pack("<H", len(name)), name, struct.pack("<Q", self.samples)]
+
+        for tier, _, size in TIERS:
+            ring = self.tiers[tier]
+            data.append(struct.pack("<IQdI", size, ring.count, *self.pending[tier]))
+            data.append(ring.data.tobytes())
+
+        return b"".join(data)
+
+
+    @staticmethod
+    def unpack(data:memoryview, offset:int):
+        """Read a packed series
+
+        returns
+        -------
+        Tuple[:class:`str`, :class:`int`, :class:`dict`, :class:`int`]
+            The name, the samples, the tiers by name as
+            (count, pending, values) and the offset after the series.
+        """
+
+        length, = struct.unpack_from("<H", data, offset)
+        offset += 2
+        name = bytes(data[offset:offset+length]).decode()
+        offset += length
+        samples, = struct.unpack_from("<Q", data, offset)
+        offset += 8
+        tiers = {}
+
+        for tier, _, _ in TIERS:
+            size, count, total, known = struct.unpack_from("<IQdI", data, offset)
+            offset += struct.calcsize("<IQdI")
+            values = array("d")
+            values.frombytes(data[offset:offset+size*8])
+            offset += size * 8
+            tiers[tier] = (count, [total, known], values)
+
+        return name, samples, tiers, offset
+
+
+class TimeSeries():
+    """Sample bot metrics every minute
+
+    Records the guild count, member joins and commands per minute, database
+    latency and memory use in :class:`Series`. Everything is kept in memory,
+    reading the history never touches the database. The buffers are saved
+    to a file on shutdown and loaded again at startup, minutes the bot was
+    offline are left empty.
+
+    Args:
+    -----
+    bot: :class:`commands.Bot`
+        The bot
+    path: :class:`str`
+        The file the buffers are saved in. Defaults to "data/timeseries.bin".
+    interval: :class:`float`
+        Seconds between samples. Defaults to 60.0.
+    """
+
+    def __init__(self, bot, path:str="data/timeseries.bin", interval:float=60.0):
+        self.bot = bot
+        self.bot.timeseries = self
+        self.path = path
+        self.interval = interval
+        self.task = None
+
+        self.series = {s.name: s for s in (
+            Series("guilds"),
+            Series("joins", "/min"),
+            Series("commands", "/min"),
+            Series("db_latency", "ms"),
+            Series("memory", "MiB")
+        )}
+
+        # events since the last sample
+        self.joins = 0
+        self.commands = 0
+
+        self.load()
+
+        self.bot.add_listener(self.on_ready)
+        self.bot.add_listener(self.on_member_join)
+        self.bot.add_listener(self.on_command)
+
+
+    def __getitem__(self, name:str) -> Series:
+        return self.series[name]
+
+
+    async def on_ready(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self._run())
+
+
+    async def on_member_join(self, member):
+        self.joins += 1
+
+
+    async def on_command(self, ctx):
+        self.commands += 1
+
+
+    async def _db_latency(self) -> float:
+        """Time a query in milliseconds, nan if it failed"""
+
+        start = time.perf_counter()
+
+        try:
+            await self.bot.db.execute("SELECT 1")
+        except Exception:
+            return math.nan
+
+        return (time.perf_counter() - start) * 1000
+
+
+    @staticmethod
+    def _memory() -> float:
+        """The resident memory of the process in MiB"""
+
+        try:
+            with open("/proc/self/statm") as file:
+                pages = int(file.read().split()[1])
+
+            return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+        except (OSError, ValueError):
+            # the peak is the best there is without /proc
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+    async def sample(self):
+        """Add a sample to every series"""
+
+        # per minute, no matter the interval
+        minutes = self.interval / 60
+        joins, self.joins = self.joins, 0
+        commands, self.commands = self.commands, 0
+
+        self.series["guilds"].add(len(self.bot.guilds))
+        self.series["joins"].add(joins / minutes)
+        self.series["commands"].add(commands / minutes)
+        self.series["db_latency"].add(await self._db_latency())
+        self.series["memory"].add(self._memory())
+
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+
+            try:
+                await self.sample()
+            except Exception as e:
+                log.error("Failed to sample time series", exc_info=e)
+
+
+    def save(self):
+        """Save the buffers to the file"""
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        data = [MAGIC, struct.pack("<dH", time.time(), len(self.series))]
+        data.extend(series.pack() for series in self.series.values())
+
+        # write a new file and replace the old one, so a crash never leaves half a file
+        with open(f"{self.path}.tmp", "wb") as file:
+            file.write(b"".join(data))
+
+        os.replace(f"{self.path}.tmp", self.path)
+
+
+    def load(self):
+        """Load the buffers from the file, if it exists"""
+
+        try:
+            with open(self.path, "rb") as file:
+                data = memoryview(file.read())
+
+        except FileNotFoundError:
+            return
+
+        if bytes(data[:len(MAGIC)]) != MAGIC:
+            log.warning(f"Ignoring {self.path}, it isn't a time series file")
+            return
+
+        try:
+            saved, amount = struct.unpack_from("<dH", data, len(MAGIC))
+            offset = len(MAGIC) + struct.calcsize("<dH")
+
+            for _ in range(amount):
+                name, samples, tiers, offset = Series.unpack(data, offset)
+                series = self.series.get(name)
+
+                if series is None:
+                    # no longer recorded
+                    continue
+
+                series.samples = samples
+
+                for tier, (count, pending, values) in tiers.items():
+                    ring = series.tiers[tier]
+
+                    if len(values) == ring.size:
+                        ring.data, ring.count = values, count
+                        series.pending[tier] = pending
+
+        except (struct.error, UnicodeDecodeError) as e:
+            log.warning(f"Ignoring {self.path}, it is damaged", exc_info=e)
+            return
+
+        # leave the minutes the bot was offline empty, at most a day of them
+        missed = min(int((time.time() - saved) / self.interval), TIERS[-1][1])
+
+        for series in self.series.values():
+            for _ in range(missed):
+                series.add(math.nan)
@@ -0,0 +1,145 @@
+'''User resolution.
+
+Get users by id with as few REST requests as possible.
+'''
+
+import asyncio, discord, logging, time
+from collections import OrderedDict
+
+
+log = logging.getLogger(__name__)
+
+
+class UserResolver():
+    """Resolve user ids to users
+
+    Looks in the bot's user cache first, then in a cache of users fetched
+    from discord, and only fetches the rest. Ids that don't belong to a user,
+    like deleted accounts, are cached too. Ids that failed to fetch for
+    another reason resolve to None and are fetched again next time. Fetches
+    run concurrently up to a limit, and a id that is already being fetched
+    is not fetched again.
+
+    Args:
+    -----
+    bot: :class:`commands.Bot`
+        The bot
+    size: :class:`int`
+        Max amount of fetched users to keep. Defaults to 5000.
+    ttl: :class:`float`
+        Seconds a fetched user is kept. Defaults to 3600.0.
+    concurrency: :class:`int`
+        Max amount of fetches at the same time. Defaults to 10.
+    """
+
+    def __init__(self, bot, size:int=5000, ttl:float=3600.0, concurrency:int=10):
+        self.bot = bot
+        self.bot.user_resolver = self
+        self.size = size
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self.users = OrderedDict()
+        self.fetching = {}
+        self._semaphore = None
+
+
+    def __len__(self):
+        return len(self.users)
+
+
+    def cached(self, id:int):
+        """Get a user without fetching it
+
+        returns
+        -------
+        Tuple[:class:`bool`, Optional[:class:`discord.User`]]
+            If the id was cached, and the user or None if the id has no user.
+        """
+
+        user = self.bot.get_user(id)
+
+        if user:
+            return True, user
+
+        entry = self.users.get(id)
+
+        if entry is None:
+            return False, None
+
+        if time.monotonic() - entry[0] > self.ttl:
+            # to old
+            del self.users[id]
+            return False, None
+
+        return True, entry[1]
+
+
+    async def _fetch(self, id:int):
+        """Fetch a user from discord and cache it"""
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        async with self._semaphore:
+            try:
+                user = await self.bot.fetch_user(id)
+            except discord.NotFound:
+                user = None
+            except discord.HTTPException as error:
+                # not cached, the user may exist
+                log.warning(f"Failed to fetch user {id}: {error}")
+                return None
+
+        self.users[id] = (time.monotonic(), user)
+        self.users.move_to_end(id)
+
+        if len(self.users) > self.size:
+            self.users.popitem(last=False)
+
+        return user
+
+
+    async def resolve(self, id:int):
+        """Get a user
+
+        args
+        ----
+        id: :class:`int`
+            The id of the user.
+
+        returns
+        -------
+        Optional[:class:`discord.User`]
+            The user, or None if there is no user with that id.
+        """
+
+        found, user = self.cached(id)
+
+        if found:
+            return user
+
+        if id not in self.fetching:
+            self.fetching[id] = asyncio.ensure_future(self._fetch(id))
+            self.fetching[id].add_done_callback(lambda _: self.fetching.pop(id, None))
+
+        return await asyncio.shield(self.fetching[id])
+
+
+    async def resolve_many(self, ids) -> dict:
+        """Get many users at once
+
+        args
+        ----
+        ids: Iterable[:class:`int`]
+            The ids of the users.
+
+        returns
+        -------
+        Dict[:class:`int`, Optional[:class:`discord.User`]]
+            The user for each id, None for ids that have no user.
+        """
+
+        ids = list(dict.fromkeys(ids))
+        users = await asyncio.gather(*[self.resolve(id) for id in ids])
+
+        return dict(zip(ids, users))